@@ -13,6 +13,8 @@ from app.core.database import Base
 from app.modules.user import models as user_models   # noqa: F401
 from app.modules.group import models as group_models # noqa: F401
 from app.modules.task import models as task_models   # noqa: F401
+from app.modules.chat import models as chat_models   # noqa: F401
+from app.modules.scheduler import models as scheduler_models # noqa: F401
 
 config = context.config
 
@@ -0,0 +1,31 @@
+"""add_calendar_range_indexes
+
+Revision ID: 3f6b2d8c1a47
+Revises: af054002000c
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6b2d8c1a47'
+down_revision: Union[str, Sequence[str], None] = 'af054002000c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # カレンダー (グループ×月) の範囲検索用
+    op.create_index('ix_tasks_group_id_date', 'tasks', ['group_id', 'date'], unique=False)
+    # 「自分のタスク」(user_id で絞り込み → tasks に結合) 用
+    op.create_index('ix_task_user_relations_user_id_task_id', 'task_user_relations', ['user_id', 'task_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_user_relations_user_id_task_id', table_name='task_user_relations')
+    op.drop_index('ix_tasks_group_id_date', table_name='tasks')
@@ -0,0 +1,36 @@
+"""add_reminder_checkpoints
+
+Revision ID: 5a8c3e1f7d24
+Revises: e2b9f4a6c871
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a8c3e1f7d24'
+down_revision: Union[str, Sequence[str], None] = 'e2b9f4a6c871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reminder_checkpoints',
+    sa.Column('reminder_date', sa.Date(), nullable=False, comment='リマインダーを送った日'),
+    sa.Column('group_id', sa.String(length=36), nullable=False),
+    sa.Column('notified_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.group_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('reminder_date', 'group_id')
+    )
+    op.add_column('scheduler_runs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True, comment='実行中のプロセスが定期的に更新する (途切れたものは再開の対象)'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('scheduler_runs', 'heartbeat_at')
+    op.drop_table('reminder_checkpoints')
@@ -0,0 +1,29 @@
+"""drop_redundant_relation_user_index
+
+Revision ID: 7c2e9b4d1f58
+Revises: d5a1e8c3f046
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9b4d1f58'
+down_revision: Union[str, Sequence[str], None] = 'd5a1e8c3f046'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # user_id 単独のインデックスは (user_id, task_id) の複合インデックスで代用できる。
+    # 残っているとプランナーが「自分のタスク」の検索でこちらを選び、複合インデックスが使われない
+    op.drop_index('ix_task_user_relations_user_id', table_name='task_user_relations')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_task_user_relations_user_id', 'task_user_relations', ['user_id'], unique=False)
@@ -0,0 +1,60 @@
+"""add_task_recurrences
+
+Revision ID: 7c4e91a2b5d3
+Revises: 3f6b2d8c1a47
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e91a2b5d3'
+down_revision: Union[str, Sequence[str], None] = '3f6b2d8c1a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_recurrences',
+    sa.Column('recurrence_id', sa.String(length=36), nullable=False),
+    sa.Column('template_id', sa.String(length=36), nullable=False),
+    sa.Column('group_id', sa.String(length=36), nullable=False),
+    sa.Column('freq', sa.String(length=20), nullable=False, comment='weekly: 毎週, monthly: 毎月'),
+    sa.Column('interval', sa.Integer(), nullable=False, comment='何週/何ヶ月おきか'),
+    sa.Column('dtstart', sa.Date(), nullable=False, comment='初回の日付 (曜日・日付の基準)'),
+    sa.Column('until', sa.Date(), nullable=True, comment='この日まで (含む)'),
+    sa.Column('count', sa.Integer(), nullable=True, comment='回数 (until とは併用不可)'),
+    sa.Column('start_time', sa.Time(), nullable=True),
+    sa.Column('end_time', sa.Time(), nullable=True),
+    sa.Column('exdates', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.group_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['template_id'], ['task_templates.template_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('recurrence_id')
+    )
+    op.create_index(op.f('ix_task_recurrences_group_id'), 'task_recurrences', ['group_id'], unique=False)
+    op.create_index(op.f('ix_task_recurrences_recurrence_id'), 'task_recurrences', ['recurrence_id'], unique=False)
+    op.create_index(op.f('ix_task_recurrences_template_id'), 'task_recurrences', ['template_id'], unique=False)
+
+    op.add_column('tasks', sa.Column('recurrence_id', sa.String(length=36), nullable=True))
+    op.add_column('tasks', sa.Column('occurrence_date', sa.Date(), nullable=True, comment='繰り返しルール上の本来の日付 (日付変更後も保持)'))
+    op.create_foreign_key('tasks_recurrence_id_fkey', 'tasks', 'task_recurrences', ['recurrence_id'], ['recurrence_id'], ondelete='SET NULL')
+    op.create_unique_constraint('unique_task_recurrence_occurrence', 'tasks', ['recurrence_id', 'occurrence_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('unique_task_recurrence_occurrence', 'tasks', type_='unique')
+    op.drop_constraint('tasks_recurrence_id_fkey', 'tasks', type_='foreignkey')
+    op.drop_column('tasks', 'occurrence_date')
+    op.drop_column('tasks', 'recurrence_id')
+
+    op.drop_index(op.f('ix_task_recurrences_template_id'), table_name='task_recurrences')
+    op.drop_index(op.f('ix_task_recurrences_recurrence_id'), table_name='task_recurrences')
+    op.drop_index(op.f('ix_task_recurrences_group_id'), table_name='task_recurrences')
+    op.drop_table('task_recurrences')
@@ -0,0 +1,54 @@
+"""add_task_rsvp_counts
+
+Revision ID: 9d1f6b3a4e58
+Revises: 5a8c3e1f7d24
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d1f6b3a4e58'
+down_revision: Union[str, Sequence[str], None] = '5a8c3e1f7d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('join_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('tasks', sa.Column('absent_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('tasks', sa.Column('undecided_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('tasks', sa.Column('assigned_count', sa.Integer(), server_default='0', nullable=False))
+
+    # 既存のリレーションから集計する
+    op.execute("""
+        UPDATE tasks SET
+            join_count = c.join_count,
+            absent_count = c.absent_count,
+            undecided_count = c.undecided_count,
+            assigned_count = c.assigned_count
+        FROM (
+            SELECT
+                task_id,
+                count(*) FILTER (WHERE reaction = 'join') AS join_count,
+                count(*) FILTER (WHERE reaction = 'absent') AS absent_count,
+                count(*) FILTER (WHERE reaction = 'undecided') AS undecided_count,
+                count(*) FILTER (WHERE is_assigned) AS assigned_count
+            FROM task_user_relations
+            GROUP BY task_id
+        ) AS c
+        WHERE tasks.task_id = c.task_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tasks', 'assigned_count')
+    op.drop_column('tasks', 'undecided_count')
+    op.drop_column('tasks', 'absent_count')
+    op.drop_column('tasks', 'join_count')
@@ -0,0 +1,29 @@
+"""add_group_reminder_offsets
+
+Revision ID: b81d3e6f0c92
+Revises: 7c4e91a2b5d3
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81d3e6f0c92'
+down_revision: Union[str, Sequence[str], None] = '7c4e91a2b5d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 既存のグループは従来どおり「当日・前日・1週間前」に通知する
+    op.add_column('groups', sa.Column('reminder_offsets', sa.JSON(), server_default='[0, 1, 7]', nullable=False, comment='リマインダーを送る日 (予定の何日前か) のリスト'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('groups', 'reminder_offsets')
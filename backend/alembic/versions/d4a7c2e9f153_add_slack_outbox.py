@@ -0,0 +1,47 @@
+"""add_slack_outbox
+
+Revision ID: d4a7c2e9f153
+Revises: b81d3e6f0c92
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c2e9f153'
+down_revision: Union[str, Sequence[str], None] = 'b81d3e6f0c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('slack_outbox',
+    sa.Column('outbox_id', sa.String(length=36), nullable=False),
+    sa.Column('idempotency_key', sa.String(length=255), nullable=False),
+    sa.Column('group_id', sa.String(length=36), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False, comment='通知の種類 (task_created, tasks_bulk_created など)'),
+    sa.Column('text', sa.Text(), nullable=False, comment='送信する本文'),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='pending / sent / dead'),
+    sa.Column('attempts', sa.Integer(), nullable=False, comment='送信を試みた回数'),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='次に送信を試みる日時'),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.group_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('outbox_id'),
+    sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index(op.f('ix_slack_outbox_group_id'), 'slack_outbox', ['group_id'], unique=False)
+    op.create_index('ix_slack_outbox_status_next_attempt_at', 'slack_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_slack_outbox_status_next_attempt_at', table_name='slack_outbox')
+    op.drop_index(op.f('ix_slack_outbox_group_id'), table_name='slack_outbox')
+    op.drop_table('slack_outbox')
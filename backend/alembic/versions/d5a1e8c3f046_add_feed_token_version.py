@@ -0,0 +1,28 @@
+"""add_feed_token_version
+
+Revision ID: d5a1e8c3f046
+Revises: f3c8d1a5b297
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1e8c3f046'
+down_revision: Union[str, Sequence[str], None] = 'f3c8d1a5b297'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('feed_token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'feed_token_version')
@@ -0,0 +1,43 @@
+"""add_scheduler_runs
+
+Revision ID: e2b9f4a6c871
+Revises: d4a7c2e9f153
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b9f4a6c871'
+down_revision: Union[str, Sequence[str], None] = 'd4a7c2e9f153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('scheduler_runs',
+    sa.Column('run_id', sa.String(length=36), nullable=False),
+    sa.Column('job_name', sa.String(length=100), nullable=False, comment='ジョブ名 (daily_reminders など)'),
+    sa.Column('scheduled_for', sa.DateTime(timezone=True), nullable=False, comment='ジョブの予定時刻'),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='running / succeeded / failed'),
+    sa.Column('owner', sa.String(length=255), nullable=False, comment='実行したプロセス (ホスト名:pid)'),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('duration_ms', sa.Float(), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True, comment='ジョブの結果 (送信件数など)'),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('run_id'),
+    sa.UniqueConstraint('job_name', 'scheduled_for', name='uq_scheduler_runs_job_slot')
+    )
+    op.create_index('ix_scheduler_runs_started_at', 'scheduler_runs', ['started_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scheduler_runs_started_at', table_name='scheduler_runs')
+    op.drop_table('scheduler_runs')
@@ -0,0 +1,56 @@
+# backend/app/core/bloom.py
+
+import hashlib
+import math
+from typing import Tuple
+
+
+class BloomFilter:
+    """
+    省メモリな集合 (追加のみ)。
+    「含まれていない」の判定は確実で、「含まれている」は error_rate 程度の確率で誤る (偽陽性) ため、
+    陽性の場合は呼び出し側で正確な保存先を確認してください。
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # 要素数 capacity で偽陽性率が error_rate になるビット数とハッシュ関数の数
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _hashes(self, key: str) -> Tuple[int, int]:
+        # 128bit のハッシュを2つに分け、h1 + i * h2 で k 個の位置を作る (double hashing)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, key: str) -> None:
+        h1, h2 = self._hashes(key)
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % self.num_bits
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        # リクエストごとに呼ばれるため、含まれない場合は最初に 0 のビットを見つけた時点で返す
+        h1, h2 = self._hashes(key)
+        bits, num_bits = self._bits, self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def stats(self) -> dict:
+        # 現在の要素数での偽陽性率の見積もり
+        estimated = (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "bytes": len(self._bits),
+            "hashes": self.num_hashes,
+            "estimated_false_positive_rate": round(estimated, 6),
+        }
@@ -0,0 +1,106 @@
+# backend/app/core/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .metrics import Counter
+
+# 生成されたキャッシュの一覧 (メトリクス表示用)
+_registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    プロセス内の TTL 付き LRU キャッシュ。
+    - 各エントリは ttl_seconds 経過で失効します (ttl_seconds <= 0 の場合はキャッシュ無効)
+    - maxsize を超えると最も古く使われたエントリから追い出します
+    - ヒット/ミス/追い出し回数を数え、/internal/metrics/caches から参照できます
+
+    uvicorn のワーカーごとに独立しているため、他プロセスでの更新は TTL が切れるまで反映されません。
+    「最大でも TTL 秒だけ古い値が見える」ことを許容できるデータにのみ使用してください。
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, maxsize: int = 10000):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = Counter()
+        self.invalidations = Counter()
+
+        _registry[name] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """有効なエントリがあれば値を、なければ None を返す"""
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits.inc()
+                    return value
+                # 期限切れ
+                del self._data[key]
+        self.misses.inc()
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled or value is None:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions.inc()
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations.inc()
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """キーが条件に一致するエントリをまとめて削除する"""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+                self.invalidations.inc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        hits, misses = self.hits.value, self.misses.value
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "evictions": self.evictions.value,
+            "invalidations": self.invalidations.value,
+        }
+
+
+def get_cache_stats() -> dict:
+    """登録済みの全キャッシュの統計を返す"""
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
@@ -20,16 +21,127 @@ class Settings(BaseSettings):
     DB_PORT: str = "3306"
     DB_NAME: str = "myapp_db"
 
+    # コネクションプール設定 (uvicornのワーカー1つあたりの値)
+    # 全ワーカーの (DB_POOL_SIZE + DB_MAX_OVERFLOW) の合計が Postgres の max_connections を超えないように調整してください
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0   # プールが空いていない時に待つ最大秒数
+    DB_POOL_RECYCLE: int = 3600     # この秒数を超えた接続は作り直す
+    # 接続の生存確認方法
+    # "always": チェックアウトの度に確認する (確実だが毎回1往復増える)
+    # "recycle": 確認しない。DB_POOL_RECYCLE と切断検知時の自動破棄に任せる
+    DB_POOL_PRE_PING: Literal["always", "recycle"] = "always"
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # SQL1文あたりのタイムアウト (0 = 無制限)
+
+    # 内部向けエンドポイント (/internal/*) の認証トークン。空の場合は無効化されます
+    INTERNAL_API_TOKEN: str = ""
+
     # JWT認証用の設定
     # ※本番環境では必ず強力なランダム文字列に変更してください (openssl rand -hex 32 等で生成)
     SECRET_KEY: str = "CHANGE_THIS_TO_A_VERY_SECURE_SECRET_KEY"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200  # トークンの有効期限（分）| 43200分 = 1ヶ月
+    # アクセストークンは短命にし、期限が切れたらリフレッシュトークンで再発行する (POST /token/refresh)
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15     # アクセストークンの有効期限（分）。凍結・ログアウトは最長でもこの時間で全台に反映
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30       # リフレッシュトークンの有効期限（日）。使う度に延長されます
+
+    # アクセストークンの検証結果のキャッシュ (トークンの exp まで署名の検証を省略する)
+    ACCESS_TOKEN_DECODE_CACHE_TTL_SECONDS: int = 900
+    ACCESS_TOKEN_DECODE_CACHE_MAXSIZE: int = 10000
+    # JWT の検証に使うライブラリ ("pyjwt" は PyJWT パッケージが必要)。環境ごとの速度は python -m app.services.auth_bench で比較できます
+    JWT_BACKEND: Literal["jose", "pyjwt"] = "jose"
+
+    # 失効させたアクセストークンの一覧 (ブルームフィルタとして各ワーカーのメモリに保持)
+    # 他のワーカーでのログアウト・凍結は最大 SYNC 秒で反映されます
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 5
+    TOKEN_REVOCATION_REBUILD_SECONDS: int = 3600   # 期限切れの失効情報を取り除いて作り直す間隔
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+
+    # パスワードハッシュ (bcrypt) の設定
+    # BCRYPT_ROUNDS を変えると、既存ユーザーのハッシュは次回ログイン成功時に新しいコストで作り直されます
+    BCRYPT_ROUNDS: int = 12
+    # bcrypt を実行する専用プール (uvicornのワーカー1つあたり)。"process" は CPU コア単位で分離、"thread" はスレッドで実行
+    PASSWORD_HASH_EXECUTOR: Literal["process", "thread"] = "process"
+    PASSWORD_HASH_WORKERS: int = 2
+    # 実行中 + 待機中の上限。超えた分のログイン・登録は 429 で断ります
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # ログイン試行の制限 (直近 WINDOW 秒の試行をメールアドレスごと・接続元IPごとに数え、上限を超えたら 429)
+    # 成功したログインは数えません。複数ワーカー・複数台で共有する場合は redis を指定してください
+    LOGIN_RATE_LIMIT_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    LOGIN_RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 300
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 5
+    LOGIN_RATE_LIMIT_PER_IP: int = 30
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000  # memory の場合に保持するキー数の上限
+
+    # 認証済みユーザー情報のキャッシュ (旧形式の有効期限の長いトークンでの get_current_user のDB検索を省略する)
+    # 凍結・削除は同じプロセスでは即時、他のワーカーでも最大この秒数で反映されます (0 = 無効)
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    AUTH_PRINCIPAL_CACHE_MAXSIZE: int = 10000
+
+    # グループ所属情報 (承認状態・管理者権限) のキャッシュ。権限変更は同じく最大この秒数で全ワーカーに反映されます
+    GROUP_MEMBERSHIP_CACHE_TTL_SECONDS: int = 30
+    GROUP_MEMBERSHIP_CACHE_MAXSIZE: int = 50000
+
+    # 月カレンダー (グループ / 自分のタスク) のレスポンスキャッシュ
+    # memory: ワーカーごとのLRU / redis: 全ワーカーで共有 (redis パッケージが必要) / none: 無効
+    # 保存したレスポンスはグループのデータバージョンと照合するため、削除が届かなくても古い内容は返しません
+    RESPONSE_CACHE_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    RESPONSE_CACHE_MAXSIZE: int = 1000
+
+    # カレンダーアプリ購読用の ICS フィード (/my-tasks/feed.ics, /groups/{group_id}/tasks/feed.ics)
+    ICS_FEED_PAST_MONTHS: int = 1      # 今月より前に含める月数
+    ICS_FEED_FUTURE_MONTHS: int = 6    # 今月より後に含める月数
+    # 生成したフィードのキャッシュ秒数。memory の場合は他のワーカーでのタスクの変更がこの秒数以内に反映されます
+    # (redis なら変更時に即座に削除)。凍結・脱退・URL の再発行は、キャッシュに関わらず次の取得から反映されます
+    ICS_FEED_CACHE_TTL_SECONDS: int = 900
+    # 購読用 URL の有効日数 (過ぎたら /feed-url で取得し直す)
+    ICS_FEED_TOKEN_EXPIRE_DAYS: int = 365
+
+    # 月カレンダー画像 (/groups/{group_id}/tasks/calendar.png) の生成
+    CALENDAR_FONT_PATH: str = ""                # 日本語フォントのパス。空欄の場合は Noto Sans CJK 等の既知の場所から探す
+    CALENDAR_IMAGE_CACHE_DIR: str = ""          # 生成した PNG の保存先。空欄の場合は一時ディレクトリ
+    CALENDAR_IMAGE_CACHE_MAX_FILES: int = 500   # 保存する PNG の上限 (超えた分は古いものから削除)
 
     SLACK_CLIENT_ID: str = "CHANGE_ME"
     SLACK_CLIENT_SECRET: str = "CHANGE_ME"
     SLACK_REDIRECT_URI: str = "CHANGE_ME"
 
+    # Slack への一括送信 (リマインダー等) の設定
+    # SLACK_API_BASE_URL はローカルの疑似Slackサーバー (python -m app.services.fake_slack) に向ける場合のみ変更します
+    SLACK_API_BASE_URL: str = "https://slack.com/api/"
+    SLACK_DELIVERY_CONCURRENCY: int = 8      # 同時に送信するメッセージ数の上限
+    SLACK_RATE_PER_SECOND: float = 1.0       # ワークスペース (トークン) ごとの送信レート
+    SLACK_RATE_BURST: int = 3                # 上記レートで許容する瞬間的な連続送信数
+    SLACK_MAX_RETRIES: int = 3               # レート制限・通信エラー時の再送回数
+    SLACK_REQUEST_TIMEOUT_SECONDS: int = 10
+    SLACK_HTTP_POOL_SIZE: int = 20           # Slack API への同時接続数の上限 (keep-alive で使い回す)
+    SLACK_CLIENT_IDLE_SECONDS: int = 600     # この秒数使われていないワークスペースのクライアントは破棄する
+
+    # 定期ジョブ (リマインダー等) のスケジューラー
+    # false の場合、API プロセスではスケジューラーを起動しません (python -m app.core.scheduler を別途起動する)
+    # true のままでも、同じ予定時刻のジョブは全プロセスで1回だけ実行されます
+    SCHEDULER_IN_API: bool = True
+    SCHEDULER_MISFIRE_GRACE_SECONDS: int = 3600  # 予定時刻からこの秒数以内であれば、遅れても実行する
+    SCHEDULER_RUN_LEASE_SECONDS: int = 300       # 実行中の heartbeat がこの秒数途切れたら、落ちたものとして再開の対象にする
+    SCHEDULER_RESUME_CHECK_SECONDS: int = 300    # 失敗・停止した回を再開するか確認する間隔
+
+    # リマインダーの並行処理 (Slack連携済みグループを REMINDER_CHUNK_GROUPS 件ずつに分け、REMINDER_WORKERS 並列で送信)
+    # 各ワーカーが DB接続を1本ずつ使うため、DB_POOL_SIZE + DB_MAX_OVERFLOW 以下にしてください
+    REMINDER_WORKERS: int = 4
+    REMINDER_CHUNK_GROUPS: int = 50
+
+    # Slack通知の送信箱 (python -m app.services.outbox_worker) の設定
+    OUTBOX_BATCH_SIZE: int = 100               # 1回に取り出す件数
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0  # 送信待ちが無い時の確認間隔
+    OUTBOX_MAX_ATTEMPTS: int = 8               # これを超えて失敗したものは dead (送信を諦める)
+    OUTBOX_BACKOFF_BASE_SECONDS: int = 30      # 再送間隔 (失敗の度に倍にする)
+    OUTBOX_BACKOFF_MAX_SECONDS: int = 3600
+    OUTBOX_LEASE_SECONDS: int = 300            # 取り出してからこの秒数内に結果を書き込めなければ再度取り出される
+
     @property
     def DATABASE_URL(self) -> str:
         # Vercel等の環境変数からURLを取得
@@ -44,6 +156,18 @@ class Settings(BaseSettings):
             url = url.replace("postgres://", "postgresql://", 1)
             
         return url
+
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        # 非同期エンジン (asyncpg) 用のURL
+        url = self.DATABASE_URL
+        if url.startswith("postgresql://"):
+            url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+        # asyncpg は sslmode を解釈しないため ssl に読み替える (Vercel等のURL対策)
+        url = url.replace("sslmode=", "ssl=")
+        return url
+
     class Config:
         # .envファイルを読みに行く設定
         env_file = str(BASE_DIR / ".env")
@@ -1,22 +1,133 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from typing import Generator
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from typing import AsyncGenerator, Generator
 
 # 上で作った設定をインポート
 from .config import settings
+from .metrics import Counter, Histogram
+
+# --- コネクションプールの計測 ---
+
+class PoolMetrics:
+    """プールからの接続取得(チェックアウト)に関する累積メトリクス"""
+
+    def __init__(self):
+        self.checkouts = Counter()           # 取得に成功した回数
+        self.checkout_failures = Counter()   # 取得に失敗した回数 (タイムアウトを含む)
+        self.checkout_timeouts = Counter()   # うち DB_POOL_TIMEOUT を超えて諦めた回数
+        self.wait_ms = Histogram()           # 取得までの待ち時間 (新規接続の確立を含む)
+
+
+class _InstrumentedPoolMixin:
+    """
+    QueuePool の _do_get (空き接続の待機・新規接続の作成) を計測するMixin。
+    プールは dispose() 時に同じクラスで作り直されるため、メトリクスはクラス属性で保持します。
+    """
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.checkout_timeouts.inc()
+            self.metrics.checkout_failures.inc()
+            raise
+        except Exception:
+            self.metrics.checkout_failures.inc()
+            raise
+        finally:
+            self.metrics.wait_ms.observe((time.perf_counter() - started) * 1000)
+
+        self.metrics.checkouts.inc()
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def _pool_options() -> dict:
+    """Settings から同期/非同期エンジン共通のプール設定を組み立てる"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        # "recycle" の場合は事前確認の往復を省略し、切断はエラー時の自動破棄に任せる
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+    }
+
+def _statement_timeout_args(is_async: bool) -> dict:
+    """statement_timeout を接続時に設定するための connect_args を返す"""
+    if settings.DB_STATEMENT_TIMEOUT_MS <= 0:
+        return {}
+    if is_async:
+        # asyncpg はサーバー設定を server_settings で受け取る
+        return {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    # psycopg2 は libpq の options で受け取る
+    return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
 
 # データベースエンジンの作成
-# MySQLの場合、接続が切れないように pool_recycle を設定するのが定石です
+# プールサイズ等は Settings (環境変数) から設定します
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_recycle=3600,       # 1時間ごとに接続を再利用
-    pool_pre_ping=True,      # 接続前に生存確認を行う（エラー防止）
-    echo=False               # SQLログを出力したい場合は True にする
+    poolclass=InstrumentedQueuePool,
+    connect_args=_statement_timeout_args(is_async=False),
+    echo=False,              # SQLログを出力したい場合は True にする
+    **_pool_options()
 )
 
 # セッション作成クラス
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 非同期エンジンの作成 (APIリクエスト用 / asyncpg)
+# 同期エンジンはスケジューラやAlembicなど、イベントループ外の処理で引き続き使用します
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    connect_args=_statement_timeout_args(is_async=True),
+    echo=False,
+    **_pool_options()
+)
+
+# 非同期セッション作成クラス
+# commit後に属性が失効すると、レスポンス生成時に遅延ロード(=暗黙のI/O)が走ってしまうため expire_on_commit=False
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+def get_pool_stats() -> dict:
+    """
+    同期/非同期エンジンのプールの現在値と累積メトリクスを返す。
+    値は「このプロセス(uvicornワーカー)の中」のものです。
+    """
+    stats = {}
+    for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # overflow() は pool_size 未満だと負の値になるため 0 で切り上げる
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "checkouts": pool.metrics.checkouts.value,
+            "checkout_failures": pool.metrics.checkout_failures.value,
+            "checkout_timeouts": pool.metrics.checkout_timeouts.value,
+            "wait_ms": pool.metrics.wait_ms.snapshot(),
+        }
+    return stats
+
 # モデル定義のための基底クラス (各モデルはこれを継承する)
 Base = declarative_base()
 
@@ -29,4 +140,12 @@ def get_db() -> Generator:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    非同期版のデータベースセッション取得関数。
+    async def のエンドポイントから Depends(get_async_db) で使用します。
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,20 +1,28 @@
-from fastapi import Depends, HTTPException, status
+import secrets
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import security
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.modules.group import crud as group_crud
+from app.modules.group.crud import Membership
 from app.modules.user import crud as user_crud
+from app.modules.user.revocation import revocation_list
 
 # トークンの受け渡し場所（URL）の定義
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     JWTトークンを検証し、現在のユーザーを取得する依存関数
+    返り値はDBセッションに紐付かない Principal (読み取り専用のユーザー情報) です。
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -25,14 +33,23 @@ def get_current_user(
     payload = security.decode_access_token(token)
     if payload is None:
         raise credentials_exception
+
+    if payload.get("typ") == security.ACCESS_TOKEN_TYPE:
+        # 短命のアクセストークン: 内容だけでユーザーを確定し、失効リスト (メモリ上) と照合する
+        if not payload.get("sub") or await revocation_list.is_revoked(db, payload):
+            raise credentials_exception
+        user = user_crud.Principal.from_claims(payload)
+        if not user.is_active:
+            raise HTTPException(status_code=403, detail="アカウントが凍結されています。")
+        return user
         
-    # sub (subject) には user_id や username が入っている
+    # 旧形式のトークン (sub = email, 有効期限が長い)。期限が切れるまでは従来通りDBで凍結状態を確認する
     email: str = payload.get("sub")
     if email is None:
         raise credentials_exception
     
-    # DBからユーザーを検索
-    user = user_crud.get_user_by_email(db, email=email)
+    # ユーザーを検索 (短時間キャッシュ済みならDBは参照しない)
+    user = await user_crud.get_principal_by_email(db, email=email)
     if user is None:
         raise credentials_exception
 
@@ -40,4 +57,58 @@ def get_current_user(
     if not user.is_active:
         raise HTTPException(status_code=403, detail="アカウントが凍結されています。")
 
-    return user
\ No newline at end of file
+    return user
+
+# --- グループ権限チェック ---
+
+async def get_group_membership(
+    group_id: str,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[Membership]:
+    """
+    ログイン中ユーザーの、対象グループ (パス/クエリの group_id) におけるメンバー情報を返す依存関数。
+    FastAPIは同一リクエスト内で依存関数の結果を使い回すため、
+    複数の権限チェックから参照してもDB検索は最大1回です (さらにプロセス内でTTLキャッシュされます)。
+    所属していない場合は None を返します。
+    """
+    return await group_crud.get_membership(db, current_user.user_id, group_id)
+
+def check_group_member(membership: Optional[Membership]) -> Membership:
+    """
+    一般メンバーチェック
+    （タスクの閲覧、作成、自分のリアクション更新用）
+    """
+    if not membership or not membership.is_member:
+        raise HTTPException(status_code=403, detail="グループのメンバーではありません。")
+    return membership
+
+def check_group_admin(membership: Optional[Membership]) -> Membership:
+    """
+    操作しているユーザーが、そのグループの「承認済み管理者(代表者)」かチェックする
+    （担当者任命などの管理者操作用）
+    """
+    if not membership or not membership.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="この操作を行う権限がありません（管理者権限が必要です）。"
+        )
+    return membership
+
+def require_group_member(membership: Optional[Membership] = Depends(get_group_membership)) -> Membership:
+    """承認済みメンバーのみ許可する依存関数"""
+    return check_group_member(membership)
+
+def require_group_admin(membership: Optional[Membership] = Depends(get_group_membership)) -> Membership:
+    """承認済み管理者のみ許可する依存関数"""
+    return check_group_admin(membership)
+
+def verify_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """
+    内部向けエンドポイント (/internal/*) 用の依存関数。
+    X-Internal-Token ヘッダーが INTERNAL_API_TOKEN と一致しない場合は 404 を返し、
+    エンドポイントの存在自体を隠します。INTERNAL_API_TOKEN が空の場合は常に無効です。
+    """
+    expected = settings.INTERNAL_API_TOKEN
+    if not expected or not x_internal_token or not secrets.compare_digest(x_internal_token, expected):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
@@ -0,0 +1,52 @@
+# backend/app/core/etag.py
+
+"""
+条件付き GET (ETag / If-None-Match) のヘルパー。
+
+ETag はレスポンスの中身ではなく、中身を決める値 (グループのデータバージョン・クエリ等) から作ります。
+そのため、一致した場合はタスクの検索やシリアライズを行わずに 304 を返せます。
+
+    etag = make_etag("calendar", group_id, version, year, month)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+"""
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+# レスポンスの形式 (スキーマ) を変えた時に上げる。古い形式のキャッシュを確実に無効にするため
+REPRESENTATION_VERSION = 2
+
+# ブラウザには保存させつつ、使う前に必ず再検証させる (ユーザーごとのデータなので共有キャッシュには置かせない)
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """中身を決める値から強い ETag を作る"""
+    raw = "|".join(str(part) for part in (REPRESENTATION_VERSION, *parts))
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match に etag が含まれているか (GET なので弱い比較)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in candidates
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
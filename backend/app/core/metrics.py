@@ -0,0 +1,60 @@
+# backend/app/core/metrics.py
+
+import threading
+from bisect import bisect_left
+from typing import Sequence
+
+# レイテンシ計測用のデフォルトのバケット境界 (ミリ秒)
+DEFAULT_LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """
+    スレッドセーフな簡易ヒストグラム。
+    各バケットは「境界値以下」の件数を個別に持ち、最後のバケットは境界を超えた値 (+Inf) を数えます。
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self._bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+            count = self._count
+
+        buckets = {f"le_{bound:g}": c for bound, c in zip(self._bounds, counts)}
+        buckets["le_inf"] = counts[-1]
+        return {
+            "count": count,
+            "sum": round(total, 3),
+            "avg": round(total / count, 3) if count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class Counter:
+    """スレッドセーフな単調増加カウンタ"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
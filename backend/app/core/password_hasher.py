@@ -0,0 +1,128 @@
+# backend/app/core/password_hasher.py
+
+"""
+パスワードのハッシュ化・検証 (bcrypt) を専用のプールで実行する。
+
+bcrypt は1回あたり数百ミリ秒 CPU を占有するため、共有のスレッドプール (run_in_threadpool) で実行すると
+ログインが集中した時に他のエンドポイントの同期処理まで待たされます。
+専用のプール (PASSWORD_HASH_WORKERS 並列) に分離し、実行中 + 待機中が PASSWORD_HASH_MAX_PENDING を
+超えた分はすぐに 429 を返して、待ち行列が際限なく伸びないようにします。
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# 混雑時にクライアントへ伝える再試行までの秒数
+RETRY_AFTER_SECONDS = 2
+
+
+class PasswordHasher:
+    """
+    bcrypt 専用のプール。イベントループのスレッドからのみ呼ばれる前提で、待ち件数はロック無しで数える
+    """
+
+    def __init__(self, kind: Optional[str] = None, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.kind = kind or settings.PASSWORD_HASH_EXECUTOR
+        self.workers = max(1, workers or settings.PASSWORD_HASH_WORKERS)
+        self.max_pending = max(self.workers, max_pending or settings.PASSWORD_HASH_MAX_PENDING)
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._peak_pending = 0
+        self.completed = Counter()
+        self.rejected = Counter()
+        self.rehashed = Counter()
+        # 投入から完了まで (待ち時間を含む) のミリ秒
+        self.latency_ms = Histogram()
+
+    def _get_executor(self) -> Executor:
+        # プロセスはリクエストが来てから起動する (fork はイベントループやDB接続を複製するため spawn を使う)
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    @property
+    def saturated(self) -> bool:
+        return self._pending >= self.max_pending
+
+    async def _run(self, fn, *args):
+        if self.saturated:
+            self.rejected.inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="ただいま混み合っています。しばらくしてから再度お試しください。",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            # ワーカープロセスが落ちた場合は次の呼び出しでプールを作り直す
+            logger.exception("password hash worker crashed; recreating pool")
+            self._executor = None
+            raise
+        finally:
+            self._pending -= 1
+            self.completed.inc()
+            self.latency_ms.observe((time.perf_counter() - started) * 1000)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(security.verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.get_password_hash, password, settings.BCRYPT_ROUNDS)
+
+    async def rehash_if_needed(self, plain_password: str, hashed_password: str) -> Optional[str]:
+        """
+        ログイン成功時に呼ぶ。保存されているコストが設定と異なれば新しいハッシュを返す。
+        混雑している場合はログイン自体を優先し、作り直しは次回に回す (None を返す)
+        """
+        if not security.password_needs_rehash(hashed_password) or self.saturated:
+            return None
+        new_hash = await self.hash(plain_password)
+        self.rehashed.inc()
+        return new_hash
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        pending = self._pending
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "in_flight": min(pending, self.workers),
+            "queue_depth": max(0, pending - self.workers),
+            "peak_pending": self._peak_pending,
+            "completed": self.completed.value,
+            "rejected": self.rejected.value,
+            "rehashed": self.rehashed.value,
+            "latency_ms": self.latency_ms.snapshot(),
+        }
+
+
+password_hasher = PasswordHasher()
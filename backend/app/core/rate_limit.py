@@ -0,0 +1,233 @@
+# backend/app/core/rate_limit.py
+
+"""
+ログイン試行のスライディングウィンドウ制限 (総当たり・リスト型攻撃の対策)。
+
+直近 LOGIN_RATE_LIMIT_WINDOW_SECONDS 秒の試行を「メールアドレスごと」と「接続元IPごと」に数え、
+どちらかが上限に達していれば bcrypt の検証を行わずに 429 を返します。
+
+- 試行は検証の前に記録し (同時に大量に送られても上限を超えて検証しない)、ログインに成功した試行は取り消します
+- 保存先は LOGIN_RATE_LIMIT_BACKEND で選びます
+    memory: プロセス内 (1台・1ワーカー向け。ワーカーごとに独立して数えます)
+    redis:  Redis 互換のサーバー (全ワーカー・全台で共有)。redis パッケージが必要です
+    none:   制限しない
+- 保存先の障害時は制限なしで動作し続けます (警告ログのみ)
+"""
+
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.password_hasher import password_hasher
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitStore(ABC):
+    """保存先の共通インターフェース"""
+
+    @abstractmethod
+    async def hit(self, key: str, member: str, limit: int, window: float) -> Optional[float]:
+        """試行を記録する。上限に達していれば記録せず、再試行までの秒数を返す (記録できた場合は None)"""
+
+    @abstractmethod
+    async def undo(self, key: str, member: str) -> None:
+        """hit で記録した試行 (member) を取り消す"""
+
+
+class NullStore(RateLimitStore):
+    async def hit(self, key: str, member: str, limit: int, window: float) -> Optional[float]:
+        return None
+
+    async def undo(self, key: str, member: str) -> None:
+        pass
+
+
+class MemoryStore(RateLimitStore):
+    """
+    プロセス内の試行ログ。キーごとに直近の (時刻, ID) を最大 limit 件だけ持ち、
+    キー数が max_keys を超えた場合は最も古く使われたキーから捨てます
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._data: "OrderedDict[str, Deque[Tuple[float, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, member: str, limit: int, window: float) -> Optional[float]:
+        now = time.monotonic()
+        with self._lock:
+            log = self._data.get(key)
+            if log is None:
+                log = self._data[key] = deque()
+            self._data.move_to_end(key)
+            while log and log[0][0] <= now - window:
+                log.popleft()
+            if len(log) >= limit:
+                return log[0][0] + window - now
+            log.append((now, member))
+            while len(self._data) > self.max_keys:
+                self._data.popitem(last=False)
+        return None
+
+    async def undo(self, key: str, member: str) -> None:
+        with self._lock:
+            log = self._data.get(key)
+            if log is None:
+                return
+            for entry in log:
+                if entry[1] == member:
+                    log.remove(entry)
+                    break
+            if not log:
+                del self._data[key]
+
+
+class RedisStore(RateLimitStore):
+    """
+    Redis 互換サーバーのソート済み集合 (スコア = 時刻) で数える。
+    client には redis.asyncio.Redis 互換のオブジェクト (動作確認用の代替サーバーのクライアント等) も渡せます。
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None, namespace: str = "rl:"):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("LOGIN_RATE_LIMIT_BACKEND=redis には redis パッケージが必要です (pip install redis)") from e
+            client = redis.Redis.from_url(url or settings.LOGIN_RATE_LIMIT_REDIS_URL)
+        self.client = client
+        self.namespace = namespace
+
+    async def hit(self, key: str, member: str, limit: int, window: float) -> Optional[float]:
+        name = self.namespace + key
+        now = time.time()
+        # 先に追加してから数え、上限を超えていれば取り消す (同時の試行が上限を超えて通ることはない)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(name, 0, now - window)
+            pipe.zadd(name, {member: now})
+            pipe.zcard(name)
+            pipe.pexpire(name, int(window * 1000))
+            pipe.zrange(name, 0, 0, withscores=True)
+            _, _, count, _, oldest = await pipe.execute()
+        if count <= limit:
+            return None
+        await self.client.zrem(name, member)
+        return max(0.0, oldest[0][1] + window - now) if oldest else window
+
+    async def undo(self, key: str, member: str) -> None:
+        await self.client.zrem(self.namespace + key, member)
+
+
+def create_store() -> RateLimitStore:
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "redis":
+        return RedisStore()
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "memory":
+        return MemoryStore(settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+    return NullStore()
+
+
+@dataclass
+class LoginAttempt:
+    """記録した試行。ログインに成功したら LoginLimiter.succeeded に渡して取り消す"""
+    member: str
+    keys: List[str] = field(default_factory=list)
+
+
+def client_ip(request: Request) -> str:
+    """
+    接続元のIP。リバースプロキシの後ろで動かす場合は uvicorn の --proxy-headers / --forwarded-allow-ips を設定し、
+    X-Forwarded-For の値が request.client に反映されるようにしてください
+    """
+    return request.client.host if request.client else "unknown"
+
+
+class LoginLimiter:
+    def __init__(self, store: RateLimitStore):
+        self.store = store
+        self.allowed = Counter()
+        self.rejected_email = Counter()
+        self.rejected_ip = Counter()
+        self.errors = Counter()
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        # メールアドレスをそのまま保存しないようハッシュ化する
+        digest = hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:32]
+        return f"login:email:{digest}"
+
+    @staticmethod
+    def _ip_key(ip: str) -> str:
+        return f"login:ip:{ip}"
+
+    async def attempt(self, email: str, ip: str) -> LoginAttempt:
+        """
+        パスワードの検証の前に呼ぶ。メールアドレス・IP のどちらかが上限に達していれば 429
+        """
+        attempt = LoginAttempt(member=uuid.uuid4().hex)
+        limits = [
+            (self._email_key(email), settings.LOGIN_RATE_LIMIT_PER_EMAIL, self.rejected_email),
+            (self._ip_key(ip), settings.LOGIN_RATE_LIMIT_PER_IP, self.rejected_ip),
+        ]
+        window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+        try:
+            for key, limit, rejected in limits:
+                retry_after = await self.store.hit(key, attempt.member, limit, window)
+                if retry_after is not None:
+                    rejected.inc()
+                    await self._undo(attempt)
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="ログインの試行回数が多すぎます。しばらくしてから再度お試しください。",
+                        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+                    )
+                attempt.keys.append(key)
+        except HTTPException:
+            raise
+        except Exception:
+            self.errors.inc()
+            logger.warning("login rate limit store unavailable; allowing attempt", exc_info=True)
+        self.allowed.inc()
+        return attempt
+
+    async def succeeded(self, attempt: LoginAttempt) -> None:
+        """ログインに成功した (またはサーバー側の都合で検証できなかった) 試行は数えない"""
+        try:
+            await self._undo(attempt)
+        except Exception:
+            self.errors.inc()
+            logger.warning("login rate limit store unavailable; could not undo attempt", exc_info=True)
+
+    async def _undo(self, attempt: LoginAttempt) -> None:
+        for key in attempt.keys:
+            await self.store.undo(key, attempt.member)
+        attempt.keys.clear()
+
+    def stats(self) -> dict:
+        rejected = self.rejected_email.value + self.rejected_ip.value
+        # 断った試行で省けた bcrypt の計算時間の目安 (検証1回あたりの平均時間 × 件数)
+        avg_hash_ms = password_hasher.latency_ms.snapshot()["avg"]
+        return {
+            "backend": settings.LOGIN_RATE_LIMIT_BACKEND,
+            "window_seconds": settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+            "limit_per_email": settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+            "limit_per_ip": settings.LOGIN_RATE_LIMIT_PER_IP,
+            "allowed": self.allowed.value,
+            "rejected_email": self.rejected_email.value,
+            "rejected_ip": self.rejected_ip.value,
+            "errors": self.errors.value,
+            "bcrypt_ms_saved_estimate": round(rejected * avg_hash_ms, 1),
+        }
+
+
+login_limiter = LoginLimiter(create_store())
@@ -0,0 +1,196 @@
+# backend/app/core/response_cache.py
+
+"""
+シリアライズ済みレスポンス (JSON のバイト列) のキャッシュ。
+
+RESPONSE_CACHE_BACKEND で保存先を選びます。
+- memory: プロセス内の LRU (TTLCache)。uvicorn のワーカーごとに独立しています
+- redis:  Redis 互換のサーバー (全ワーカー・全台で共有)。redis パッケージが必要です
+- none:   キャッシュしない
+
+値は「どの版のデータから作ったか」(ETag) と一緒に保存し、読み出し時に現在の ETag と一致しなければ使いません。
+書き込み時の削除 (invalidate) が他のワーカーの LRU に届かない場合でも、古いレスポンスが返ることはありません。
+キャッシュサーバーの障害時はキャッシュ無しで動作し続けます (警告ログのみ)。
+"""
+
+import logging
+from typing import Optional
+
+from fastapi import Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.etag import CACHE_CONTROL
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """保存先の共通インターフェース"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str) -> None:
+        raise NotImplementedError
+
+
+class NullBackend(CacheBackend):
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def delete_prefix(self, prefix: str) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """プロセス内の LRU。ヒット率などは /internal/metrics/caches の response_cache で確認できます"""
+
+    def __init__(self, ttl_seconds: float, maxsize: int, name: str = "response_cache"):
+        self.cache = TTLCache(name, ttl_seconds=ttl_seconds, maxsize=maxsize)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self.cache.set(key, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.cache.delete(key)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        self.cache.delete_where(lambda key: key.startswith(prefix))
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis 互換サーバーに保存する。
+    client には redis.asyncio.Redis 互換のオブジェクト (動作確認用の代替サーバーのクライアント等) も渡せます。
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None, ttl_seconds: int = 3600, namespace: str = "resp:"):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("RESPONSE_CACHE_BACKEND=redis には redis パッケージが必要です (pip install redis)") from e
+            client = redis.Redis.from_url(url or settings.RESPONSE_CACHE_REDIS_URL)
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.namespace + key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.client.set(self.namespace + key, value, ex=self.ttl_seconds)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.namespace + key for key in keys))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        batch = []
+        async for key in self.client.scan_iter(match=self.namespace + prefix + "*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.client.delete(*batch)
+                batch = []
+        if batch:
+            await self.client.delete(*batch)
+
+
+def create_backend(
+    name: str = "response_cache",
+    ttl_seconds: Optional[int] = None,
+    namespace: str = "resp:",
+) -> CacheBackend:
+    """RESPONSE_CACHE_BACKEND の保存先を作る。name は memory の場合のメトリクス名、namespace は redis のキーの接頭辞"""
+    ttl_seconds = settings.RESPONSE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(ttl_seconds=ttl_seconds, namespace=namespace)
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(ttl_seconds, settings.RESPONSE_CACHE_MAXSIZE, name=name)
+    return NullBackend()
+
+
+class ResponseCache:
+    """ETag 付きでレスポンスを保存・取得する"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = Counter()
+        self.misses = Counter()
+        self.errors = Counter()
+
+    async def get(self, key: str, etag: str) -> Optional[bytes]:
+        """現在の etag で作られたレスポンスが保存されていれば、その本文を返す"""
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self._on_error("get", e)
+            return None
+        header = etag.encode("utf-8") + b"\n"
+        if value is None or not value.startswith(header):
+            self.misses.inc()
+            return None
+        self.hits.inc()
+        return value[len(header):]
+
+    async def set(self, key: str, etag: str, body: bytes) -> None:
+        try:
+            await self.backend.set(key, etag.encode("utf-8") + b"\n" + body)
+        except Exception as e:
+            self._on_error("set", e)
+
+    async def invalidate(self, *keys: str) -> None:
+        try:
+            await self.backend.delete(*keys)
+        except Exception as e:
+            self._on_error("delete", e)
+
+    async def invalidate_prefix(self, prefix: str) -> None:
+        try:
+            await self.backend.delete_prefix(prefix)
+        except Exception as e:
+            self._on_error("delete_prefix", e)
+
+    def stats(self) -> dict:
+        hits, misses = self.hits.value, self.misses.value
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "errors": self.errors.value,
+        }
+
+    def _on_error(self, op: str, e: Exception) -> None:
+        self.errors.inc()
+        logger.warning("Response cache %s failed: %r", op, e)
+
+
+def json_response(body: bytes, etag: str) -> Response:
+    """シリアライズ済みの JSON を ETag 付きで返す"""
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+response_cache = ResponseCache(create_backend())
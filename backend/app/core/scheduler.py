@@ -1,54 +1,489 @@
 # backend/app/core/scheduler.py
 
+"""
+定期ジョブ (毎朝のリマインダー等) の実行。
+
+    python -m app.core.scheduler   # スケジューラー専用のプロセスとして常駐する
+
+SCHEDULER_IN_API=true の場合は API の各ワーカー内でもスケジューラーが動きます。
+どちらの場合も、ジョブの予定時刻ごとに scheduler_runs へ1行だけ INSERT でき、
+行を作成できたプロセスだけがジョブを実行します (他のプロセスはスキップ)。
+ワーカーや台数がいくつあっても、同じ予定時刻のジョブは1回しか実行されません。
+実行結果と所要時間は scheduler_runs に記録され、/internal/metrics/scheduler から参照できます。
+
+実行中のプロセスは scheduler_runs の heartbeat_at を定期的に更新します。
+再開可能なジョブ (resumable=True) は、失敗した回や heartbeat が途切れた回を
+SCHEDULER_RESUME_CHECK_SECONDS ごとの確認で別のプロセスが引き継いで再実行します (予定時刻から猶予時間内のみ)。
+それ以外のジョブは、実行中にプロセスが落ちた場合も自動では再実行しません。
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy.orm import Session, joinedload
-from datetime import date, timedelta
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import and_, delete, exists, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta, timezone
 
+from app.core.config import settings
 from app.core.database import SessionLocal
 
 from app.modules.task.models import Task
-from app.modules.group.models import Group # Groupもインポート
+from app.modules.group.models import Group, DEFAULT_REMINDER_OFFSETS, REMINDER_OFFSET_CHOICES
 from app.modules.chat import service as slack_service
+from app.modules.scheduler.models import SchedulerRun, ReminderCheckpoint, RUN_RUNNING, RUN_SUCCEEDED, RUN_FAILED
+from app.services.notification import SlackDeliveryQueue
+from app.services.slack_clients import SlackClientRegistry, slack_client_registry
+
+logger = logging.getLogger(__name__)
+
+# 日本時間の定義
+JST = timezone(timedelta(hours=9), 'JST')
+
+def _format_jst_time(dt) -> str | None:
+    return dt.astimezone(JST).strftime("%H:%M") if dt else None
+
+# 1度にDBから受け取る行数 (サーバーサイドカーソルで少しずつ読み込む)
+REMINDER_SCAN_BATCH_SIZE = 500
+
+# チェックポイントの保持日数
+REMINDER_CHECKPOINT_RETENTION_DAYS = 30
+
+
+class ReminderRunIncomplete(Exception):
+    """再送上限に達して送れなかったグループが残っている (再開時に改めて送信する)"""
+
+
+@dataclass
+class ReminderRunReport:
+    """リマインダー1回分 (全チャンク) の結果"""
+    groups: int = 0           # 対象のグループ数 (送信済みのものを除く)
+    skipped_groups: int = 0   # チェックポイントにより送信済みとしてスキップしたグループ数
+    chunks: int = 0
+    notified_groups: int = 0  # 今回送り終えたグループ数
+    pending_groups: int = 0   # 送れず、再開時に再送するグループ数
+    items: int = 0
+    sent: int = 0
+    failed: int = 0
+    elapsed_ms: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "groups": self.groups,
+            "skipped_groups": self.skipped_groups,
+            "chunks": self.chunks,
+            "notified_groups": self.notified_groups,
+            "pending_groups": self.pending_groups,
+            "items": self.items,
+            "sent": self.sent,
+            "failed": self.failed,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "errors": self.errors[:20],
+        }
+
+
+def _slack_connected_conditions():
+    return (
+        Group.slack_bot_token.is_not(None), Group.slack_bot_token != "",
+        Group.slack_channel_id.is_not(None), Group.slack_channel_id != "",
+    )
+
+def _not_notified(reminder_date: date):
+    """その日のチェックポイントが無い (まだ送り終えていない) グループの条件"""
+    return ~exists().where(
+        ReminderCheckpoint.reminder_date == reminder_date,
+        ReminderCheckpoint.group_id == Group.group_id
+    )
+
+def _reminder_chunks(db: Session, today: date, chunk_size: int) -> tuple[list[tuple[str, str]], int, int]:
+    """
+    未送信のSlack連携済みグループを group_id 順に chunk_size 件ずつの範囲 (先頭, 末尾) に分ける。
+    戻り値は (範囲の一覧, 対象のグループ数, スキップしたグループ数)。
+    """
+    connected = select(Group.group_id).where(*_slack_connected_conditions())
+    group_ids = db.scalars(connected.where(_not_notified(today)).order_by(Group.group_id)).all()
+    skipped = db.scalar(
+        select(func.count()).select_from(ReminderCheckpoint).where(ReminderCheckpoint.reminder_date == today)
+    )
+    chunks = [
+        (group_ids[i], group_ids[min(i + chunk_size, len(group_ids)) - 1])
+        for i in range(0, len(group_ids), chunk_size)
+    ]
+    return chunks, len(group_ids), skipped
+
+def _reminder_scan_query(target_dates: list[date], today: date, first_group_id: str, last_group_id: str):
+    """
+    1チャンク (group_id の範囲) 分の通知対象のタスクを取得するクエリ。
+    Slack連携済みで、今日の分をまだ送り終えていないグループだけに結合し、メッセージ作成に必要なカラムのみを選択します。
+    """
+    return select(
+            Task.title,
+            Task.date,
+            Task.time_span_begin,
+            Task.time_span_end,
+            Task.is_task,
+            Group.group_id,
+            Group.slack_bot_token,
+            Group.slack_channel_id,
+            Group.reminder_offsets
+        )\
+        .join(Group, Task.group_id == Group.group_id)\
+        .where(Group.group_id.between(first_group_id, last_group_id))\
+        .where(Task.date.in_(target_dates))\
+        .where(*_slack_connected_conditions())\
+        .where(_not_notified(today))\
+        .order_by(Task.date, Task.time_span_begin)\
+        .execution_options(yield_per=REMINDER_SCAN_BATCH_SIZE)
+
+def _record_checkpoints(db: Session, today: date, group_ids: list[str]) -> None:
+    if not group_ids:
+        return
+    db.execute(
+        pg_insert(ReminderCheckpoint)
+        .values([{"reminder_date": today, "group_id": group_id} for group_id in group_ids])
+        .on_conflict_do_nothing()
+    )
+    db.commit()
 
-def check_and_notify_tasks():
+def _notify_chunk(
+        queue: SlackDeliveryQueue,
+        clients: SlackClientRegistry,
+        today: date,
+        first_group_id: str,
+        last_group_id: str
+    ):
     """
-    DBをチェックし、当日・1日前・7日前のタスクがあればSlack通知する
+    1チャンク分のリマインダーを送信し、送り終えたグループのチェックポイントを記録する。
+    queue は実行1回分の全チャンクで共有する (送信レートと同時送信数はチャンクをまたいで制限される)。
+    戻り値は (DeliveryReport, 送り終えたグループ数, 送れなかったグループ数)。
     """
+    # 選択肢にある全ての日数分の日付を1回のクエリで取得し、グループごとの設定で絞り込む
+    target_dates = [today + timedelta(days=d) for d in REMINDER_OFFSET_CHOICES]
+
     db: Session = SessionLocal()
     try:
-        today = date.today()
-        target_dates = {
-            0: today,
-            1: today + timedelta(days=1),
-            7: today + timedelta(days=7),
-        }
+        # 範囲内の対象グループ (通知するタスクが無いグループも「送り終えた」ものとして記録する)
+        group_ids = db.scalars(
+            select(Group.group_id)
+            .where(Group.group_id.between(first_group_id, last_group_id))
+            .where(*_slack_connected_conditions())
+            .where(_not_notified(today))
+        ).all()
+
+        destinations: dict[str, tuple[str, str]] = {}
+        messages: dict[tuple[str, str], list[str]] = {}
+        for row in db.execute(_reminder_scan_query(target_dates, today, first_group_id, last_group_id)):
+            days_left = (row.date - today).days
+            offsets = row.reminder_offsets if row.reminder_offsets is not None else DEFAULT_REMINDER_OFFSETS
+            if days_left not in offsets:
+                continue
+
+            msg = slack_service.format_reminder(
+                task_title=row.title,
+                task_date=str(row.date),
+                start_time=_format_jst_time(row.time_span_begin),
+                end_time=_format_jst_time(row.time_span_end),
+                days_left=days_left,
+                is_task=row.is_task
+            )
+            if msg:
+                destination = (row.slack_bot_token, row.slack_channel_id)
+                messages.setdefault(destination, []).append(msg)
+                destinations[row.group_id] = destination
+        # 送信中にDB接続を握り続けないよう、トランザクションを終えておく
+        db.rollback()
+
+        # ワーカーのスレッドから、プロセス共通のレジストリのイベントループに送信を任せて完了を待つ
+        report = clients.run_sync(queue.deliver(clients, messages))
+
+        # 再送上限に達した宛先のグループは記録せず、再開時に改めて送る
+        # (宛先が存在しない等、再送しても成功しないものは送り終えたものとして扱う)
+        done = [g for g in group_ids if destinations.get(g) not in report.undelivered]
+        _record_checkpoints(db, today, done)
+    finally:
+        db.close()
+
+    return report, len(done), len(group_ids) - len(done)
+
+def check_and_notify_tasks(
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        clients: Optional[SlackClientRegistry] = None
+    ) -> ReminderRunReport:
+    """
+    DBをチェックし、各グループが設定した日数前 (既定: 当日・1日前・7日前) のタスクがあればSlack通知する
+    通知はチャンネルごとに1通のダイジェストにまとめて送信します。
+
+    Slack連携済みのグループを group_id の範囲でチャンクに分け、REMINDER_WORKERS 個のスレッドで並行して処理します。
+    送り終えたグループはチャンクごとにチェックポイント (reminder_checkpoints) に記録するため、
+    途中で落ちても、再開時は未送信のグループだけを送信します。
+    """
+    workers = workers or settings.REMINDER_WORKERS
+    chunk_size = chunk_size or settings.REMINDER_CHUNK_GROUPS
+    if clients is None:
+        clients = slack_client_registry
+    started = time.perf_counter()
+    today = date.today()
+
+    db: Session = SessionLocal()
+    try:
+        # 古いチェックポイントを削除する
+        db.execute(
+            delete(ReminderCheckpoint)
+            .where(ReminderCheckpoint.reminder_date < today - timedelta(days=REMINDER_CHECKPOINT_RETENTION_DAYS))
+        )
+        db.commit()
+        chunks, group_count, skipped = _reminder_chunks(db, today, chunk_size)
+    finally:
+        db.close()
+
+    report = ReminderRunReport(groups=group_count, skipped_groups=skipped, chunks=len(chunks))
+    # 送信キュー (ワークスペースごとのトークンバケット) は実行1回につき1つだけ作り、全チャンクで共有する
+    queue = SlackDeliveryQueue(formatter=slack_service.format_reminder_digest)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reminder") as pool:
+        futures = [pool.submit(_notify_chunk, queue, clients, today, first, last) for first, last in chunks]
+        for future in as_completed(futures):
+            try:
+                delivery, notified, pending = future.result()
+            except Exception as e:
+                # 失敗したチャンクのグループは未送信のまま残り、再開時に送信される
+                logger.exception("Reminder chunk failed")
+                report.errors.append(repr(e))
+                continue
+            report.notified_groups += notified
+            report.pending_groups += pending
+            report.items += delivery.items
+            report.sent += delivery.sent
+            report.failed += delivery.failed
+            report.errors.extend(delivery.errors)
+    report.elapsed_ms = (time.perf_counter() - started) * 1000
+
+    logger.info(
+        "Reminders: %d groups in %d chunks (%d skipped), notified=%d pending=%d sent=%d failed=%d in %.0f ms",
+        report.groups, report.chunks, report.skipped_groups,
+        report.notified_groups, report.pending_groups, report.sent, report.failed, report.elapsed_ms,
+    )
+    if report.notified_groups < report.groups:
+        raise ReminderRunIncomplete(
+            f"{report.groups - report.notified_groups} groups are not notified yet: {report.to_dict()}"
+        )
+    return report
 
-        for days_left, target_date in target_dates.items():
-            # タスクを取得する際、親のGroup情報も一緒に取得 (joinedload) すると効率的
-            tasks = db.query(Task)\
-                .options(joinedload(Task.group))\
-                .filter(Task.date == target_date)\
-                .all()
-            
-            for task in tasks:
-                # グループ情報があり、かつSlack連携済みの場合のみ通知
-                if task.group and task.group.slack_bot_token and task.group.slack_channel_id:
-                    slack_service.notify_reminder(
-                        token=task.group.slack_bot_token,
-                        channel_id=task.group.slack_channel_id,
-                        task_title=task.title,
-                        task_date=str(task.date),
-                        start_time=str(task.start_time) if task.start_time else None,
-                        end_time=str(task.end_time) if task.end_time else None,
-                        days_left=days_left,
-                        is_task=task.is_task
-                    )
-                
+# --- ジョブの実行 (予定時刻ごとに1プロセスだけ) ---
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable[[], Any]
+    trigger: CronTrigger
+    # 途中で失敗・停止した回を再実行してよいか (ジョブ側で二重実行を防げる場合のみ True)
+    resumable: bool = False
+
+
+JOBS = [
+    # 毎日 朝 09:00 に実行 (送信済みのグループはチェックポイントでスキップされるため再開可能)
+    ScheduledJob("daily_reminders", check_and_notify_tasks, CronTrigger(hour=9, minute=0), resumable=True),
+]
+
+# このプロセスの識別子 (実行履歴の owner)
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _scheduled_for(job: ScheduledJob, now: datetime) -> datetime:
+    """
+    今回の実行がどの予定時刻の分かを求める。
+    (起動の遅れは misfire の猶予内に収まるため、猶予分さかのぼった時点の次の予定時刻が今回の分になる)
+    """
+    since = now - timedelta(seconds=settings.SCHEDULER_MISFIRE_GRACE_SECONDS)
+    return job.trigger.get_next_fire_time(None, since).astimezone(timezone.utc)
+
+
+def _claim_run(db: Session, job: ScheduledJob, scheduled_for: datetime) -> Optional[str]:
+    """
+    予定時刻の実行権を取得する。既に他のプロセスが取得していた場合は None を返す。
+    再開可能なジョブでは、失敗した回・heartbeat が途切れた回の実行権を引き継ぎます。
+    """
+    stmt = pg_insert(SchedulerRun).values(
+        run_id=str(uuid.uuid4()),
+        job_name=job.name,
+        scheduled_for=scheduled_for,
+        status=RUN_RUNNING,
+        owner=_OWNER
+    )
+    if job.resumable:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.SCHEDULER_RUN_LEASE_SECONDS)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_scheduler_runs_job_slot",
+            set_={
+                "status": RUN_RUNNING,
+                "owner": stmt.excluded.owner,
+                "started_at": func.now(),
+                "heartbeat_at": func.now(),
+                "finished_at": None,
+                "error": None,
+            },
+            where=or_(
+                SchedulerRun.status == RUN_FAILED,
+                and_(SchedulerRun.status == RUN_RUNNING, SchedulerRun.heartbeat_at < stale_before)
+            )
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_scheduler_runs_job_slot")
+
+    run_id = db.scalar(stmt.returning(SchedulerRun.run_id))
+    db.commit()
+    return run_id
+
+
+def _heartbeat(run_id: str, stop: threading.Event) -> None:
+    """ジョブの実行中、heartbeat_at を定期的に更新する (別スレッド)"""
+    interval = max(settings.SCHEDULER_RUN_LEASE_SECONDS / 3, 1)
+    while not stop.wait(interval):
+        db: Session = SessionLocal()
+        try:
+            db.execute(
+                update(SchedulerRun)
+                .where(SchedulerRun.run_id == run_id)
+                .values(heartbeat_at=func.now())
+            )
+            db.commit()
+        except Exception:
+            logger.exception("Failed to update heartbeat of run %s", run_id)
+        finally:
+            db.close()
+
+
+def _finish_run(run_id: str, status: str, duration_ms: float, result: Any = None, error: Optional[str] = None) -> None:
+    db: Session = SessionLocal()
+    try:
+        db.execute(
+            update(SchedulerRun)
+            .where(SchedulerRun.run_id == run_id)
+            .values(
+                status=status,
+                finished_at=datetime.now(timezone.utc),
+                duration_ms=round(duration_ms, 1),
+                result=result,
+                error=error
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_job(job: ScheduledJob, now: Optional[datetime] = None) -> bool:
+    """
+    実行権を取得できた場合のみジョブを実行し、結果を記録する。
+    実行した場合は True、他のプロセスが実行済み (実行中) だった場合は False を返す。
+    """
+    now = now or datetime.now(timezone.utc)
+    scheduled_for = _scheduled_for(job, now)
+    if scheduled_for > now:
+        # 猶予時間内の予定時刻が無い (再開の確認で呼ばれた場合)
+        return False
+
+    db: Session = SessionLocal()
+    try:
+        run_id = _claim_run(db, job, scheduled_for)
     finally:
         db.close()
 
-def start_scheduler():
+    if run_id is None:
+        logger.debug("Job %s (%s) is handled by another instance", job.name, scheduled_for.isoformat())
+        return False
+
+    stop_heartbeat = threading.Event()
+    threading.Thread(target=_heartbeat, args=(run_id, stop_heartbeat), daemon=True).start()
+
+    started = time.perf_counter()
+    try:
+        result = job.func()
+    except Exception as e:
+        duration_ms = (time.perf_counter() - started) * 1000
+        logger.exception("Job %s (%s) failed", job.name, scheduled_for.isoformat())
+        _finish_run(run_id, RUN_FAILED, duration_ms, error=repr(e))
+        return True
+    finally:
+        stop_heartbeat.set()
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    _finish_run(
+        run_id,
+        RUN_SUCCEEDED,
+        duration_ms,
+        result=result.to_dict() if hasattr(result, "to_dict") else None
+    )
+    logger.info("Job %s (%s) finished in %.0f ms", job.name, scheduled_for.isoformat(), duration_ms)
+    return True
+
+
+def _add_jobs(scheduler) -> None:
+    for job in JOBS:
+        scheduler.add_job(
+            run_job,
+            job.trigger,
+            args=[job],
+            id=job.name,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=settings.SCHEDULER_MISFIRE_GRACE_SECONDS
+        )
+        if job.resumable:
+            # 失敗・停止した回の再開 (起動直後にも1回確認する)
+            scheduler.add_job(
+                run_job,
+                IntervalTrigger(seconds=settings.SCHEDULER_RESUME_CHECK_SECONDS),
+                args=[job],
+                id=f"{job.name}:resume",
+                coalesce=True,
+                max_instances=1,
+                next_run_time=datetime.now(timezone.utc)
+            )
+
+
+def start_scheduler() -> BackgroundScheduler:
+    """API プロセス内でバックグラウンドのスケジューラーを起動する (SCHEDULER_IN_API=true の場合)"""
     scheduler = BackgroundScheduler()
-    # 毎日 朝 09:00 に実行
-    scheduler.add_job(check_and_notify_tasks, 'cron', hour=9, minute=0)
-    scheduler.start()
\ No newline at end of file
+    _add_jobs(scheduler)
+    scheduler.start()
+    return scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="定期ジョブ (リマインダー等) を実行するスケジューラー")
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    scheduler = BlockingScheduler()
+    _add_jobs(scheduler)
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.shutdown(wait=False))
+
+    slack_client_registry.start()
+    logger.info("Scheduler started: %s", ", ".join(job.name for job in JOBS))
+    try:
+        scheduler.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        slack_client_registry.stop()
+    logger.info("Scheduler stopped")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
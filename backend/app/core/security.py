@@ -1,8 +1,13 @@
 import bcrypt
+import hashlib
+import hmac
+import secrets
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Any, Union
+from typing import Callable, Optional, Any, Union
 from jose import jwt, JWTError
 
+from .cache import TTLCache
 from .config import settings
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -18,49 +23,154 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password_bytes)
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     """
     パスワードをハッシュ化して文字列で返す
+    rounds: bcrypt のコスト (省略時は settings.BCRYPT_ROUNDS)
     """
     # 1. パスワードをバイト列に変換
     pwd_bytes = password.encode('utf-8')
 
     # 2. ソルトを生成してハッシュ化
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     hashed_bytes = bcrypt.hashpw(pwd_bytes, salt)
 
     # 3. DBに保存しやすいように文字列にデコードして返す
     return hashed_bytes.decode('utf-8')
 
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+def password_hash_rounds(hashed_password: str) -> Optional[int]:
+    """bcrypt のハッシュ文字列 ($2b$12$...) からコストを取り出す。形式が異なる場合は None"""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """保存されているハッシュのコストが現在の設定と異なるか"""
+    return password_hash_rounds(hashed_password) != settings.BCRYPT_ROUNDS
+
+# アクセストークンの種類。これを持たないトークンは有効期限の長い旧形式 (sub = email)
+ACCESS_TOKEN_TYPE = "access"
+
+def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None, claims: Optional[dict] = None) -> str:
     """
     JWTアクセストークンを生成する
-    subject: トークンに埋め込む識別子（通常は user_id や username）
+    subject: トークンに埋め込む識別子（user_id）
+    claims: 追加で埋め込む値 (ユーザー名・権限・有効フラグ・token_version など)
     """
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     # ペイロード（中身）の作成
-    to_encode = {"sub": str(subject), "exp": expire}
+    # jti はトークンごとのID (ログアウト時にこのトークンだけを失効させるのに使う)
+    to_encode = {
+        **(claims or {}),
+        "sub": str(subject),
+        "typ": ACCESS_TOKEN_TYPE,
+        "jti": secrets.token_hex(16),
+        "iat": now,
+        "exp": expire,
+    }
     
     # 暗号化
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# --- アクセストークンの検証 ---
+# 同じトークンが1セッションで何百回も送られるため、検証済みのペイロードをトークンのハッシュをキーにキャッシュし、
+# exp までは署名の検証を省略します。
+
+decoded_token_cache = TTLCache(
+    "decoded_access_token",
+    ttl_seconds=settings.ACCESS_TOKEN_DECODE_CACHE_TTL_SECONDS,
+    maxsize=settings.ACCESS_TOKEN_DECODE_CACHE_MAXSIZE,
+)
+
+_decoder: Optional[Callable[[str], dict]] = None
+
+def _jose_decode(token: str) -> dict:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+def _pyjwt_decoder() -> Callable[[str], dict]:
+    try:
+        import jwt as pyjwt
+    except ImportError as e:
+        raise RuntimeError("JWT_BACKEND=pyjwt には PyJWT パッケージが必要です (pip install pyjwt)") from e
+
+    def decode(token: str) -> dict:
+        try:
+            return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except pyjwt.PyJWTError as e:
+            # 呼び出し側が扱う例外を python-jose と揃える
+            raise JWTError(str(e)) from e
+
+    return decode
+
+def get_token_decoder() -> Callable[[str], dict]:
+    """JWT_BACKEND の検証関数 (無効なトークンでは JWTError を投げる)"""
+    global _decoder
+    if _decoder is None:
+        _decoder = _pyjwt_decoder() if settings.JWT_BACKEND == "pyjwt" else _jose_decode
+    return _decoder
+
 def decode_access_token(token: str) -> dict | None:
     """
     トークンを検証・デコードし、ペイロードを返す。
     無効な場合は None を返す（あるいは例外を投げても良い）。
+    検証済みのトークンはキャッシュにあれば exp まで署名の検証を省略します。
     """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = decoded_token_cache.get(key)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        # 呼び出し側での書き換えがキャッシュに及ばないよう複製を返す
+        return dict(payload)
+
     try:
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        return payload
-            
+        payload = get_token_decoder()(token)
     except JWTError:
         return None
+
+    decoded_token_cache.set(key, payload)
+    return dict(payload)
+
+# --- リフレッシュトークン ---
+# "<token_id>.<秘密部分>" 形式の不透明な文字列。DBには秘密部分のハッシュのみ保存します。
+
+def create_refresh_secret() -> str:
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+# --- ICS フィードの購読用トークン ---
+# カレンダーアプリは Authorization ヘッダーを送れないため、URL のクエリにトークンを含めます。
+# アクセストークンとして使えないよう、SECRET_KEY から導出した別の鍵で署名します。
+# 有効期限は ICS_FEED_TOKEN_EXPIRE_DAYS 日で、ユーザーの feed_token_version を上げると期限内でも使えなくなります。
+
+def _feed_key() -> str:
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), b"ics-feed", hashlib.sha256).hexdigest()
+
+def create_feed_token(user_id: str, scope: str, version: int) -> tuple[str, datetime]:
+    """
+    ICS フィードの購読用トークンと有効期限を生成する (URL に含まれるため、メールアドレスは入れない)
+    scope: "me" (自分のタスク) または "group:<group_id>"
+    version: ユーザーの feed_token_version
+    """
+    expire = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=settings.ICS_FEED_TOKEN_EXPIRE_DAYS)
+    to_encode = {"sub": user_id, "scope": scope, "fv": version, "exp": expire}
+    return jwt.encode(to_encode, _feed_key(), algorithm=settings.ALGORITHM), expire
+
+def decode_feed_token(token: str, scope: str) -> dict | None:
+    """購読用トークンを検証し、scope が一致すればペイロードを返す (期限切れ・版番号の無いものは None)"""
+    try:
+        payload = jwt.decode(token, _feed_key(), algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("scope") != scope or not payload.get("sub"):
+        return None
+    if "exp" not in payload or not isinstance(payload.get("fv"), int):
+        return None
+    return payload
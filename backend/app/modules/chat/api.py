@@ -1,15 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from slack_sdk import WebClient
 import logging
 
 from app.core.config import settings
-from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.core.database import get_async_db
+from app.core.dependencies import get_current_user, require_group_admin
 
 from app.modules.user.models import User
 from app.modules.group import crud as group_crud
-from app.modules.group import models as group_models
+from app.services.slack_clients import forget_token
 
 logger = logging.getLogger(__name__)
 
@@ -18,34 +19,14 @@ router = APIRouter(
     tags=["Chat Integration"]
 )
 
-# --- 内部ヘルパー関数: 権限チェック ---
-
-def check_chat_admin_permission(db: Session, user_id: str, group_id: str):
-    """
-    ユーザーが指定されたグループの「承認済み管理者」かチェックする。
-    権限がない場合は 403 Forbidden を発生させる。
-    """
-    # group/crud.py の関数を利用してメンバー情報を取得
-    member = group_crud.get_user_group(db, user_id, group_id)
-    
-    # メンバーが存在しない、承認されていない、または代表者(管理者)でない場合はエラー
-    if not member or not member.accepted or not member.is_representative:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="この操作を行う権限がありません（管理者権限が必要です）。"
-        )
-    return member
-
 # ---  連携用URL発行 (ここで管理者権限をチェック) ---
-@router.get("/auth-url")
-def get_slack_auth_url(
+# ★require_group_admin でガードする (group_id はクエリパラメータ)
+@router.get("/auth-url", dependencies=[Depends(require_group_admin)])
+async def get_slack_auth_url(
     group_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    # ★ここでガードする
-    check_chat_admin_permission(db, current_user.user_id, group_id)
-
     scopes = "chat:write,incoming-webhook"
     url = (
         f"https://slack.com/oauth/v2/authorize"
@@ -57,10 +38,10 @@ def get_slack_auth_url(
     return {"url": url}
 
 @router.get("/slack/callback")
-def slack_callback(
+async def slack_callback(
     code: str = Query(..., description="Slackから返却された認証コード"),
     state: str = Query(..., description="連携元のGroup ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Slack連携完了時のコールバック
@@ -68,7 +49,7 @@ def slack_callback(
     group_id = state
     
     # グループの存在確認
-    group = db.query(group_models.Group).filter(group_models.Group.group_id == group_id).first()
+    group = await group_crud.get_group_by_id(db, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
@@ -76,7 +57,9 @@ def slack_callback(
     
     # Code を Access Token に交換
     try:
-        response = client.oauth_v2_access(
+        # WebClient は同期I/Oのため、スレッドプールで実行する
+        response = await run_in_threadpool(
+            client.oauth_v2_access,
             client_id=settings.SLACK_CLIENT_ID,
             client_secret=settings.SLACK_CLIENT_SECRET,
             code=code,
@@ -99,10 +82,13 @@ def slack_callback(
     if not channel_id:
         raise HTTPException(status_code=400, detail="チャンネル情報の取得に失敗しました。")
 
-    # DBに保存
+    # DBに保存 (再連携でトークンが変わった場合は古いクライアントを破棄する)
+    old_token = group.slack_bot_token
     group.slack_bot_token = access_token
     group.slack_channel_id = channel_id
-    db.commit()
+    await db.commit()
+    if old_token and old_token != access_token:
+        forget_token(old_token)
 
     return {
         "message": "Slackとの連携が完了しました！", 
@@ -111,21 +97,22 @@ def slack_callback(
     }
 
 # --- 3. 連携解除 (ここでも管理者権限をチェック) ---
-@router.delete("/{group_id}")
-def disconnect_slack(
+# ★require_group_admin でガードする
+@router.delete("/{group_id}", dependencies=[Depends(require_group_admin)])
+async def disconnect_slack(
     group_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    # ★ここでガードする
-    check_chat_admin_permission(db, current_user.user_id, group_id)
-
-    group = group_crud.get_group_by_id(db, group_id)
+    group = await group_crud.get_group_by_id(db, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
+    old_token = group.slack_bot_token
     group.slack_bot_token = None
     group.slack_channel_id = None
-    db.commit()
+    await db.commit()
+    # このトークンのクライアント・メトリクスを破棄する
+    forget_token(old_token)
     
     return {"message": "Slack連携を解除しました。"}
\ No newline at end of file
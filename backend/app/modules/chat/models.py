@@ -0,0 +1,45 @@
+# backend/app/modules/chat/models.py
+
+import uuid
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+# 送信箱の状態
+OUTBOX_PENDING = "pending"  # 未送信 (再送待ちを含む)
+OUTBOX_SENT = "sent"        # 送信済み
+OUTBOX_DEAD = "dead"        # 送信を諦めたもの (再送上限・宛先不正など)
+
+class SlackOutbox(Base):
+    """
+    Slack通知の送信箱 (トランザクショナル・アウトボックス)。
+    タスク作成などと同じトランザクションで書き込み、別プロセスの送信ワーカー
+    (python -m app.services.outbox_worker) がまとめて送信します。
+    API のレスポンス時間に Slack との通信が含まれず、ワーカーが再起動しても通知は失われません。
+    """
+    __tablename__ = "slack_outbox"
+
+    outbox_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    # 同じ通知を二重に登録しないためのキー (例: "task_created:<task_id>")
+    idempotency_key = Column(String(255), nullable=False, unique=True)
+
+    # 送信先はグループのSlack連携情報から送信時に解決する (トークンは複製しない)
+    group_id = Column(String(36), ForeignKey("groups.group_id", ondelete="CASCADE"), nullable=False, index=True)
+
+    kind = Column(String(50), nullable=False, comment="通知の種類 (task_created, tasks_bulk_created など)")
+    text = Column(Text, nullable=False, comment="送信する本文")
+
+    status = Column(String(20), nullable=False, default=OUTBOX_PENDING, comment="pending / sent / dead")
+    attempts = Column(Integer, nullable=False, default=0, comment="送信を試みた回数")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), comment="次に送信を試みる日時")
+    last_error = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+
+    # 送信ワーカーが「送信待ちで期限が来たもの」を取り出す用
+    __table_args__ = (
+        Index('ix_slack_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
@@ -0,0 +1,65 @@
+# backend/app/modules/chat/outbox.py
+
+"""
+Slack通知を送信箱 (SlackOutbox) に登録するための関数。
+ここではセッションに追加するだけでコミットしません。呼び出し側の本体の変更 (タスク作成など) と
+同じトランザクションでコミットすることで、「タスクは作られたが通知が失われた」状態を防ぎます。
+"""
+
+import hashlib
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.group import models as group_models
+from . import models, service
+
+
+def is_slack_connected(group: Optional[group_models.Group]) -> bool:
+    return bool(group and group.slack_bot_token and group.slack_channel_id)
+
+
+def enqueue(db: AsyncSession, group_id: str, kind: str, idempotency_key: str, text: str) -> models.SlackOutbox:
+    """送信箱に通知を追加する (コミットは呼び出し側で行う)"""
+    entry = models.SlackOutbox(
+        idempotency_key=idempotency_key,
+        group_id=group_id,
+        kind=kind,
+        text=text,
+    )
+    db.add(entry)
+    return entry
+
+
+def _format_time(dt, tz) -> Optional[str]:
+    return dt.astimezone(tz).strftime("%H:%M") if dt else None
+
+
+def enqueue_task_created(db: AsyncSession, task, tz) -> models.SlackOutbox:
+    """タスク作成の通知を登録する。task_id が採番済み (flush 後) であること"""
+    text = service.format_new_task(
+        task_title=task.title,
+        task_date=str(task.date),
+        start_time=_format_time(task.time_span_begin, tz),
+        end_time=_format_time(task.time_span_end, tz),
+        is_task=task.is_task
+    )
+    return enqueue(db, task.group_id, "task_created", f"task_created:{task.task_id}", text)
+
+
+def enqueue_tasks_bulk_created(db: AsyncSession, group_id: str, tasks: list, tz) -> Optional[models.SlackOutbox]:
+    """一括作成の通知を1件にまとめて登録する"""
+    if not tasks:
+        return None
+    text = service.format_new_tasks_bulk([
+        {
+            "title": t.title,
+            "date": str(t.date),
+            "start_time": _format_time(t.time_span_begin, tz),
+            "end_time": _format_time(t.time_span_end, tz),
+            "is_task": t.is_task,
+        }
+        for t in sorted(tasks, key=lambda t: t.date)
+    ])
+    digest = hashlib.sha256(",".join(sorted(t.task_id for t in tasks)).encode()).hexdigest()
+    return enqueue(db, group_id, "tasks_bulk_created", f"tasks_bulk_created:{digest}", text)
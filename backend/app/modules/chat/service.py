@@ -1,26 +1,22 @@
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
 import logging
 
+from app.services.notification import post_once
+from app.services.slack_clients import SlackClientRegistry
+
 logger = logging.getLogger(__name__)
 
-def send_slack_message(token: str, channel_id: str, message: str):
+async def send_slack_message(clients: SlackClientRegistry, token: str, channel_id: str, message: str):
     """
     グループごとのトークンを使用してSlackにメッセージを送信する
+    clients にはプロセス共通のレジストリ (slack_client_registry) を渡し、keep-alive の接続を使い回します。
     """
     if not token or not channel_id:
         # 連携されていない場合は何もしない
         return
 
-    client = WebClient(token=token)
-    
-    try:
-        client.chat_postMessage(
-            channel=channel_id,
-            text=message
-        )
-    except SlackApiError as e:
-        logger.error(f"Error sending message: {e.response['error']}")
+    result = await clients.run(post_once(clients, token, channel_id, message))
+    if not result.ok:
+        logger.error(f"Error sending message: {result.error}")
 
 def _format_time_range(start: str | None, end: str | None) -> str:
     """
@@ -38,24 +34,22 @@ def _format_time_range(start: str | None, end: str | None) -> str:
     
     return f"{s}～{e}"
 
-def notify_new_task(
-        token: str, 
-        channel_id: str, 
+def format_new_task(
         task_title: str, 
         task_date: str, 
         start_time: str | None, 
         end_time: str | None,
         is_task: bool = True
-    ):
+    ) -> str:
     """
-    新規タスク作成時の通知
+    新規タスク作成時の通知本文
     """
     time_display = _format_time_range(start_time, end_time)
 
     # ラベルの切り替え
     label = "タスク" if is_task else "予定"
 
-    msg = (
+    return (
         f"🆕 *新しい{label}が登録されました*\n"
         f"━━━━━━━━━━━━━━━━━━\n"
         f"📌 *{task_title}*\n"
@@ -63,48 +57,83 @@ def notify_new_task(
         f"🏢 時間: {time_display}\n"
         f"━━━━━━━━━━━━━━━━━━"
     )
-    send_slack_message(token, channel_id, msg)
 
-def notify_reminder(
-        token: str, 
-        channel_id: str, 
+def format_new_tasks_bulk(tasks: list[dict], max_lines: int = 20) -> str | None:
+    """
+    一括作成時の通知本文 (1件ずつ送らず、1通にまとめる)
+    tasks の各要素は title, date, start_time, end_time, is_task を持つ dict
+    """
+    if not tasks:
+        return None
+
+    lines = []
+    for t in tasks[:max_lines]:
+        label = "タスク" if t.get("is_task") else "予定"
+        time_display = _format_time_range(t.get("start_time"), t.get("end_time"))
+        lines.append(f"• {t['date']} {time_display} [{label}] *{t['title']}*")
+    if len(tasks) > max_lines:
+        lines.append(f"…ほか {len(tasks) - max_lines} 件")
+
+    return (
+        f"🆕 *{len(tasks)}件のタスク・予定が登録されました*\n"
+        f"━━━━━━━━━━━━━━━━━━\n"
+        + "\n".join(lines) + "\n"
+        "━━━━━━━━━━━━━━━━━━"
+    )
+
+def _reminder_prefix(days_left: int, is_task: bool) -> str | None:
+    """残り日数に応じた見出し。過去の日付の場合は None"""
+    if days_left < 0:
+        return None
+    if is_task:
+        prefixes = {
+            0: "🚨 *【本日】タスクの期限です！*",
+            1: "⚠️ *【明日】タスクの期限です*",
+            7: "📅 *【来週】タスクまであと1週間です*",
+        }
+        default = f"📅 *【{days_left}日後】タスクの期限が近づいています*"
+    else:
+        prefixes = {
+            0: "✨ *【本日】予定があります！*",
+            1: "🔜 *【明日】予定があります*",
+            7: "📅 *【来週】予定まであと1週間です*",
+        }
+        default = f"📅 *【{days_left}日後】予定があります*"
+    return prefixes.get(days_left, default)
+
+def format_reminder(
         task_title: str, 
         task_date: str, 
         start_time: str | None, 
         end_time: str | None, 
         days_left: int,
         is_task: bool = True
-    ):
+    ) -> str | None:
     """
-    リマインダー通知
+    リマインダー1件分のメッセージ本文を作る (通知対象外の場合は None)
     """
-    prefix=""
-
-    if is_task:
-        if days_left == 0:
-            prefix = "🚨 *【本日】タスクの期限です！*"
-        elif days_left == 1:
-            prefix = "⚠️ *【明日】タスクの期限です*"
-        elif days_left == 7:
-            prefix = "📅 *【来週】タスクまであと1週間です*"
-        else:
-            return
-    else:
-        if days_left == 0:
-            prefix = "✨ *【本日】予定があります！*"
-        elif days_left == 1:
-            prefix = "🔜 *【明日】予定があります*"
-        elif days_left == 7:
-            prefix = "📅 *【来週】予定まであと1週間です*"
-        else:
-            return
+    prefix = _reminder_prefix(days_left, is_task)
+    if prefix is None:
+        return None
 
     time_display = _format_time_range(start_time, end_time)
 
-    msg = (
+    return (
         f"{prefix}\n"
         f"📌 *{task_title}*\n"
         f"📅 日付: {task_date}\n"
         f"⏰ 時間: {time_display}"
     )
-    send_slack_message(token, channel_id, msg)
\ No newline at end of file
+
+def format_reminder_digest(reminders: list[str]) -> str:
+    """
+    同じチャンネル宛てのリマインダーを1通にまとめる
+    (app.services.notification.SlackDeliveryQueue のダイジェスト形式)
+    """
+    if len(reminders) == 1:
+        return reminders[0]
+    return (
+        f"🔔 *本日のリマインダー ({len(reminders)}件)*\n"
+        f"━━━━━━━━━━━━━━━━━━\n"
+        + "\n\n".join(reminders)
+    )
@@ -1,14 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from uuid import UUID
 import logging
 
 # 依存関係 (プロジェクト構成に合わせて適宜調整してください)
-from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.core.database import get_async_db
+from app.core.dependencies import (
+    check_group_admin,
+    get_current_user,
+    get_group_membership,
+    require_group_admin,
+)
+from app.modules.group.crud import Membership
 from app.modules.user.models import User
 from app.modules.user import models as user_models
+from app.modules.task import calendar_cache # ICS フィードの購読を止める
 
 from . import crud, schemas, models
 
@@ -20,21 +28,9 @@ router = APIRouter(
     tags=["Groups"]
 )
 
-# --- 依存関数: 権限チェックロジック ---
-
-def check_group_admin_permission(current_user: User, group_id: str, db: Session):
-    """
-    操作しているユーザーが、そのグループの「承認済み管理者」かチェックする
-    """
-    member_record = crud.get_user_group(db, current_user.user_id, group_id)
-    if not member_record or not member_record.accepted or not member_record.is_representative:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="この操作を行う権限がありません（管理者権限が必要です）。"
-        )
-    return member_record
+# --- 内部ヘルパー関数 ---
 
-def get_user_by_identifier(db: Session, identifier: str) -> User:
+async def get_user_by_identifier(db: AsyncSession, identifier: str) -> User:
     """
     識別子 (identifier) が UUID なのか Email なのかを自動判別し、
     対応する User オブジェクトをデータベースから検索して返す内部関数。
@@ -52,31 +48,32 @@ def get_user_by_identifier(db: Session, identifier: str) -> User:
     # 2. 検索実行
     if is_uuid:
         # UUIDなら user_id で検索
-        target_user = db.query(user_models.User).filter(user_models.User.user_id == identifier).first()
+        result = await db.execute(select(user_models.User).where(user_models.User.user_id == identifier))
     else:
         # UUIDでないなら email で検索
-        target_user = db.query(user_models.User).filter(user_models.User.email == identifier).first()
+        result = await db.execute(select(user_models.User).where(user_models.User.email == identifier))
+    target_user = result.scalars().first()
         
     return target_user
 
 # --- エンドポイント ---
 
 @router.post("/", response_model=schemas.GroupResponse, status_code=status.HTTP_201_CREATED)
-def create_new_group(
+async def create_new_group(
     group_in: schemas.GroupCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     団体の新規作成。作成者は自動的に管理者(accepted=True)になります。
     """
-    return crud.create_group(db, group_in, current_user.user_id)
+    return await crud.create_group(db, group_in, current_user.user_id)
 
 
 @router.post("/join", status_code=status.HTTP_200_OK)
-def request_join_group(
+async def request_join_group(
     join_in: schemas.GroupJoin,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -84,15 +81,16 @@ def request_join_group(
     group_id と group_name の両方が一致しないと申請できません。
     申請後は accepted=False の状態になります。
     """
-    crud.join_group(db, join_in, current_user.user_id)
+    await crud.join_group(db, join_in, current_user.user_id)
     return {"message": "加入申請を送信しました。管理者の承認をお待ちください。"}
 
 @router.get("/{group_id}/members", response_model=List[schemas.GroupMemberResponse])
-def get_group_members(
+async def get_group_members(
     group_id: str,
     accepted_only: bool = True,  # Trueなら「正式メンバー」、Falseなら「申請中リスト」を返す
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    membership: Optional[Membership] = Depends(get_group_membership)
 ):
     """
     グループのメンバー一覧を取得します。
@@ -104,21 +102,21 @@ def get_group_members(
     # check_group_member_permission(current_user, group_id, db) 
 
     # 2. クエリ作成
-    query = db.query(models.GroupMember, user_models.User).join(
+    query = select(models.GroupMember, user_models.User).join(
         user_models.User, 
         models.GroupMember.user_id == user_models.User.user_id # IDで結合
-    ).filter(
+    ).where(
         models.GroupMember.group_id == group_id
     )
 
     # 3. フィルタリング (正式メンバーか、申請中か)
     if accepted_only:
-        query = query.filter(models.GroupMember.accepted == True)
+        query = query.where(models.GroupMember.accepted == True)
     else:
-        check_group_admin_permission(current_user, group_id, db) 
-        query = query.filter(models.GroupMember.accepted == False)
+        check_group_admin(membership)
+        query = query.where(models.GroupMember.accepted == False)
 
-    results = query.all()
+    results = (await db.execute(query)).all()
 
     # 4. データを整形してレスポンスの形にする
     # DBからは (Memberオブジェクト, Userオブジェクト) のタプルが返ってくるので
@@ -138,11 +136,11 @@ def get_group_members(
 
 # === 加入申請の承認・拒否エンドポイント ===
 
-@router.put("/{group_id}/join_requests", status_code=status.HTTP_200_OK)
-def handle_join_request(
+@router.put("/{group_id}/join_requests", status_code=status.HTTP_200_OK, dependencies=[Depends(require_group_admin)])
+async def handle_join_request(
     group_id: str,
     action_in: schemas.GroupRequestAction,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -151,11 +149,10 @@ def handle_join_request(
     - action: "approve" (承認) または "reject" (拒否/削除)
     """
     
-    # 1. 権限チェック: 操作者がこのグループの管理者か？
-    check_group_admin_permission(current_user, group_id, db)
+    # 1. 権限チェック: 操作者がこのグループの管理者か？ (require_group_admin で実施済み)
 
     # 2. ターゲットユーザーの特定 (UUID or Email 自動判別)
-    target_user = get_user_by_identifier(db, action_in.target_identifier)
+    target_user = await get_user_by_identifier(db, action_in.target_identifier)
 
     # ユーザーが見つからない場合
     if not target_user:
@@ -165,7 +162,7 @@ def handle_join_request(
         )
 
     # 3. CRUDに処理を委譲
-    result_message = crud.process_join_request(
+    result_message = await crud.process_join_request(
         db=db, 
         group_id=group_id, 
         user_id=target_user.user_id, # 特定したIDを渡す
@@ -175,12 +172,12 @@ def handle_join_request(
     return {"message": result_message, "target_user": target_user.email}
 
 
-@router.put("/{group_id}/members/{target_identifier}", response_model=schemas.GroupMemberResponse)
-def manage_member(
+@router.put("/{group_id}/members/{target_identifier}", response_model=schemas.GroupMemberResponse, dependencies=[Depends(require_group_admin)])
+async def manage_member(
     group_id: str,
     target_identifier: str,
     status_update: schemas.MemberStatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -188,17 +185,15 @@ def manage_member(
     - 申請の許可 (accepted: True)
     - 管理者の任命 (is_representative: True)
     """
-    # 権限チェック: 操作者が管理者であるか
-    check_group_admin_permission(current_user, group_id, db)
-
-    target_user = get_user_by_identifier(db, target_identifier)
+    # 権限チェック: 操作者が管理者であるか (require_group_admin で実施済み)
+    target_user = await get_user_by_identifier(db, target_identifier)
     if not target_user:
         raise HTTPException(
             status_code=404, 
             detail=f"指定されたユーザー({target_identifier})が見つかりません。"
         )
     
-    updated_member = crud.update_member_status(
+    updated_member = await crud.update_member_status(
         db=db, 
         group_id=group_id, 
         target_user_id=target_user.user_id, 
@@ -214,12 +209,42 @@ def manage_member(
         joined_at=updated_member.joined_at
     )
 
+@router.get("/{group_id}/reminder-settings", response_model=schemas.ReminderSettingsResponse, dependencies=[Depends(require_group_admin)])
+async def get_reminder_settings(
+    group_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """【管理者専用】Slackリマインダーの送信タイミングを取得する"""
+    group = await crud.get_group_by_id(db, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="グループが見つかりません。")
+    return schemas.ReminderSettingsResponse(offsets=group.reminder_offsets)
+
+@router.put("/{group_id}/reminder-settings", response_model=schemas.ReminderSettingsResponse, dependencies=[Depends(require_group_admin)])
+async def update_reminder_settings(
+    group_id: str,
+    settings_in: schemas.ReminderSettingsUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    【管理者専用】Slackリマインダーの送信タイミングを変更する。
+    offsets には予定の何日前に通知するかを指定します (例: [0, 1, 7])。
+    """
+    group = await crud.get_group_by_id(db, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="グループが見つかりません。")
+    group = await crud.update_reminder_offsets(db, group, settings_in.offsets)
+    return schemas.ReminderSettingsResponse(offsets=group.reminder_offsets)
+
 @router.delete("/{group_id}/members/{target_identifier}", status_code=status.HTTP_204_NO_CONTENT)
-def leave_or_remove_member(
+async def leave_or_remove_member(
     group_id: str,
     target_identifier: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    membership: Optional[Membership] = Depends(get_group_membership)
 ):
     """
     メンバーの脱退または除名。
@@ -227,7 +252,7 @@ def leave_or_remove_member(
     2. 管理者が他人を指定 -> 「除名」 (管理者権限が必要)
     """
     
-    target_user = get_user_by_identifier(db, target_identifier)
+    target_user = await get_user_by_identifier(db, target_identifier)
 
     if not target_user:
         raise HTTPException(
@@ -240,47 +265,53 @@ def leave_or_remove_member(
     # 1. 自分以外を消す場合は管理者権限が必要
     if current_user.user_id != target_user_id:
         # 操作者が管理者であるかチェック
-        check_group_admin_permission(current_user, group_id, db)
+        check_group_admin(membership)
 
     # # 2. 脱退
     # crud.remove_member(db, group_id, target_user_id)
 
     try:
         # メンバー削除 (crudを使わず直接操作してcommitを遅らせる)
-        member = db.query(models.GroupMember).filter(
-            models.GroupMember.group_id == group_id,
-            models.GroupMember.user_id == target_user_id
-        ).first()
+        member = await crud.get_user_group(db, target_user_id, group_id)
 
         if member:
-            db.delete(member)
-            db.flush()  # DBには送信するが、まだ確定しない
+            await db.delete(member)
+            await db.flush()  # DBには送信するが、まだ確定しない
 
         # 残りのメンバー数を数える
-        remaining_count = crud.count_members(db, group_id)
+        remaining_count = await crud.count_members(db, group_id)
 
         # 誰もいなくなったら (0人なら) グループを削除(解散)
         if remaining_count == 0:
-            group = crud.get_group(db, group_id)
+            group = await crud.get_group_by_id(db, group_id)
             if group:
                 # # delete_groupを呼べば、TaskなどもCascade設定で全部消えます
                 # crud.delete_group(db, group)
-                db.delete(group)
+                await db.delete(group)
                 logger.info(f"Group {group_id} has been automatically deleted.")
-        db.commit()
+        await db.commit()
 
     except Exception as e:
-        db.rollback() # エラーが起きたら元に戻す
+        await db.rollback() # エラーが起きたら元に戻す
         logger.error(f"Error in leave_or_remove_member: {e}")
         raise HTTPException(status_code=500, detail="サーバーエラーが発生しました。")
+
+    # 権限キャッシュと ICS フィードのキャッシュを破棄 (グループごと消えた場合は全員分。最後のメンバーは本人のみ)
+    if remaining_count == 0:
+        crud.invalidate_membership(group_id)
+        await calendar_cache.invalidate_feed_subscriber(group_id, member_ids=[target_user_id])
+    else:
+        crud.invalidate_membership(group_id, target_user_id)
+        await calendar_cache.invalidate_feed_subscriber(group_id, target_user_id)
     
     return
 
 @router.delete("/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_group_api(
+async def delete_group_api(
     group_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    membership: Optional[Membership] = Depends(get_group_membership)
 ):
     """
     【グループ解散】
@@ -289,13 +320,15 @@ def delete_group_api(
     タスク、メンバー、リアクションなど関連データは全て削除されます。
     """
     # 1. グループが存在するか確認
-    group = crud.get_group(db, group_id)
+    group = await crud.get_group_by_id(db, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="グループが見つかりません")
 
     # 2. 権限チェック
-    check_group_admin_permission(current_user, group_id, db)
-    # 3. 削除実行
-    crud.delete_group(db, group)
+    check_group_admin(membership)
+    # 3. 削除実行 (元のメンバーの「自分のタスク」のキャッシュを消すため、先にメンバーを控える)
+    member_ids = await crud.get_member_ids(db, group_id)
+    await crud.delete_group(db, group)
+    await calendar_cache.invalidate_feed_subscriber(group_id, member_ids=member_ids)
     
     return # 204 No Content
\ No newline at end of file
@@ -1,35 +1,139 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
+
+from app.core.cache import TTLCache
+from app.core.config import settings
 from . import models, schemas
 
+# --- メンバーシップ (所属・権限) のキャッシュ ---
+
+@dataclass(frozen=True)
+class Membership:
+    """権限チェック用の、GroupMember の読み取り専用スナップショット"""
+    user_id: str
+    group_id: str
+    is_representative: bool
+    accepted: bool
+
+    @property
+    def is_member(self) -> bool:
+        """承認済みメンバーか"""
+        return self.accepted
+
+    @property
+    def is_admin(self) -> bool:
+        """承認済みの管理者(代表者)か"""
+        return self.accepted and self.is_representative
+
+# キーは (user_id, group_id)
+membership_cache = TTLCache(
+    "group_membership",
+    ttl_seconds=settings.GROUP_MEMBERSHIP_CACHE_TTL_SECONDS,
+    maxsize=settings.GROUP_MEMBERSHIP_CACHE_MAXSIZE,
+)
+
+def invalidate_membership(group_id: str, user_id: Optional[str] = None):
+    """
+    メンバーの承認・権限変更・脱退時に呼び、キャッシュを破棄する。
+    user_id を省略するとグループ全員分を破棄します (グループ削除時など)。
+    """
+    if user_id is not None:
+        membership_cache.delete((user_id, group_id))
+    else:
+        membership_cache.delete_where(lambda key: key[1] == group_id)
+
+# --- データのバージョン (ETag 用) ---
+
+async def bump_data_version(db: AsyncSession, group_ids):
+    """
+    グループのタスク・リレーションを変更した時に、同じトランザクション内で呼ぶ (コミットは呼び出し側)。
+    group_ids はグループID、IDのリスト、または group_id を返す SELECT。
+    """
+    if isinstance(group_ids, str):
+        group_ids = [group_ids]
+    await db.execute(
+        update(models.Group)
+        .where(models.Group.group_id.in_(group_ids))
+        .values(
+            data_version=models.Group.data_version + 1,
+            # グループ自体の編集ではないため、updated_at (onupdate) は変えない
+            updated_at=models.Group.updated_at
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+async def get_data_version(db: AsyncSession, group_id: str) -> Optional[int]:
+    return await db.scalar(
+        select(models.Group.data_version).where(models.Group.group_id == group_id)
+    )
+
 # --- 取得系 ---
 
-def get_group_by_id(db: Session, group_id: str):
+async def get_group_by_id(db: AsyncSession, group_id: str):
     """IDでグループを検索"""
-    return db.query(models.Group).filter(models.Group.group_id == group_id).first()
+    return await db.get(models.Group, group_id)
 
-def get_user_group(db: Session, user_id: str, group_id: str):
+async def get_user_group(db: AsyncSession, user_id: str, group_id: str):
     """特定のユーザーとグループの結びつき(メンバー情報)を取得"""
-    return db.query(models.GroupMember).filter(
-        and_(models.GroupMember.user_id == user_id, models.GroupMember.group_id == group_id)
-    ).first()
+    result = await db.execute(
+        select(models.GroupMember).where(
+            and_(models.GroupMember.user_id == user_id, models.GroupMember.group_id == group_id)
+        )
+    )
+    return result.scalars().first()
+
+async def get_membership(db: AsyncSession, user_id: str, group_id: str) -> Optional[Membership]:
+    """
+    権限チェック用にメンバー情報を取得する (キャッシュ付き)。
+    所属していない場合は None を返します。
+    """
+    key = (user_id, group_id)
+    membership = membership_cache.get(key)
+    if membership is not None:
+        return membership
+
+    member = await get_user_group(db, user_id, group_id)
+    if member is None:
+        return None
 
-def count_members(db: Session, group_id: str) -> int:
+    membership = Membership(
+        user_id=member.user_id,
+        group_id=member.group_id,
+        is_representative=bool(member.is_representative),
+        accepted=bool(member.accepted),
+    )
+    membership_cache.set(key, membership)
+    return membership
+
+async def count_members(db: AsyncSession, group_id: str) -> int:
     """グループの現在のメンバー数を返す"""
-    return db.query(models.GroupMember).filter(
-        models.GroupMember.group_id == group_id
-    ).count()
+    result = await db.execute(
+        select(func.count()).select_from(models.GroupMember).where(
+            models.GroupMember.group_id == group_id
+        )
+    )
+    return result.scalar_one()
+
+async def get_member_ids(db: AsyncSession, group_id: str) -> list[str]:
+    """グループのメンバー (承認待ちを含む) の user_id"""
+    result = await db.execute(
+        select(models.GroupMember.user_id).where(models.GroupMember.group_id == group_id)
+    )
+    return list(result.scalars().all())
 
 # --- 作成・加入系 ---
 # === 【追加】申請処理ロジック ===
 
-def process_join_request(db: Session, group_id: str, user_id: str, action: str) -> str:
+async def process_join_request(db: AsyncSession, group_id: str, user_id: str, action: str) -> str:
     """
     加入申請を承認または拒否する
     """
     # 1. 該当するメンバーシップ（申請データ）を取得
-    member = get_user_group(db, user_id, group_id)
+    member = await get_user_group(db, user_id, group_id)
 
     # データが存在しない場合
     if not member:
@@ -45,15 +149,17 @@ def process_join_request(db: Session, group_id: str, user_id: str, action: str)
         member.accepted = True
         # 必要であればここで役職などを初期設定する (例: status="MEMBER")
         db.add(member)
-        db.commit()
-        db.refresh(member)
+        await db.commit()
+        await db.refresh(member)
+        invalidate_membership(group_id, user_id)
         return "加入申請を承認しました。"
 
     elif action == "reject":
         # === 拒否処理 ===
         # 仕様: 「データベースから削除する」
-        db.delete(member)
-        db.commit()
+        await db.delete(member)
+        await db.commit()
+        invalidate_membership(group_id, user_id)
         return "加入申請を拒否(削除)しました。"
     
     else:
@@ -61,7 +167,7 @@ def process_join_request(db: Session, group_id: str, user_id: str, action: str)
         raise HTTPException(status_code=400, detail="不正なアクションです。")
 
 
-def create_group(db: Session, group_in: schemas.GroupCreate, creator_user_id: str):
+async def create_group(db: AsyncSession, group_in: schemas.GroupCreate, creator_user_id: str):
     """
     グループを新規作成し、作成者を管理者(代表)として登録
     """
@@ -70,7 +176,7 @@ def create_group(db: Session, group_in: schemas.GroupCreate, creator_user_id: st
         group_name=group_in.group_name
     )
     db.add(db_group)
-    db.flush() # ID生成のためflush
+    await db.flush() # ID生成のためflush
 
     # 2. 作成者を管理者として登録 (承認済み)
     db_member = models.GroupMember(
@@ -88,16 +194,16 @@ def create_group(db: Session, group_in: schemas.GroupCreate, creator_user_id: st
 
     db.add(db_member)
     
-    db.commit()
-    db.refresh(db_group)
+    await db.commit()
+    await db.refresh(db_group)
     return db_group
 
-def join_group(db: Session, join_in: schemas.GroupJoin, user_id: str):
+async def join_group(db: AsyncSession, join_in: schemas.GroupJoin, user_id: str):
     """
     既存グループへの加入申請
     修正: group_idとgroup_nameが一致しない場合はエラーとする
     """
-    target_group = get_group_by_id(db, join_in.group_id)
+    target_group = await get_group_by_id(db, join_in.group_id)
     
     # 1. グループ存在確認
     if not target_group:
@@ -108,7 +214,7 @@ def join_group(db: Session, join_in: schemas.GroupJoin, user_id: str):
         raise HTTPException(status_code=400, detail="指定されたグループは存在しません。")
 
     # 3. 既に参加済み/申請済みか確認
-    existing_member = get_user_group(db, user_id, join_in.group_id)
+    existing_member = await get_user_group(db, user_id, join_in.group_id)
     if existing_member:
         if existing_member.accepted:
             raise HTTPException(status_code=400, detail="既に参加済みのグループです。")
@@ -123,17 +229,18 @@ def join_group(db: Session, join_in: schemas.GroupJoin, user_id: str):
         accepted=False 
     )
     db.add(new_member)
-    db.commit()
-    db.refresh(new_member)
+    await db.commit()
+    await db.refresh(new_member)
+    invalidate_membership(join_in.group_id, user_id)
     return new_member
 
 # --- メンバー管理系 (更新・削除) ---
 
-def update_member_status(db: Session, group_id: str, target_user_id: str, updates: schemas.MemberStatusUpdate):
+async def update_member_status(db: AsyncSession, group_id: str, target_user_id: str, updates: schemas.MemberStatusUpdate):
     """
     メンバーの状態(承認、管理者権限)を変更する
     """
-    member = get_user_group(db, target_user_id, group_id)
+    member = await get_user_group(db, target_user_id, group_id)
     if not member:
         raise HTTPException(status_code=404, detail="対象のメンバーが見つかりません。")
     
@@ -143,28 +250,38 @@ def update_member_status(db: Session, group_id: str, target_user_id: str, update
         setattr(member, key, value)
     
     db.add(member)
-    db.commit()
-    db.refresh(member)
+    await db.commit()
+    await db.refresh(member)
+    invalidate_membership(group_id, target_user_id)
     return member
 
-def remove_member(db: Session, group_id: str, target_user_id: str):
+async def remove_member(db: AsyncSession, group_id: str, target_user_id: str):
     """
     メンバーを削除する (脱退または除名)
     """
-    member = get_user_group(db, target_user_id, group_id)
+    member = await get_user_group(db, target_user_id, group_id)
     if not member:
         raise HTTPException(status_code=404, detail="メンバーが見つかりません。")
     
-    db.delete(member)
-    db.commit()
+    await db.delete(member)
+    await db.commit()
+    invalidate_membership(group_id, target_user_id)
     return True
 
-def delete_group(db: Session, db_group: models.Group):
+async def update_reminder_offsets(db: AsyncSession, db_group: models.Group, offsets: list[int]):
+    """Slackリマインダーを送る日 (予定の何日前か) を更新する"""
+    db_group.reminder_offsets = offsets
+    await db.commit()
+    return db_group
+
+async def delete_group(db: AsyncSession, db_group: models.Group):
     """
     グループを削除する。
     Modelのcascade設定により、tasksやgroup_membersも連鎖的に削除される。
     """
-    db.delete(db_group)
-    db.commit()
+    group_id = db_group.group_id
+    await db.delete(db_group)
+    await db.commit()
+    invalidate_membership(group_id)
 
 # 人がいなくなった団体は自動で削除するようにしたい(予定)
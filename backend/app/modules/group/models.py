@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, BigInteger, ForeignKey, DateTime, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -6,6 +6,11 @@ import uuid
 # 共通のBaseモデル
 from app.core.database import Base
 
+# Slackリマインダーを送るタイミング (予定の何日前か)
+# グループごとに下の選択肢から選べます。既定は「当日・前日・1週間前」
+DEFAULT_REMINDER_OFFSETS = [0, 1, 7]
+REMINDER_OFFSET_CHOICES = (0, 1, 2, 3, 7, 14)
+
 class Group(Base):
     """
     グループ本体のモデル
@@ -22,6 +27,16 @@ class Group(Base):
     # 各グループごとに個別のBotトークンとチャンネルIDを持ちます
     slack_bot_token = Column(String(255), nullable=True) # そのグループ専用のトークン
     slack_channel_id = Column(String(255), nullable=True) # 通知先のチャンネルID
+    reminder_offsets = Column(
+        JSON,
+        nullable=False,
+        default=lambda: list(DEFAULT_REMINDER_OFFSETS),
+        server_default="[0, 1, 7]",
+        comment="リマインダーを送る日 (予定の何日前か) のリスト"
+    )
+
+    # タスク・担当/参加・繰り返し予定を変更する度に1ずつ増える (一覧・カレンダーの ETag に使用)
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from pydantic import BaseModel, Field, EmailStr, field_validator
+from typing import List, Optional
 from datetime import datetime
 
+from .models import REMINDER_OFFSET_CHOICES
+
 # --- 基本パーツ ---
 
 class GroupMemberBase(BaseModel):
@@ -44,8 +46,28 @@ class MemberStatusUpdate(BaseModel):
     accepted: Optional[bool] = None
     is_representative: Optional[bool] = None
 
+class ReminderSettingsUpdate(BaseModel):
+    """
+    Slackリマインダーの送信タイミング設定用（管理者が使用）
+    例: [0, 1, 7] = 当日・前日・1週間前。空リストの場合はリマインダーを送りません
+    """
+    offsets: List[int] = Field(..., description="予定の何日前に通知するか")
+
+    @field_validator('offsets')
+    @classmethod
+    def check_offsets(cls, v: List[int]):
+        invalid = [d for d in v if d not in REMINDER_OFFSET_CHOICES]
+        if invalid:
+            raise ValueError(f"指定できる日数は {list(REMINDER_OFFSET_CHOICES)} のみです。")
+        return sorted(set(v))
+
 # --- レスポンス用 ---
 
+class ReminderSettingsResponse(BaseModel):
+    """Slackリマインダーの送信タイミング"""
+    offsets: List[int]
+    choices: List[int] = list(REMINDER_OFFSET_CHOICES)
+
 class GroupMemberResponse(BaseModel):
     """グループ内のメンバー情報表示用"""
     user_id: str
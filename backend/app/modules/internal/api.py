@@ -0,0 +1,127 @@
+# backend/app/modules/internal/api.py
+
+import os
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_cache_stats
+from app.core.database import get_async_db, get_pool_stats
+from app.core.password_hasher import password_hasher
+from app.core.rate_limit import login_limiter
+from app.core.response_cache import response_cache
+from app.core.dependencies import verify_internal_token
+from app.modules.chat.models import SlackOutbox, OUTBOX_PENDING
+from app.modules.scheduler.models import SchedulerRun
+from app.modules.task.calendar_cache import feed_cache
+from app.modules.user.revocation import revocation_list
+from app.services import calendar_image, notification
+from app.services.slack_clients import slack_client_registry
+
+# 運用向けの内部エンドポイント (X-Internal-Token ヘッダーが必要)
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(verify_internal_token)],
+    include_in_schema=False
+)
+
+@router.get("/metrics/db-pool")
+def read_db_pool_metrics():
+    """
+    このワーカープロセスのコネクションプールの状態を返す。
+    uvicorn のワーカーごとに値が異なるため、どのプロセスの値かが分かるよう pid を含めます。
+    """
+    return {
+        "pid": os.getpid(),
+        "pools": get_pool_stats(),
+    }
+
+@router.get("/metrics/caches")
+def read_cache_metrics():
+    """
+    このワーカープロセス内の各キャッシュのヒット率などを返す
+    response_cache は月カレンダーのレスポンスキャッシュ (ETag が一致したものだけをヒットと数える)
+    ics_feed_cache は ICS フィード (月ごとの VEVENT と組み立て済みのフィード) のキャッシュ
+    token_revocation は失効させたアクセストークンのブルームフィルタ (bloom_positives のうち confirmed_revoked 以外が偽陽性)
+    """
+    return {
+        "pid": os.getpid(),
+        "caches": get_cache_stats(),
+        "response_cache": response_cache.stats(),
+        "ics_feed_cache": feed_cache.stats(),
+        "calendar_images": calendar_image.get_stats(),
+        "token_revocation": revocation_list.stats(),
+    }
+
+@router.get("/metrics/password-hashing")
+def read_password_hashing_metrics():
+    """
+    このワーカープロセスの bcrypt 専用プールの状態を返す
+    queue_depth は空きワーカーを待っている件数、rejected は混雑のため 429 を返した件数
+    login_rate_limit はログイン試行の制限で断った件数と、それにより省けた bcrypt の計算時間の目安
+    """
+    return {
+        "pid": os.getpid(),
+        "password_hasher": password_hasher.stats(),
+        "login_rate_limit": login_limiter.stats(),
+    }
+
+@router.get("/metrics/notifications")
+def read_notification_metrics():
+    """このワーカープロセスで直近に実行された Slack 一括配信の結果を返す"""
+    report = notification.last_report
+    return {
+        "pid": os.getpid(),
+        "last_delivery": report.to_dict() if report else None,
+    }
+
+@router.get("/metrics/slack")
+def read_slack_metrics():
+    """
+    このワーカープロセスでの Slack 送信件数・エラー・レイテンシをワークスペースごとに返す
+    (キーはBotトークンのハッシュ値)。送信ワーカー側の値は、そのプロセスのログに定期的に出力されます。
+    """
+    return {
+        "pid": os.getpid(),
+        "workspaces": slack_client_registry.workspace_stats(),
+    }
+
+@router.get("/metrics/outbox")
+async def read_outbox_metrics(db: AsyncSession = Depends(get_async_db)):
+    """Slack通知の送信箱の状態ごとの件数と、最も古い送信待ちの登録日時を返す"""
+    counts = await db.execute(
+        select(SlackOutbox.status, func.count()).group_by(SlackOutbox.status)
+    )
+    oldest_pending = await db.scalar(
+        select(func.min(SlackOutbox.created_at)).where(SlackOutbox.status == OUTBOX_PENDING)
+    )
+    return {
+        "counts": {status: count for status, count in counts.all()},
+        "oldest_pending_created_at": oldest_pending,
+    }
+
+@router.get("/metrics/scheduler")
+async def read_scheduler_metrics(limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    """定期ジョブの直近の実行履歴 (どのプロセスが実行したか・所要時間・結果) を返す"""
+    runs = await db.scalars(
+        select(SchedulerRun)
+        .order_by(SchedulerRun.started_at.desc())
+        .limit(min(max(limit, 1), 200))
+    )
+    return {
+        "runs": [
+            {
+                "job_name": run.job_name,
+                "scheduled_for": run.scheduled_for,
+                "status": run.status,
+                "owner": run.owner,
+                "started_at": run.started_at,
+                "finished_at": run.finished_at,
+                "duration_ms": run.duration_ms,
+                "result": run.result,
+                "error": run.error,
+            }
+            for run in runs
+        ]
+    }
@@ -0,0 +1,56 @@
+# backend/app/modules/scheduler/models.py
+
+import uuid
+from sqlalchemy import Column, String, Text, Float, Date, DateTime, JSON, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+# 実行の状態
+RUN_RUNNING = "running"      # 実行中 (プロセスが落ちた場合もこのまま残ります)
+RUN_SUCCEEDED = "succeeded"
+RUN_FAILED = "failed"
+
+class SchedulerRun(Base):
+    """
+    定期ジョブの実行履歴 (兼 実行権のリース)。
+    ジョブの予定時刻ごとに1行だけ作成でき、最初に行を作成できたプロセスだけがそのジョブを実行します。
+    API を複数ワーカー・複数台で起動していても、リマインダー等が二重に送信されません。
+    """
+    __tablename__ = "scheduler_runs"
+
+    run_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    job_name = Column(String(100), nullable=False, comment="ジョブ名 (daily_reminders など)")
+    scheduled_for = Column(DateTime(timezone=True), nullable=False, comment="ジョブの予定時刻")
+
+    status = Column(String(20), nullable=False, default=RUN_RUNNING, comment="running / succeeded / failed")
+    owner = Column(String(255), nullable=False, comment="実行したプロセス (ホスト名:pid)")
+
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    heartbeat_at = Column(DateTime(timezone=True), server_default=func.now(), comment="実行中のプロセスが定期的に更新する (途切れたものは再開の対象)")
+    finished_at = Column(DateTime(timezone=True))
+    duration_ms = Column(Float)
+
+    result = Column(JSON, comment="ジョブの結果 (送信件数など)")
+    error = Column(Text)
+
+    __table_args__ = (
+        # 同じ予定時刻のジョブは1回だけ実行する (INSERT ... ON CONFLICT DO NOTHING の対象)
+        UniqueConstraint('job_name', 'scheduled_for', name='uq_scheduler_runs_job_slot'),
+        # 直近の実行履歴の表示用
+        Index('ix_scheduler_runs_started_at', 'started_at'),
+    )
+
+
+class ReminderCheckpoint(Base):
+    """
+    リマインダーの送信済みチェックポイント。
+    グループ単位で「その日のリマインダーを送り終えた」ことを記録し、
+    途中で落ちたジョブを再開した時に、送信済みのグループへ二重に送らないようにします。
+    """
+    __tablename__ = "reminder_checkpoints"
+
+    reminder_date = Column(Date, primary_key=True, comment="リマインダーを送った日")
+    group_id = Column(String(36), ForeignKey("groups.group_id", ondelete="CASCADE"), primary_key=True)
+    notified_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,17 +1,23 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.core.database import get_async_db
+from app.core.etag import CACHE_CONTROL, etag_matches, make_etag, not_modified, set_etag
+from app.core.response_cache import json_response, response_cache
+from app.core.dependencies import get_current_user, require_group_admin, require_group_member
 
 from app.modules.user.models import User
 from app.modules.group import crud as group_crud
-from app.modules.group import models as group_models
 from app.modules.user import models as user_models # ユーザー検索用
-from app.modules.chat import service as slack_service # Slack連携
+from app.modules.user import tokens as user_tokens # ICS フィードの購読用 URL の再発行
+from app.modules.chat import outbox as chat_outbox # Slack連携 (送信箱)
+from app.services import calendar_image
 
-from . import crud, schemas
+from . import calendar_cache, crud, ics, schemas
 
 # 1. 既存のルーター（グループ配下用）
 router = APIRouter(
@@ -25,33 +31,9 @@ me_router = APIRouter(
     tags=["Tasks (Personal)"]
 )
 
-# --- 権限チェック関数 (依存関係回避のためローカル定義) ---
+# --- 内部ヘルパー関数 ---
 
-def check_group_member(db: Session, group_id: str, user_id: str):
-    """
-    一般メンバーチェック
-    （タスクの閲覧、作成、自分のリアクション更新用）
-    """
-    member = group_crud.get_user_group(db, user_id, group_id)
-    if not member or not member.accepted:
-        raise HTTPException(status_code=403, detail="グループのメンバーではありません。")
-
-def check_group_admin_permission(current_user: User, group_id: str, db: Session):
-    """
-    操作しているユーザーが、そのグループの「承認済み管理者(代表者)」かチェックする
-    （担当者任命などの管理者操作用）
-    """
-    member_record = group_crud.get_user_group(db, current_user.user_id, group_id)
-    
-    # UserGroupモデルの定義に合わせて is_representative をチェック
-    if not member_record or not member_record.accepted or not member_record.is_representative:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
-            detail="この操作を行う権限がありません（管理者権限が必要です）。"
-        )
-    return member_record
-
-def get_user_by_identifier(db: Session, identifier: str) -> User:
+async def get_user_by_identifier(db: AsyncSession, identifier: str) -> User:
     """UUIDまたはEmailからユーザーを特定する内部関数"""
     from uuid import UUID
     is_uuid = False
@@ -62,66 +44,133 @@ def get_user_by_identifier(db: Session, identifier: str) -> User:
         is_uuid = False
 
     if is_uuid:
-        return db.query(user_models.User).filter(user_models.User.user_id == identifier).first()
+        result = await db.execute(select(user_models.User).where(user_models.User.user_id == identifier))
     else:
-        return db.query(user_models.User).filter(user_models.User.email == identifier).first()
+        result = await db.execute(select(user_models.User).where(user_models.User.email == identifier))
+    return result.scalars().first()
 
 # --- タスク基本 CRUD ---
 
-@router.post("/", response_model=schemas.TaskResponse)
-def create_task(
+@router.post("/", response_model=schemas.TaskResponse, dependencies=[Depends(require_group_admin)])
+async def create_task(
     group_id: str,
     task_in: schemas.TaskCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     【管理者専用】タスクを作成する。
+    Slack連携済みの場合、通知はタスクと同じトランザクションで送信箱に登録され、
+    送信ワーカーが別プロセスで送信します (このリクエストでは Slack と通信しません)。
     """
-    # 権限チェックを管理者に変更
-    check_group_admin_permission(current_user, group_id, db)    
+    group = await group_crud.get_group_by_id(db, group_id)
 
-    new_task = crud.create_task(db, task_in, group_id)
+    new_task = await crud.create_task(db, task_in, group_id, notify=chat_outbox.is_slack_connected(group))
     if new_task is None:
         raise HTTPException(status_code=400, detail="タイトルが入力されていません。")
 
-    # Slack通知処理
-    # グループ情報を取得 (slackトークンを取得するため)
-    group = db.query(group_models.Group).filter(group_models.Group.group_id == group_id).first()
-    
-    if group and group.slack_bot_token and group.slack_channel_id:
-        background_tasks.add_task(
-            slack_service.notify_new_task,
-            token=group.slack_bot_token,         # DBから取得したトークン
-            channel_id=group.slack_channel_id,   # DBから取得したチャンネルID
-            task_title=new_task.title,
-            task_date=str(new_task.date),
-            start_time=str(new_task.start_time) if new_task.start_time else None,
-            end_time=str(new_task.end_time) if new_task.end_time else None,
-            is_task=new_task.is_task
-        )
-
     return new_task
 
+@router.post("/bulk", response_model=List[schemas.TaskResponse], dependencies=[Depends(require_group_admin)])
+async def create_tasks_bulk(
+    group_id: str,
+    bulk_in: schemas.TaskBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    【管理者専用】タスクをまとめて作成する (最大500件)。
+    1件でも不正なデータがあれば何も作成しません。Slack通知は1通にまとめて送信箱に登録します。
+    """
+    for i, task_in in enumerate(bulk_in.tasks):
+        if task_in.title == "":
+            raise HTTPException(status_code=400, detail=f"{i + 1}件目のタイトルが入力されていません。")
+
+    group = await group_crud.get_group_by_id(db, group_id)
+
+    return await crud.create_tasks_bulk(db, bulk_in.tasks, group_id, notify=chat_outbox.is_slack_connected(group))
+
 @me_router.get("/", response_model=List[schemas.GlobalCalendarTaskResponse])
-def read_my_global_tasks(
+async def read_my_global_tasks(
+    request: Request,
     year: int = Query(..., description="対象年 (例: 2026)"),
     month: int = Query(..., ge=1, le=12, description="対象月 (1-12)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     【グループ横断】
     自分が「担当」または「参加」しているタスクを、グループに関係なくまとめて取得します。
     指定した年・月でフィルタして取得します。
+    関係するグループのデータバージョンから ETag を返し、If-None-Match が一致すれば 304 を返します。
+    同じ ETag のレスポンスがキャッシュにあれば、タスクを検索せずにそれを返します。
     """
-    return crud.get_my_global_tasks(db, current_user.user_id, year, month)
+    versions = await crud.get_related_group_versions(db, current_user.user_id)
+    etag = make_etag("my-tasks", current_user.user_id, year, month, versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    key = calendar_cache.my_tasks_key(current_user.user_id, year, month)
+    body = await response_cache.get(key, etag)
+    if body is None:
+        tasks = await crud.get_my_global_tasks(db, current_user.user_id, year, month)
+        body = calendar_cache.dump(calendar_cache.my_tasks_adapter, tasks)
+        await response_cache.set(key, etag, body)
+    return json_response(body, etag)
+
+@me_router.get("/feed-url", response_model=schemas.FeedUrlResponse)
+async def read_my_feed_url(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    【グループ横断】
+    自分のタスクをカレンダーアプリで購読するための ICS フィードの URL を返します。
+    URL を知っていれば誰でも閲覧できるため、他人に共有しないでください。
+    expires_at を過ぎた場合と、ログアウト後は使えなくなります。
+    """
+    return await ics.feed_url(db, current_user.user_id, ics.MY_SCOPE, request.url_for("read_my_feed"))
 
-@router.get("/", response_model=List[schemas.TaskResponse])
-def read_tasks(
+@me_router.post("/feed-url/regenerate", response_model=schemas.FeedUrlResponse)
+async def regenerate_my_feed_url(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    【グループ横断】
+    購読用 URL を作り直します。URL が漏れた場合に使用してください。
+    これまでに発行した自分の全ての購読用 URL (グループのフィードを含む) が使えなくなります。
+    """
+    await user_tokens.revoke_feed_tokens(db, current_user.user_id)
+    await db.commit()
+    return await ics.feed_url(db, current_user.user_id, ics.MY_SCOPE, request.url_for("read_my_feed"))
+
+@me_router.get("/feed.ics", response_class=Response)
+async def read_my_feed(
+    request: Request,
+    token: str = Query(..., description="/my-tasks/feed-url で取得した URL に含まれるトークン"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    【グループ横断】
+    自分が「担当」または「参加」しているタスクの ICS フィード。
+    生成済みのフィードがキャッシュにあれば、ユーザーの確認のみで返します。
+    """
+    payload = ics.verify_token(token, ics.MY_SCOPE)
+    await ics.authorize(db, payload)
+    feed = await ics.get_cached_feed(calendar_cache.my_feed_key(payload["sub"]))
+    if feed is None:
+        feed = await ics.build_my_feed(db, payload["sub"])
+    return ics.feed_response(request, feed, "my-tasks.ics")
+
+@router.get("/", response_model=List[schemas.TaskResponse], dependencies=[Depends(require_group_member)])
+async def read_tasks(
     group_id: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     # --- フィルタリング用パラメータ ---
     skip: int = 0,
@@ -129,188 +178,401 @@ def read_tasks(
     from_date: Optional[str] = Query(None, description="YYYY-MM-DD形式。指定日以降のタスク"),
     to_date: Optional[str] = Query(None, description="YYYY-MM-DD形式。指定日以前のタスク"),
     filter_type: Optional[schemas.TaskFilterType] = Query(None, description="my_related(担当or参加), undecided(未定回答), recent_created(最近作成された順)"),
+    cursor: Optional[str] = Query(None, description="前のレスポンスの X-Next-Cursor ヘッダーの値。指定するとskipは無視されます"),
+    include_relations: bool = Query(True, description="false の場合は担当者・参加者の一覧を返さない (人数のみ)"),
+):
+    """
+    グループのタスク一覧を取得する。
+    続きのページがある場合は、レスポンスヘッダー X-Next-Cursor に次ページ用のカーソルを返します。
+    グループのデータバージョンから ETag を返し、If-None-Match が一致すれば 304 を返します。
+    """
+    # 絞り込み (my_related 等) はユーザーごとに結果が異なるため、ユーザーとクエリ全体を含める
+    version = await group_crud.get_data_version(db, group_id)
+    etag = make_etag("tasks", group_id, version, current_user.user_id, sorted(request.query_params.multi_items()))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    try:
+        tasks, next_cursor = await crud.get_tasks_by_group_advanced(
+            db=db, 
+            group_id=group_id, 
+            user_id=current_user.user_id,
+            skip=skip,
+            limit=limit,
+            from_date_str=from_date,
+            to_date_str=to_date,
+            filter_type=filter_type,
+            cursor=cursor,
+            include_relations=include_relations
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="カーソルが不正です。")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    set_etag(response, etag)
+    return tasks
+
+# ※ 以下の固定パス ("/calendar", "/templates") は "/{task_id}" より前に定義すること。
+#    後ろにあると "/{task_id}" に先にマッチしてしまい、到達できなくなります。
+
+# --- カレンダービュー用API (軽量) ---
+
+@router.get("/calendar", response_model=List[schemas.CalendarTaskResponse], dependencies=[Depends(require_group_member)])
+async def read_calendar_tasks(
+    group_id: str,
+    request: Request,
+    year: int = Query(..., description="対象年 (例: 2026)"),
+    month: int = Query(..., ge=1, le=12, description="対象月 (1-12)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
 ):
-    check_group_member(db, group_id, current_user.user_id)
-
-    return crud.get_tasks_by_group_advanced(
-        db=db, 
-        group_id=group_id, 
-        user_id=current_user.user_id,
-        skip=skip,
-        limit=limit,
-        from_date_str=from_date,
-        to_date_str=to_date,
-        filter_type=filter_type
+    """
+    月表示カレンダー用の軽量なタスクデータを取得する。
+    リレーションを含まず、日付、時間、場所、タイトルと参加人数などの集計のみを返す。
+    グループのデータバージョンから ETag を返し、If-None-Match が一致すれば
+    タスクを検索せずに 304 を返します。
+    同じ ETag のレスポンスがキャッシュにあれば、タスクを検索せずにそれを返します。
+    """
+    version = await group_crud.get_data_version(db, group_id)
+    etag = make_etag("calendar", group_id, version, year, month)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    key = calendar_cache.group_calendar_key(group_id, year, month)
+    body = await response_cache.get(key, etag)
+    if body is None:
+        tasks = await crud.get_calendar_tasks(db, group_id, year, month)
+        body = calendar_cache.dump(calendar_cache.calendar_adapter, tasks)
+        await response_cache.set(key, etag, body)
+    return json_response(body, etag)
+
+@router.get("/calendar.png", response_class=FileResponse, dependencies=[Depends(require_group_member)])
+async def read_calendar_image(
+    group_id: str,
+    request: Request,
+    year: int = Query(..., description="対象年 (例: 2026)"),
+    month: int = Query(..., ge=1, le=12, description="対象月 (1-12)"),
+    design: calendar_image.DesignName = Query("standard", description="デザイン (standard / minimal / dark)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Instagram 投稿用の月カレンダー画像 (PNG, 1080x1350) を返す。
+    ETag は画像の内容のハッシュ値です。グループのデータが変わっていなければ、
+    タスクを検索・描画せずに保存済みの画像 (または 304) を返します。
+    """
+    group = await group_crud.get_group_by_id(db, group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail="グループが見つかりません。")
+
+    # (データバージョン, グループ名) が同じ間は、前回描画した画像のハッシュ値を使い回す
+    key = f"calpng:{group_id}:{year:04d}-{month:02d}:{design}"
+    version_tag = make_etag("calendar.png", group_id, group.data_version, group.group_name, year, month, design)
+    cached = await response_cache.get(key, version_tag)
+    path = calendar_image.cached_path(cached.decode("ascii")) if cached is not None else None
+
+    if path is not None:
+        digest = cached.decode("ascii")
+    else:
+        tasks = await crud.get_calendar_tasks(db, group_id, year, month)
+        digest, path = await run_in_threadpool(
+            calendar_image.render_cached,
+            calendar_image.DESIGNS[design],
+            group.group_name,
+            year,
+            month,
+            calendar_image.events_from_tasks(tasks),
+        )
+        await response_cache.set(key, version_tag, digest.encode("ascii"))
+
+    etag = f'"{digest[:32]}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return FileResponse(
+        path,
+        media_type="image/png",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        filename=f"calendar-{year:04d}-{month:02d}.png",
+        content_disposition_type="inline",
     )
 
-@router.get("/{task_id}", response_model=schemas.TaskResponse)
-def read_task_detail(
+# --- ICS フィード (カレンダーアプリの購読用) ---
+
+@router.get("/feed-url", response_model=schemas.FeedUrlResponse, dependencies=[Depends(require_group_member)])
+async def read_group_feed_url(
+    group_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    グループのタスクをカレンダーアプリで購読するための ICS フィードの URL を返す。
+    URL はメンバーごとに異なり、グループを脱退した場合・expires_at を過ぎた場合・ログアウト後は使えなくなります。
+    """
+    url = request.url_for("read_group_feed", group_id=group_id)
+    return await ics.feed_url(db, current_user.user_id, ics.group_scope(group_id), url)
+
+@router.get("/feed.ics", response_class=Response)
+async def read_group_feed(
+    group_id: str,
+    request: Request,
+    token: str = Query(..., description="/feed-url で取得した URL に含まれるトークン"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    グループのタスク (繰り返し予定を含む) の ICS フィード。
+    生成済みのフィードがキャッシュにあれば、ユーザーと所属の確認のみで返します。
+    """
+    payload = ics.verify_token(token, ics.group_scope(group_id))
+    await ics.authorize(db, payload, group_id)
+    feed = await ics.get_cached_feed(calendar_cache.group_feed_key(group_id, payload["sub"]))
+    if feed is None:
+        group = await group_crud.get_group_by_id(db, group_id)
+        if group is None:
+            raise HTTPException(status_code=404, detail="フィードが見つかりません。")
+        feed = await ics.build_group_feed(db, group_id, group.group_name, payload["sub"])
+    return ics.feed_response(request, feed, "tasks.ics")
+
+
+# --- タスクテンプレート管理API ---
+
+@router.post("/templates", response_model=schemas.TaskTemplateResponse, dependencies=[Depends(require_group_admin)])
+async def create_template(
+    group_id: str,
+    template_in: schemas.TaskTemplateCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """【管理者専用】タスクの雛形を作成する"""
+    return await crud.create_template(db, template_in, group_id)
+
+@router.get("/templates", response_model=List[schemas.TaskTemplateResponse], dependencies=[Depends(require_group_member)])
+async def read_templates(
+    group_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """保存されたテンプレート一覧を取得する（メンバー全員可能）"""
+    return await crud.get_templates(db, group_id)
+
+@router.delete("/templates/{template_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_group_admin)])
+async def delete_template(
+    group_id: str,
+    template_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """【管理者専用】テンプレートを削除する"""
+    
+    template = await crud.get_template(db, template_id, group_id)
+    if not template:
+        raise HTTPException(status_code=404, detail="テンプレートが見つかりませんでした。")
+        
+    await crud.delete_template(db, template)
+    return
+
+
+# --- 繰り返し予定API ---
+# 各回はカレンダー表示時に展開され、task_id は "<recurrence_id>:<日付>" の仮IDになります。
+# 仮IDのままでも /{task_id} 系のAPIをそのまま呼び出せます (必要になった時点で実体化されます)。
+
+@router.post("/templates/{template_id}/recurrences", response_model=schemas.TaskRecurrenceResponse, dependencies=[Depends(require_group_admin)])
+async def create_recurrence(
+    group_id: str,
+    template_id: str,
+    rule_in: schemas.TaskRecurrenceCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """【管理者専用】テンプレートから定期的な予定を作成する"""
+    template = await crud.get_template(db, template_id, group_id)
+    if not template:
+        raise HTTPException(status_code=404, detail="テンプレートが見つかりませんでした。")
+    return await crud.create_recurrence(db, template, rule_in)
+
+@router.get("/recurrences", response_model=List[schemas.TaskRecurrenceResponse], dependencies=[Depends(require_group_member)])
+async def read_recurrences(
+    group_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """繰り返し予定の一覧を取得する（メンバー全員可能）"""
+    return await crud.get_recurrences(db, group_id)
+
+@router.delete("/recurrences/{recurrence_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_group_admin)])
+async def delete_recurrence(
+    group_id: str,
+    recurrence_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """【管理者専用】繰り返し予定を終了する（実体化済みの回は通常の予定として残ります）"""
+    rule = await crud.get_recurrence(db, recurrence_id, group_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="繰り返し予定が見つかりませんでした。")
+    await crud.delete_recurrence(db, rule)
+    return
+
+@router.post("/recurrences/{recurrence_id}/exceptions", response_model=schemas.TaskRecurrenceResponse, dependencies=[Depends(require_group_admin)])
+async def add_recurrence_exception(
+    group_id: str,
+    recurrence_id: str,
+    exception_in: schemas.TaskRecurrenceException,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """【管理者専用】繰り返し予定の特定の回を取りやめる"""
+    rule = await crud.get_recurrence(db, recurrence_id, group_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="繰り返し予定が見つかりませんでした。")
+    return await crud.add_recurrence_exception(db, rule, exception_in.date)
+
+# --- リアクション一括更新 (全メンバー可能) ---
+
+@router.put("/reactions", response_model=List[schemas.TaskUserRelationResponse], dependencies=[Depends(require_group_member)])
+async def update_my_reactions_bulk(
+    group_id: str,
+    bulk_in: schemas.MyReactionBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    複数のタスクに対する自分の「リアクション」や「コメント」をまとめて更新する。
+    1件でも存在しないタスクが含まれていれば何も更新しません (繰り返し予定の回の実体化も行いません)。
+    繰り返し予定の仮IDと、実体化済みのその回の task_id を両方指定した場合は 422 を返します。
+    戻り値は更新後に残っているリレーションの一覧です (空になったものは削除されるため含まれません)。
+    """
+    items = bulk_in.items
+    found = await crud.get_task_ids_in_group(db, [item.task_id for item in items], group_id)
+
+    # 書き込む前に全件を確認する。繰り返し予定の仮IDは、実体化済みならその task_id に置き換える
+    pending = []
+    for item in items:
+        if item.task_id in found:
+            continue
+        task = await crud.resolve_task(db, item.task_id, group_id)
+        if not task:
+            raise HTTPException(status_code=404, detail=f"タスク/予定が見つかりませんでした。({item.task_id})")
+        if task.task_id == item.task_id:
+            pending.append(item)
+        else:
+            item.task_id = task.task_id
+    # 仮IDと実体化済みの task_id で同じ回を指している場合
+    if len({item.task_id for item in items}) != len(items):
+        raise HTTPException(status_code=422, detail="同じタスクが複数回指定されています。")
+
+    # 未実体化の回を作成する (コミットはリアクションの更新と合わせて1回だけ行う)
+    for item in pending:
+        task = await crud.resolve_task(db, item.task_id, group_id, materialize=True, commit=False)
+        item.task_id = task.task_id
+
+    return await crud.update_user_reactions_bulk(db, current_user.user_id, items)
+
+# --- タスク個別操作 ---
+
+@router.get("/{task_id}", response_model=schemas.TaskResponse, dependencies=[Depends(require_group_member)])
+async def read_task_detail(
     group_id: str,
     task_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    check_group_member(db, group_id, current_user.user_id)
-    task = crud.get_task(db, task_id, group_id)
+    task = await crud.resolve_task(db, task_id, group_id)
     if not task:
         raise HTTPException(status_code=404, detail="タスク/予定が見つかりませんでした。")
     return task
 
-@router.put("/{task_id}", response_model=schemas.TaskResponse)
-def update_task(
+@router.put("/{task_id}", response_model=schemas.TaskResponse, dependencies=[Depends(require_group_admin)])
+async def update_task(
     group_id: str,
     task_id: str,
     task_in: schemas.TaskUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """【管理者専用】タスク情報の更新"""
-    # 権限チェック
-    check_group_admin_permission(current_user, group_id, db)
-
-    task = crud.get_task(db, task_id, group_id)
+    task = await crud.resolve_task(db, task_id, group_id, materialize=True)
     if not task:
         raise HTTPException(status_code=404, detail="タスク/予定が見つかりませんでした。")
-    return crud.update_task(db, task, task_in)
+    return await crud.update_task(db, task, task_in)
 
-@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_group_admin)])
+async def delete_task(
     group_id: str,
     task_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """【管理者専用】タスク削除"""
-    # 権限チェックを管理者に変更
-    check_group_admin_permission(current_user, group_id, db)    
-
-    task = crud.get_task(db, task_id, group_id)
+    task = await crud.resolve_task(db, task_id, group_id)
     if not task:
         raise HTTPException(status_code=404, detail="タスク/予定が見つかりませんでした。")
-    crud.delete_task(db, task)
+    await crud.delete_task(db, task)
     return
 
 # --- 担当者任命 (管理者のみ) ---
 
-@router.put("/{task_id}/assignments", response_model=schemas.TaskUserRelationResponse)
-def manage_assignment(
+@router.put("/{task_id}/assignments", response_model=Optional[schemas.TaskUserRelationResponse], dependencies=[Depends(require_group_admin)])
+async def manage_assignment(
     group_id: str,
     task_id: str,
     assignment_in: schemas.TaskAssignmentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     【管理者専用】
     特定のユーザーを担当者に任命する、または解除する。
     """
-    # 1. 権限チェック (ご提示の関数を使用)
-    check_group_admin_permission(current_user, group_id, db)
+    # 1. 権限チェックは require_group_admin で実施済み
 
-    # 2. タスク存在確認
-    task = crud.get_task(db, task_id, group_id)
+    # 2. タスク存在確認 (繰り返し予定の回はここで実体化する)
+    task = await crud.resolve_task(db, task_id, group_id, materialize=True)
     if not task:
         raise HTTPException(status_code=404, detail="タスク/予定が見つかりませんでした。")
 
     # 3. 対象ユーザー特定
-    target_user = get_user_by_identifier(db, assignment_in.target_identifier)
+    target_user = await get_user_by_identifier(db, assignment_in.target_identifier)
     if not target_user:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりませんでした。")
 
     # 4. 対象がグループメンバーか確認
-    target_member = group_crud.get_user_group(db, target_user.user_id, group_id)
-    if not target_member or not target_member.accepted:
+    target_member = await group_crud.get_membership(db, target_user.user_id, group_id)
+    if not target_member or not target_member.is_member:
         raise HTTPException(status_code=400, detail="対象はグループメンバーではありません。")
 
     # 5. 更新処理
-    return crud.set_user_assignment(
+    return await crud.set_user_assignment(
         db, 
-        task_id=task_id, 
+        task_id=task.task_id, 
         user_id=target_user.user_id, 
         is_assigned=assignment_in.is_assigned
     )
 
 # --- 自分のリアクション・コメント更新 (全メンバー可能) ---
 
-@router.put("/{task_id}/reaction", response_model=schemas.TaskUserRelationResponse)
-def update_my_reaction(
+@router.put("/{task_id}/reaction", response_model=Optional[schemas.TaskUserRelationResponse], dependencies=[Depends(require_group_member)])
+async def update_my_reaction(
     group_id: str,
     task_id: str,
     reaction_in: schemas.MyReactionUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     自分の「リアクション(参加意思)」や「コメント」を更新する。
     """
-    check_group_member(db, group_id, current_user.user_id)
     
-    task = crud.get_task(db, task_id, group_id)
+    # 繰り返し予定の回はここで実体化する
+    task = await crud.resolve_task(db, task_id, group_id, materialize=True)
     if not task:
         raise HTTPException(status_code=404, detail="タスク/予定が見つかりませんでした。")
     
-    return crud.update_user_reaction(
+    return await crud.update_user_reaction(
         db, 
-        task_id=task_id, 
+        task_id=task.task_id, 
         user_id=current_user.user_id, 
         reaction=reaction_in.reaction, 
         comment=reaction_in.comment
     )
-
-# --- カレンダービュー用API (軽量) ---
-
-@router.get("/calendar", response_model=List[schemas.CalendarTaskResponse])
-def read_calendar_tasks(
-    group_id: str,
-    year: int = Query(..., description="対象年 (例: 2026)"),
-    month: int = Query(..., ge=1, le=12, description="対象月 (1-12)"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    月表示カレンダー用の軽量なタスクデータを取得する。
-    リレーションを含まず、日付、時間、場所、タイトルのみを返す。
-    """
-    check_group_member(db, group_id, current_user.user_id)
-    return crud.get_calendar_tasks(db, group_id, year, month)
-
-
-# --- タスクテンプレート管理API ---
-
-@router.post("/templates", response_model=schemas.TaskTemplateResponse)
-def create_template(
-    group_id: str,
-    template_in: schemas.TaskTemplateCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """【管理者専用】タスクの雛形を作成する"""
-    check_group_admin_permission(current_user, group_id, db)
-    return crud.create_template(db, template_in, group_id)
-
-@router.get("/templates", response_model=List[schemas.TaskTemplateResponse])
-def read_templates(
-    group_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """保存されたテンプレート一覧を取得する（メンバー全員可能）"""
-    check_group_member(db, group_id, current_user.user_id)
-    return crud.get_templates(db, group_id)
-
-@router.delete("/templates/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_template(
-    group_id: str,
-    template_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """【管理者専用】テンプレートを削除する"""
-    check_group_admin_permission(current_user, group_id, db)
-    
-    template = crud.get_template(db, template_id, group_id)
-    if not template:
-        raise HTTPException(status_code=404, detail="テンプレートが見つかりませんでした。")
-        
-    crud.delete_template(db, template)
-    return
\ No newline at end of file
@@ -0,0 +1,114 @@
+# backend/app/modules/task/calendar_cache.py
+
+"""
+月カレンダー (グループ / グループ横断の自分のタスク) のレスポンスキャッシュのキーと削除。
+
+- グループの月カレンダー:   (group_id, year, month)
+- 自分のタスク (横断):      (user_id, year, month)
+
+タスク・リレーションの書き込み後 (コミット後) に、変更されたタスクの月と、
+そのタスクに担当・参加等している全員の「自分のタスク」を削除します。
+繰り返しルールの変更は複数の月にまたがるため、グループのカレンダーを全ての月について削除します。
+
+ICS フィード (ics.py) 用のキャッシュ (feed_cache) も同じタイミングで削除します。
+- 月ごとの VEVENT:  グループは (group_id, year, month)、自分のタスクは (user_id, year, month)
+- 組み立て済みのフィード: グループは (group_id, user_id)、自分のタスクは user_id
+  (購読者ごとに保存し、脱退時にはその人の分を削除します。権限と feed_token_version は取得の度に ics.authorize で確認します)
+
+グループの削除時は、元のメンバー全員の「自分のタスク」とそのフィードを全ての月について削除します。
+"""
+
+from datetime import date
+from typing import Iterable, List, Optional
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.response_cache import ResponseCache, create_backend, response_cache
+from . import schemas
+
+calendar_adapter = TypeAdapter(List[schemas.CalendarTaskResponse])
+my_tasks_adapter = TypeAdapter(List[schemas.GlobalCalendarTaskResponse])
+
+feed_cache = ResponseCache(
+    create_backend("ics_feed_cache", ttl_seconds=settings.ICS_FEED_CACHE_TTL_SECONDS, namespace="ics:")
+)
+
+
+def group_calendar_key(group_id: str, year: int, month: int) -> str:
+    return f"cal:{group_id}:{year:04d}-{month:02d}"
+
+
+def my_tasks_key(user_id: str, year: int, month: int) -> str:
+    return f"mytasks:{user_id}:{year:04d}-{month:02d}"
+
+
+def group_feed_month_key(group_id: str, year: int, month: int) -> str:
+    return f"cal:{group_id}:{year:04d}-{month:02d}"
+
+
+def my_feed_month_key(user_id: str, year: int, month: int) -> str:
+    return f"me:{user_id}:{year:04d}-{month:02d}"
+
+
+def group_feed_key(group_id: str, user_id: str) -> str:
+    return f"feed:cal:{group_id}:{user_id}"
+
+
+def my_feed_key(user_id: str) -> str:
+    return f"feed:me:{user_id}"
+
+
+def dump(adapter: TypeAdapter, rows) -> bytes:
+    """response_model と同じスキーマで JSON のバイト列にする"""
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+async def invalidate_tasks(touched: Iterable[tuple[str, date]], user_ids: Iterable[str] = ()) -> None:
+    """
+    touched: 変更されたタスクの (group_id, date)。日付を変更した場合は変更前の日付も含めること
+    user_ids: 「自分のタスク」を削除するユーザー (変更されたタスクに担当・参加等している人)
+    """
+    user_ids = set(user_ids)
+    months = {(group_id, d.year, d.month) for group_id, d in touched if d is not None}
+    user_months = {(year, month) for _, year, month in months}
+    keys = [group_calendar_key(group_id, year, month) for group_id, year, month in months]
+    keys += [my_tasks_key(user_id, year, month) for user_id in user_ids for year, month in user_months]
+    if keys:
+        await response_cache.invalidate(*keys)
+
+    feed_keys = [group_feed_month_key(group_id, year, month) for group_id, year, month in months]
+    feed_keys += [my_feed_month_key(user_id, year, month) for user_id in user_ids for year, month in user_months]
+    feed_keys += [my_feed_key(user_id) for user_id in user_ids]
+    if feed_keys:
+        await feed_cache.invalidate(*feed_keys)
+    for group_id in {group_id for group_id, _, _ in months}:
+        await feed_cache.invalidate_prefix(f"feed:cal:{group_id}:")
+
+
+async def invalidate_group(group_id: str) -> None:
+    """グループのカレンダーを全ての月について削除する"""
+    await response_cache.invalidate_prefix(f"cal:{group_id}:")
+    await feed_cache.invalidate_prefix(f"cal:{group_id}:")
+    await feed_cache.invalidate_prefix(f"feed:cal:{group_id}:")
+
+
+async def invalidate_users(user_ids: Iterable[str]) -> None:
+    """ユーザーの「自分のタスク」とそのフィードを全ての月について削除する"""
+    for user_id in set(user_ids):
+        await response_cache.invalidate_prefix(f"mytasks:{user_id}:")
+        await feed_cache.invalidate_prefix(f"me:{user_id}:")
+        await feed_cache.invalidate(my_feed_key(user_id))
+
+
+async def invalidate_feed_subscriber(group_id: str, user_id: Optional[str] = None, member_ids: Iterable[str] = ()) -> None:
+    """
+    脱退・除名されたメンバーのフィードを削除する。次の取得時に権限を確認し直させるため。
+    user_id=None はグループの削除時で、グループの分に加えて削除前のメンバー全員 (member_ids) の
+    「自分のタスク」も削除する (削除したグループのタスクを含んでいるため)
+    """
+    if user_id is None:
+        await invalidate_group(group_id)
+        await invalidate_users(member_ids)
+    else:
+        await feed_cache.invalidate(group_feed_key(group_id, user_id), my_feed_key(user_id))
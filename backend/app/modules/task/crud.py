@@ -1,11 +1,18 @@
-from sqlalchemy import or_, desc, extract
-from sqlalchemy.orm import Session, joinedload
+import base64
+import json
+from types import SimpleNamespace
+from sqlalchemy import insert, inspect, or_, desc, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import IntegrityError
 from typing import Optional
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 
+from app.modules.chat import outbox as chat_outbox
+from app.modules.group import crud as group_crud
 from app.modules.group import models as group_models
-from . import models, schemas
+from . import calendar_cache, models, recurrence, relations, schemas
 
 
 import logging
@@ -24,9 +31,39 @@ def utc_to_jst(task: models.Task):
         task.time_span_end = task.time_span_end.astimezone(JST)
     return task
 
+def month_range(year: int, month: int) -> tuple[date, date]:
+    """
+    指定月の [月初, 翌月初) を返す。
+    extract('year'/'month', date) で絞り込むとインデックスが使えないため、
+    カレンダー系の検索は必ずこの半開区間で行う。
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
 # --- Task本体 ---
 
-def create_task(db: Session, task_in: schemas.TaskCreate, group_id: str):        
+async def _load_task_with_relations(db: AsyncSession, task_id: str):
+    """
+    TaskResponse の生成に必要なリレーション(参加者とそのユーザー情報)まで読み込んだ Task を返す。
+    非同期セッションではレスポンス生成時の遅延ロードが使えないため、書き込み後はこれで読み直す。
+    """
+    result = await db.execute(
+        select(models.Task)
+        .where(models.Task.task_id == task_id)
+        .options(
+            selectinload(models.Task.task_user_relations)
+            .selectinload(models.TaskUser_Relation.user)
+        )
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def create_task(db: AsyncSession, task_in: schemas.TaskCreate, group_id: str, notify: bool = False):
+    """
+    タスクを作成する。
+    notify=True の場合は Slack 通知を送信箱に登録し、タスクと同じトランザクションでコミットする。
+    """
     db_task = models.Task(
         **task_in.model_dump(),
         group_id=group_id
@@ -35,29 +72,102 @@ def create_task(db: Session, task_in: schemas.TaskCreate, group_id: str):
         return None
 
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    return db_task
+    if notify:
+        await db.flush() # task_id を採番して通知の冪等キーに使う
+        chat_outbox.enqueue_task_created(db, db_task, JST)
+    await group_crud.bump_data_version(db, group_id)
+    await db.commit()
+    await calendar_cache.invalidate_tasks([(group_id, db_task.date)])
+    return await _load_task_with_relations(db, db_task.task_id)
+
+async def create_tasks_bulk(db: AsyncSession, tasks_in: list[schemas.TaskCreate], group_id: str, notify: bool = False):
+    """
+    複数のタスクを1回の INSERT ... RETURNING でまとめて作成する。
+    全件が同じトランザクションに入るため、途中で失敗した場合は1件も作成されません。
+    notify=True の場合は1件にまとめた Slack 通知も同じトランザクションで送信箱に登録します。
+    (タイトルの検証は呼び出し側で済ませておくこと)
+    """
+    result = await db.scalars(
+        insert(models.Task).returning(models.Task),
+        [{**task_in.model_dump(), "group_id": group_id} for task_in in tasks_in]
+    )
+    tasks = result.all()
+    if notify:
+        chat_outbox.enqueue_tasks_bulk_created(db, group_id, tasks, JST)
+    await group_crud.bump_data_version(db, group_id)
+    await db.commit()
+    await calendar_cache.invalidate_tasks([(group_id, task.date) for task in tasks])
+
+    # 作成直後なのでリレーションは必ず空。レスポンス生成時の遅延ロードを防ぐため明示的に設定する
+    for task in tasks:
+        set_committed_value(task, "task_user_relations", [])
+    return tasks
+
+# --- カーソル (キーセット) ページネーション ---
+
+def encode_cursor(task: models.Task, filter_type: Optional[str]) -> str:
+    """
+    ページ末尾のタスクから「次のページ」用の不透明なカーソル文字列を作る。
+    並び順に応じて (date, task_id) または (created_at, task_id) を埋め込みます。
+    """
+    if filter_type == "recent_created":
+        payload = {"m": "created_at", "k": task.created_at.isoformat(), "id": task.task_id}
+    else:
+        payload = {"m": "date", "k": task.date.isoformat(), "id": task.task_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, filter_type: Optional[str]) -> tuple:
+    """
+    カーソル文字列を (キー, task_id) に戻す。
+    形式が不正な場合や、並び順が作成時と異なる場合は ValueError を送出する。
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        mode, key, task_id = payload["m"], payload["k"], str(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+
+    expected = "created_at" if filter_type == "recent_created" else "date"
+    if mode != expected:
+        raise ValueError("cursor does not match the requested order")
+
+    if mode == "created_at":
+        return datetime.fromisoformat(key), task_id
+    return date.fromisoformat(key), task_id
 
 # --- 高度な検索機能 ---
-def get_tasks_by_group_advanced(
-    db: Session, 
+async def get_tasks_by_group_advanced(
+    db: AsyncSession, 
     group_id: str, 
     user_id: str,
     skip: int,
     limit: int,
     from_date_str: Optional[str],
     to_date_str: Optional[str],
-    filter_type: Optional[str]
+    filter_type: Optional[str],
+    cursor: Optional[str] = None,
+    include_relations: bool = True
 ):
+    """
+    グループのタスクを絞り込み・並び替えて1ページ分返す。
+    返り値は (タスクのリスト, 次ページのカーソル or None)。
+
+    - cursor を指定した場合はキーセット方式 (skip は無視) で、
+      何ページ目でも索引を辿るだけなので応答時間が一定になります。
+    - cursor が無い場合は従来通り skip/limit (OFFSET) 方式です。
+      最初のページは cursor 無しで取得し、返ってきたカーソルで続きを取得してください。
+    - include_relations=False の場合はリレーションを読み込みません (人数は集計カラムで返ります)。
+    """
     # ベースのクエリ: 指定グループのタスク
-    query = db.query(models.Task).filter(models.Task.group_id == group_id)
+    query = select(models.Task).where(models.Task.group_id == group_id)
 
     # 1. 日付範囲フィルタ
     if from_date_str:
         try:
             from_dt = datetime.strptime(from_date_str, "%Y-%m-%d").date()
-            query = query.filter(models.Task.date >= from_dt)
+            query = query.where(models.Task.date >= from_dt)
         except ValueError:
             pass # 形式エラーは無視またはエラーハンドリング
     if to_date_str:
@@ -65,7 +175,7 @@ def get_tasks_by_group_advanced(
             to_dt = datetime.strptime(to_date_str, "%Y-%m-%d").date()
             # 指定日の23:59:59までを含めるため、日付+時間を調整するか、
             # 単純な日付比較ならDBの型によるが、ここでは単純比較と仮定
-            query = query.filter(models.Task.date <= to_dt)
+            query = query.where(models.Task.date <= to_dt)
         except ValueError:
             pass
 
@@ -75,8 +185,8 @@ def get_tasks_by_group_advanced(
         # 「自分に関連」: 担当(is_assigned=True) OR 参加(reaction='join')
         # TaskUser_Relation を結合して絞り込む
         query = query.join(models.TaskUser_Relation)\
-            .filter(models.TaskUser_Relation.user_id == user_id)\
-            .filter(
+            .where(models.TaskUser_Relation.user_id == user_id)\
+            .where(
                 or_(
                     models.TaskUser_Relation.is_assigned == True,
                     models.TaskUser_Relation.reaction == "join"
@@ -86,31 +196,61 @@ def get_tasks_by_group_advanced(
     elif filter_type == "undecided":
         # 「参加未定」: reaction='undecided'
         query = query.join(models.TaskUser_Relation)\
-            .filter(models.TaskUser_Relation.user_id == user_id)\
-            .filter(models.TaskUser_Relation.reaction == "undecided")
+            .where(models.TaskUser_Relation.user_id == user_id)\
+            .where(models.TaskUser_Relation.reaction == "undecided")
             
-    elif filter_type == "recent_created":
-        # 「最近作成された順」: created_at 降順
-        # 並び替え処理のみここで適用して、後のデフォルト並び替えを回避するフラグを立てても良いが
-        # ここではクエリの order_by を上書きする形になる
-        query = query.order_by(desc(models.Task.created_at))
-    
     # 3. 並び替え (filter_typeで指定がなければ日付順)
-    if filter_type != "recent_created":
-        query = query.order_by(models.Task.date.asc())
-
-    # 4. N+1問題対策 & ページネーション
-    return query\
-        .options(joinedload(models.Task.task_user_relations))\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-
-def get_task(db: Session, task_id: str, group_id: str):
-    task = db.query(models.Task).filter(
-        models.Task.task_id == task_id,
-        models.Task.group_id == group_id
-    ).first()
+    # キーセット方式で順序が一意に定まるよう、同値の場合は task_id で並べる
+    if filter_type == "recent_created":
+        # 「最近作成された順」: created_at 降順
+        sort_key = models.Task.created_at
+        query = query.order_by(desc(models.Task.created_at), desc(models.Task.task_id))
+    else:
+        sort_key = models.Task.date
+        query = query.order_by(models.Task.date.asc(), models.Task.task_id.asc())
+
+    # 4. ページネーション
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, filter_type)
+        if filter_type == "recent_created":
+            query = query.where(tuple_(sort_key, models.Task.task_id) < tuple_(last_key, last_id))
+        else:
+            query = query.where(tuple_(sort_key, models.Task.task_id) > tuple_(last_key, last_id))
+    else:
+        query = query.offset(skip)
+
+    # 5. N+1問題対策
+    # joinedload だと LIMIT が結合後の行数に掛かってしまうため、selectinload で別クエリとして読み込む
+    if include_relations:
+        relation_loader = selectinload(models.Task.task_user_relations)\
+            .selectinload(models.TaskUser_Relation.user)
+    else:
+        relation_loader = noload(models.Task.task_user_relations)
+    result = await db.execute(
+        query
+        .options(relation_loader)
+        .limit(limit)
+    )
+    tasks = result.scalars().all()
+
+    next_cursor = encode_cursor(tasks[-1], filter_type) if tasks and len(tasks) == limit else None
+    return tasks, next_cursor
+
+async def get_task(db: AsyncSession, task_id: str, group_id: str):
+    result = await db.execute(
+        select(models.Task)
+        .where(
+            models.Task.task_id == task_id,
+            models.Task.group_id == group_id
+        )
+        .options(
+            selectinload(models.Task.task_user_relations)
+            .selectinload(models.TaskUser_Relation.user)
+        )
+    )
+    task = result.scalars().first()
+    if task is None:
+        return None
 
     task = utc_to_jst(task)
 
@@ -118,176 +258,405 @@ def get_task(db: Session, task_id: str, group_id: str):
     logger.info(f'GET: current date is {task.date}, current time is {task.time_span_begin} - {task.time_span_end}')
     return task
 
-def update_task(db: Session, db_task: models.Task, task_update: schemas.TaskUpdate):
+async def update_task(db: AsyncSession, db_task: models.Task, task_update: schemas.TaskUpdate):
     update_data = task_update.model_dump(exclude_unset=True)
 
     logger.info(f'UP: current setting: date is {db_task.date}, begin is {db_task.time_span_begin}')
-    logger.info(f'UP: time_begin is {update_data["time_span_begin"]}')
+    logger.info(f'UP: time_begin is {update_data.get("time_span_begin")}')
 
+    old_date = db_task.date
     for field, value in update_data.items():
         if field in ["title", "date", "status", "is_task"] and (value is None or value == ""):
             continue
         setattr(db_task, field, value)
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    return db_task
+    await group_crud.bump_data_version(db, db_task.group_id)
+    await db.commit()
+
+    task = await _load_task_with_relations(db, db_task.task_id)
+    # 担当・参加等している全員の「自分のタスク」にも表示されているため、まとめて削除する
+    await calendar_cache.invalidate_tasks(
+        [(task.group_id, old_date), (task.group_id, task.date)],
+        [relation.user_id for relation in task.task_user_relations]
+    )
+    return task
 
-def delete_task(db: Session, db_task: models.Task):
-    db.delete(db_task)
-    db.commit()
+async def delete_task(db: AsyncSession, db_task: models.Task):
+    """
+    タスクを削除する。
+    繰り返し予定の回の場合は、同じ回が再び展開されないよう除外日にも追加する。
+    (未実体化の回は行が無いため、除外日の追加のみ行う)
+    """
+    if db_task.recurrence_id:
+        rule = await db.get(models.TaskRecurrence, db_task.recurrence_id)
+        if rule is not None:
+            _add_exdate(rule, db_task.occurrence_date)
+
+    user_ids = []
+    if inspect(db_task).persistent:
+        user_ids = [relation.user_id for relation in db_task.task_user_relations]
+        await db.delete(db_task)
+    await group_crud.bump_data_version(db, db_task.group_id)
+    await db.commit()
+    await calendar_cache.invalidate_tasks([(db_task.group_id, db_task.date)], user_ids)
+
+# --- 繰り返し予定 (TaskRecurrence) ---
+
+def _rule_exdates(rule: models.TaskRecurrence) -> list[date]:
+    return [date.fromisoformat(d) for d in (rule.exdates or [])]
+
+def _add_exdate(rule: models.TaskRecurrence, target: date):
+    # JSON列は中身の変更を検知しないため、新しいリストを代入する
+    if target.isoformat() not in (rule.exdates or []):
+        rule.exdates = sorted([*(rule.exdates or []), target.isoformat()])
+
+def _expand_rule(rule: models.TaskRecurrence, start: date, end: date) -> list[date]:
+    """ルールの [start, end) に含まれる回の日付を返す"""
+    return recurrence.expand_dates(
+        rule.freq, rule.interval, rule.dtstart, start, end,
+        until=rule.until, count=rule.count, exdates=_rule_exdates(rule),
+    )
 
-# --- Relation (担当/参加/コメント) のロジック ---
+def _occurrence_time_span(rule: models.TaskRecurrence, target: date):
+    """ルールの開始・終了時刻 (日本時間) をその日の日時にする"""
+    begin = datetime.combine(target, rule.start_time, tzinfo=JST) if rule.start_time else None
+    end = datetime.combine(target, rule.end_time, tzinfo=JST) if rule.end_time else None
+    return begin, end
 
-def get_relation(db: Session, task_id: str, user_id: str):
-    return db.query(models.TaskUser_Relation).filter(
-        models.TaskUser_Relation.task_id == task_id,
-        models.TaskUser_Relation.user_id == user_id
-    ).first()
+def _build_occurrence(rule: models.TaskRecurrence, target: date) -> models.Task:
+    """
+    まだ保存されていない回を Task として組み立てる (セッションには追加しない)。
+    task_id は "<ルールID>:<日付>" 形式の仮IDになります。
+    """
+    template = rule.template
+    begin, end = _occurrence_time_span(rule, target)
+    return models.Task(
+        task_id=recurrence.make_occurrence_id(rule.recurrence_id, target),
+        group_id=rule.group_id,
+        title=template.title,
+        date=target,
+        time_span_begin=begin,
+        time_span_end=end,
+        location=template.location,
+        description=template.description,
+        is_task=False,
+        status="未着手",
+        created_at=rule.created_at,
+        recurrence_id=rule.recurrence_id,
+        occurrence_date=target,
+        join_count=0,
+        absent_count=0,
+        undecided_count=0,
+        assigned_count=0,
+        task_user_relations=[],
+    )
 
-def _ensure_relation(db: Session, task_id: str, user_id: str) -> models.TaskUser_Relation:
-    """リレーションを取得、なければ作成して返す内部関数"""
-    relation = get_relation(db, task_id, user_id)
-    if relation:
-        return relation
+async def _get_rules_in_window(db: AsyncSession, group_id: str, start: date, end: date):
+    """[start, end) に回が発生しうるグループのルールを、テンプレートと一緒に取得する"""
+    result = await db.execute(
+        select(models.TaskRecurrence)
+        .where(
+            models.TaskRecurrence.group_id == group_id,
+            models.TaskRecurrence.dtstart < end,
+            or_(models.TaskRecurrence.until.is_(None), models.TaskRecurrence.until >= start)
+        )
+        .options(selectinload(models.TaskRecurrence.template))
+    )
+    return result.scalars().all()
+
+async def create_recurrence(db: AsyncSession, template: models.TaskTemplate, rule_in: schemas.TaskRecurrenceCreate):
+    data = rule_in.model_dump()
+    data["exdates"] = sorted({d.isoformat() for d in rule_in.exdates})
+    db_rule = models.TaskRecurrence(
+        **data,
+        template_id=template.template_id,
+        group_id=template.group_id
+    )
+    db.add(db_rule)
+    await group_crud.bump_data_version(db, template.group_id)
+    await db.commit()
+    await calendar_cache.invalidate_group(template.group_id)
+    await db.refresh(db_rule)
+    return db_rule
+
+async def get_recurrences(db: AsyncSession, group_id: str):
+    result = await db.execute(
+        select(models.TaskRecurrence)
+        .where(models.TaskRecurrence.group_id == group_id)
+        .order_by(models.TaskRecurrence.created_at.desc())
+    )
+    return result.scalars().all()
+
+async def get_recurrence(db: AsyncSession, recurrence_id: str, group_id: str):
+    result = await db.execute(
+        select(models.TaskRecurrence)
+        .where(
+            models.TaskRecurrence.recurrence_id == recurrence_id,
+            models.TaskRecurrence.group_id == group_id
+        )
+        .options(selectinload(models.TaskRecurrence.template))
+    )
+    return result.scalars().first()
+
+async def add_recurrence_exception(db: AsyncSession, rule: models.TaskRecurrence, target: date):
+    """特定の回を取りやめる (除外日に追加する)"""
+    _add_exdate(rule, target)
+    await group_crud.bump_data_version(db, rule.group_id)
+    await db.commit()
+    await calendar_cache.invalidate_tasks([(rule.group_id, target)])
+    await db.refresh(rule)
+    return rule
+
+async def delete_recurrence(db: AsyncSession, rule: models.TaskRecurrence):
+    """ルールを削除する。既に実体化された回は通常のタスクとして残る"""
+    await db.delete(rule)
+    await group_crud.bump_data_version(db, rule.group_id)
+    await db.commit()
+    await calendar_cache.invalidate_group(rule.group_id)
+
+async def resolve_task(db: AsyncSession, task_id: str, group_id: str, materialize: bool = False, commit: bool = True):
+    """
+    task_id からタスクを取得する。繰り返し予定の仮ID ("<ルールID>:<日付>") も受け付ける。
+    - 保存済みのタスク、または既に実体化された回ならその行を返す
+    - 未実体化の回は、materialize=True なら行を作成して返し、
+      False なら保存せずに組み立てた Task を返す (閲覧用)
+    - 該当しない場合は None
+    commit=False の場合、実体化した行はフラッシュのみ行います
+    (コミットとカレンダーのキャッシュの削除は呼び出し側で行うこと)
+    """
+    task = await get_task(db, task_id, group_id)
+    if task is not None:
+        return task
 
+    parsed = recurrence.parse_occurrence_id(task_id)
+    if parsed is None:
+        return None
+    recurrence_id, target = parsed
+
+    rule = await get_recurrence(db, recurrence_id, group_id)
+    if rule is None or not recurrence.is_occurrence(
+        rule.freq, rule.interval, rule.dtstart, target,
+        until=rule.until, count=rule.count, exdates=_rule_exdates(rule),
+    ):
+        return None
+
+    existing = await _get_materialized_occurrence(db, recurrence_id, target)
+    if existing is not None:
+        return await get_task(db, existing, group_id)
+
+    if not materialize:
+        return _build_occurrence(rule, target)
+
+    occurrence = _build_occurrence(rule, target)
+    occurrence.task_id = None  # 通常のUUIDを採番させる
+    occurrence.created_at = None
     try:
-        with db.begin_nested():
-            relation = models.TaskUser_Relation(
-                task_id=task_id,
-                user_id=user_id,
-                is_assigned=False,
-                reaction="no-reaction",
-                comment=None
-            )
-            db.add(relation)
-            db.flush() # ここでINSERTを実行し、競合があればIntegrityErrorを発生させる
-            return relation
-        
+        async with db.begin_nested():
+            db.add(occurrence)
+            await db.flush() # 同じ回を他の人が同時に実体化した場合は IntegrityError
+        # カレンダー上の task_id が仮IDから変わるため
+        await group_crud.bump_data_version(db, group_id)
     except IntegrityError:
-        # 競合発生 (他人が一瞬早く作成した)
-        # 改めて取得する
-        relation = get_relation(db, task_id, user_id)
-        if not relation:
-            raise # 万が一それでも取得できない場合は想定外のエラーとして投げる
-        return relation
-
-def _cleanup_relation(db: Session, relation: models.TaskUser_Relation):
-    """
-    条件: 担当でなく、リアクションも 'no-reaction' で、コメントも空ならレコード削除
-    """
-    # None対策
-    comment_content = relation.comment if relation.comment else ""
-    
-    if (not relation.is_assigned) and \
-       (relation.reaction == "no-reaction") and \
-       (not comment_content.strip()):
-        
-        db.delete(relation)
-        db.commit()
-        return None # 削除されたことを示す
-    else:
-        db.commit()
-        db.refresh(relation)
-        return relation
+        pass
+    if commit:
+        await db.commit()
+        await calendar_cache.invalidate_tasks([(group_id, target)])
+
+    materialized_id = await _get_materialized_occurrence(db, recurrence_id, target)
+    return await get_task(db, materialized_id, group_id)
+
+async def _get_materialized_occurrence(db: AsyncSession, recurrence_id: str, target: date) -> Optional[str]:
+    result = await db.execute(
+        select(models.Task.task_id).where(
+            models.Task.recurrence_id == recurrence_id,
+            models.Task.occurrence_date == target
+        )
+    )
+    return result.scalars().first()
 
-def set_user_assignment(db: Session, task_id: str, user_id: str, is_assigned: bool):
-    """管理者による担当者任命/解除"""
-    relation = _ensure_relation(db, task_id, user_id)
-    
-    relation.is_assigned = is_assigned
-    
-    # 保存または削除判定
-    return _cleanup_relation(db, relation)
+# --- Relation (担当/参加/コメント) のロジック ---
 
-def update_user_reaction(db: Session, task_id: str, user_id: str, reaction: Optional[str], comment: Optional[str]):
-    """ユーザーによるリアクション/コメント更新"""
-    relation = _ensure_relation(db, task_id, user_id)
-    
-    if reaction is not None:
-        relation.reaction = reaction
-    if comment is not None:
-        # 空文字が来たらNoneにするか、そのまま空文字にするか。ここではそのまま保存しcleanupで判定
-        relation.comment = comment
+async def get_relation(db: AsyncSession, task_id: str, user_id: str):
+    result = await db.execute(
+        select(models.TaskUser_Relation).where(
+            models.TaskUser_Relation.task_id == task_id,
+            models.TaskUser_Relation.user_id == user_id
+        )
+    )
+    return result.scalars().first()
+
+async def set_user_assignment(db: AsyncSession, task_id: str, user_id: str, is_assigned: bool):
+    """管理者による担当者任命/解除 (空になった場合は削除され None を返す)"""
+    return await relations.apply_change(db, task_id, user_id, is_assigned=is_assigned)
+
+async def update_user_reaction(db: AsyncSession, task_id: str, user_id: str, reaction: Optional[str], comment: Optional[str]):
+    """ユーザーによるリアクション/コメント更新 (空になった場合は削除され None を返す)"""
+    return await relations.apply_change(db, task_id, user_id, reaction=reaction, comment=comment)
+
+async def get_task_ids_in_group(db: AsyncSession, task_ids: list[str], group_id: str) -> set[str]:
+    """task_ids のうち、このグループに存在するものを1回のクエリで返す"""
+    result = await db.execute(
+        select(models.Task.task_id).where(
+            models.Task.task_id.in_(task_ids),
+            models.Task.group_id == group_id
+        )
+    )
+    return set(result.scalars().all())
 
-    # 保存または削除判定
-    return _cleanup_relation(db, relation)
+async def update_user_reactions_bulk(db: AsyncSession, user_id: str, items: list[schemas.MyReactionBulkItem]):
+    """
+    ユーザーによるリアクション/コメントの一括更新 (コミットは1回のみ)。
+    task_id は呼び出し側でグループ所属を確認済みであること。
+    """
+    return await relations.apply_reactions_bulk(db, user_id, items)
 
 # --- カレンダー用データ取得 ---
 
-def get_calendar_tasks(db: Session, group_id: str, year: int, month: int):
+async def get_calendar_tasks(db: AsyncSession, group_id: str, year: int, month: int):
     """
     指定された年・月のタスクを軽量に取得する。
     joinedloadなどは使わず、Taskテーブルのみから必要なカラムを取得。
+    (group_id, date) の複合インデックスで範囲検索されます。
+    繰り返し予定はこの月の分だけ展開し、まだ実体化されていない回を仮IDで追加します。
     """
-    return db.query(
+    start, end = month_range(year, month)
+    result = await db.execute(select(
             models.Task.task_id,
             models.Task.title,
             models.Task.date,
             models.Task.time_span_begin,
             models.Task.time_span_end,
-            models.Task.location
+            models.Task.location,
+            models.Task.recurrence_id,
+            models.Task.occurrence_date,
+            models.Task.join_count,
+            models.Task.absent_count,
+            models.Task.undecided_count,
+            models.Task.assigned_count
         )\
-        .filter(models.Task.group_id == group_id)\
-        .filter(extract('year', models.Task.date) == year)\
-        .filter(extract('month', models.Task.date) == month)\
-        .order_by(models.Task.date.asc())\
-        .all()
+        .where(models.Task.group_id == group_id)\
+        .where(models.Task.date >= start)\
+        .where(models.Task.date < end)\
+        .order_by(models.Task.date.asc()))
+    tasks = list(result.all())
+
+    rules = await _get_rules_in_window(db, group_id, start, end)
+    if not rules:
+        return tasks
+
+    # 実体化済みの回 (別の月に日付変更されたものも含む) は展開しない
+    materialized = set((await db.execute(
+        select(models.Task.recurrence_id, models.Task.occurrence_date)
+        .where(models.Task.recurrence_id.in_([rule.recurrence_id for rule in rules]))
+        .where(models.Task.occurrence_date >= start)
+        .where(models.Task.occurrence_date < end)
+    )).all())
+
+    for rule in rules:
+        for target in _expand_rule(rule, start, end):
+            if (rule.recurrence_id, target) in materialized:
+                continue
+            begin, finish = _occurrence_time_span(rule, target)
+            tasks.append(SimpleNamespace(
+                task_id=recurrence.make_occurrence_id(rule.recurrence_id, target),
+                title=rule.template.title,
+                date=target,
+                time_span_begin=begin,
+                time_span_end=finish,
+                location=rule.template.location,
+                recurrence_id=rule.recurrence_id,
+                occurrence_date=target,
+                join_count=0,
+                absent_count=0,
+                undecided_count=0,
+                assigned_count=0,
+            ))
+
+    # sorted は安定ソートなので、同じ日付の中では保存済みのタスクが先に並ぶ
+    return sorted(tasks, key=lambda t: t.date)
+
+async def get_related_group_versions(db: AsyncSession, user_id: str) -> list[tuple[str, int]]:
+    """
+    ユーザーが担当・参加等しているタスクのあるグループと、そのデータバージョンの一覧。
+    (グループ横断の自分のタスク一覧の ETag に使用)
+    """
+    result = await db.execute(
+        select(group_models.Group.group_id, group_models.Group.data_version)
+        .where(
+            group_models.Group.group_id.in_(
+                select(models.Task.group_id)
+                .join(models.TaskUser_Relation, models.Task.task_id == models.TaskUser_Relation.task_id)
+                .where(models.TaskUser_Relation.user_id == user_id)
+            )
+        )
+        .order_by(group_models.Group.group_id)
+    )
+    return [tuple(row) for row in result.all()]
 
 # --- グループ横断で自分のタスクを軽量取得 ---
-def get_my_global_tasks(db: Session, user_id: str, year: int, month: int):
+async def get_my_global_tasks(db: AsyncSession, user_id: str, year: int, month: int):
     """
     所属する全グループの中から、「担当」または「参加」しているタスクを取得。
     指定された年・月のデータを全件返す。
     必要なカラム（ID, グループ名, タイトル, 日時, 場所）のみを返す。
+    繰り返し予定の回は、リアクション・担当登録の時点で必ず実体化されるため、
+    ここでは保存済みの行だけを見ればよく、ルールの展開は不要です。
+    (user_id, task_id) の複合インデックスで自分のリレーションを引いてから結合します。
     """
-    return db.query(
+    start, end = month_range(year, month)
+    result = await db.execute(select(
             models.Task.task_id,
             group_models.Group.group_name.label("group_name"), # Groupテーブルの名前を取得
             models.Task.title,
             models.Task.date,
             models.Task.time_span_begin,
             models.Task.time_span_end,
-            models.Task.location
+            models.Task.location,
+            models.Task.recurrence_id, # ICS フィードの UID 用
+            models.Task.occurrence_date
         )\
         .select_from(models.Task)\
         .join(group_models.Group, models.Task.group_id == group_models.Group.group_id)\
         .join(models.TaskUser_Relation, models.Task.task_id == models.TaskUser_Relation.task_id)\
-        .filter(models.TaskUser_Relation.user_id == user_id)\
-        .filter(
+        .where(models.TaskUser_Relation.user_id == user_id)\
+        .where(
             or_(
                 models.TaskUser_Relation.is_assigned == True,
                 models.TaskUser_Relation.reaction == "join"
             )
         )\
-        .filter(extract('year', models.Task.date) == year)\
-        .filter(extract('month', models.Task.date) == month)\
-        .order_by(models.Task.date.asc())\
-        .all()
+        .where(models.Task.date >= start)\
+        .where(models.Task.date < end)\
+        .order_by(models.Task.date.asc()))
+    return result.all()
 
 # --- タスクテンプレート用CRUD ---
-def create_template(db: Session, template_in: schemas.TaskTemplateCreate, group_id: str):
+async def create_template(db: AsyncSession, template_in: schemas.TaskTemplateCreate, group_id: str):
     db_template = models.TaskTemplate(
         **template_in.model_dump(),
         group_id=group_id
     )
     db.add(db_template)
-    db.commit()
-    db.refresh(db_template)
+    await db.commit()
+    await db.refresh(db_template)
     return db_template
 
-def get_templates(db: Session, group_id: str):
-    return db.query(models.TaskTemplate)\
-        .filter(models.TaskTemplate.group_id == group_id)\
-        .order_by(models.TaskTemplate.created_at.desc())\
-        .all()
-
-def delete_template(db: Session, template: models.TaskTemplate):
-    db.delete(template)
-    db.commit()
-
-def get_template(db: Session, template_id: str, group_id: str):
-    return db.query(models.TaskTemplate).filter(
+async def get_templates(db: AsyncSession, group_id: str):
+    result = await db.execute(select(models.TaskTemplate)\
+        .where(models.TaskTemplate.group_id == group_id)\
+        .order_by(models.TaskTemplate.created_at.desc()))
+    return result.scalars().all()
+
+async def delete_template(db: AsyncSession, template: models.TaskTemplate):
+    await db.delete(template)
+    # テンプレートの繰り返しルールも削除され、カレンダーの表示が変わるため
+    await group_crud.bump_data_version(db, template.group_id)
+    await db.commit()
+    await calendar_cache.invalidate_group(template.group_id)
+
+async def get_template(db: AsyncSession, template_id: str, group_id: str):
+    result = await db.execute(select(models.TaskTemplate).where(
         models.TaskTemplate.template_id == template_id,
         models.TaskTemplate.group_id == group_id
-    ).first()
\ No newline at end of file
+    ))
+    return result.scalars().first()
\ No newline at end of file
@@ -0,0 +1,282 @@
+# backend/app/modules/task/ics.py
+
+"""
+iCalendar (ICS, RFC 5545) の購読フィード。
+
+    GET /my-tasks/feed.ics?token=...                  自分が担当・参加するタスク (グループ横断)
+    GET /groups/{group_id}/tasks/feed.ics?token=...   グループの全タスク (繰り返し予定の未実体化の回も含む)
+
+- フィードの期間は今月の ICS_FEED_PAST_MONTHS ヶ月前から ICS_FEED_FUTURE_MONTHS ヶ月後まで
+- VEVENT は月ごとに生成してキャッシュし (calendar_cache.feed_cache)、変更のあった月だけを作り直します
+- 組み立てたフィードも購読者ごとにキャッシュします。キャッシュから返す場合も、取得の度にユーザー (主キー1件) と
+  所属 (権限キャッシュ) を確認するため、凍結・脱退・URL の再発行 (feed_token_version) は次の取得から反映されます
+- UID は task_id から作ります。繰り返し予定の回は実体化の前後で task_id が変わるため、ルールIDと日付から作ります
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.core.config import settings
+from app.core.etag import etag_matches, make_etag
+from app.modules.group import crud as group_crud
+from app.modules.user.models import User
+from . import calendar_cache, crud
+from .schemas import JST
+
+CRLF = b"\r\n"
+PRODID = "-//My Project//Task Feed//JA"
+UID_DOMAIN = "tasks.my-project"
+MEDIA_TYPE = "text/calendar; charset=utf-8"
+# カレンダーアプリには再取得の間隔の目安だけを伝え、取得の度に条件付き GET で再検証させる
+CACHE_CONTROL = "private, max-age=300"
+
+# 月ごとの VEVENT の形式を変えた時に上げる
+MONTH_FORMAT_VERSION = "1"
+
+# 月ごとの VEVENT には DTSTAMP の代わりにこの文字列を入れておき、組み立て時に置き換える。
+# ETag は置き換える前の内容から作るため、作り直しても内容が同じなら ETag は変わらない
+STAMP_PLACEHOLDER = b"@DTSTAMP@"
+
+MY_SCOPE = "me"
+
+
+def group_scope(group_id: str) -> str:
+    return f"group:{group_id}"
+
+
+# --- ICS の組み立て ---
+
+def escape_text(value: str) -> str:
+    """TEXT 型の値のエスケープ"""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def content_line(line: str) -> bytes:
+    """1行を 75オクテットごとに折り返す (UTF-8 の文字の途中では折り返さない)"""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return data + CRLF
+    parts: List[bytes] = []
+    chunk, limit = b"", 75
+    for char in line:
+        encoded = char.encode("utf-8")
+        if len(chunk) + len(encoded) > limit:
+            parts.append(chunk)
+            # 継続行は先頭の空白1文字を含めて 75オクテット
+            chunk, limit = b"", 74
+        chunk += encoded
+    parts.append(chunk)
+    return b"\r\n ".join(parts) + CRLF
+
+
+def _utc_stamp(dt: datetime) -> str:
+    if dt.tzinfo is None:
+        # レスポンスのスキーマと同じく、タイムゾーンの無い値は JST とみなす
+        dt = dt.replace(tzinfo=JST)
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def event_uid(task) -> str:
+    recurrence_id = getattr(task, "recurrence_id", None)
+    occurrence_date = getattr(task, "occurrence_date", None)
+    if recurrence_id and occurrence_date:
+        return f"{recurrence_id}-{occurrence_date:%Y%m%d}@{UID_DOMAIN}"
+    return f"{task.task_id}@{UID_DOMAIN}"
+
+
+def vevent(task, summary: str) -> bytes:
+    lines = ["BEGIN:VEVENT", f"UID:{event_uid(task)}", f"DTSTAMP:{STAMP_PLACEHOLDER.decode()}"]
+    if task.time_span_begin is not None:
+        lines.append(f"DTSTART:{_utc_stamp(task.time_span_begin)}")
+        if task.time_span_end is not None and task.time_span_end > task.time_span_begin:
+            lines.append(f"DTEND:{_utc_stamp(task.time_span_end)}")
+    else:
+        # 時間の無いタスクは終日の予定にする (DTEND は翌日)
+        lines.append(f"DTSTART;VALUE=DATE:{task.date:%Y%m%d}")
+        lines.append(f"DTEND;VALUE=DATE:{task.date + timedelta(days=1):%Y%m%d}")
+    lines.append(f"SUMMARY:{escape_text(summary)}")
+    if task.location:
+        lines.append(f"LOCATION:{escape_text(task.location)}")
+    lines.append("END:VEVENT")
+    return b"".join(content_line(line) for line in lines)
+
+
+def calendar_header(name: str) -> bytes:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+        "X-WR-TIMEZONE:Asia/Tokyo",
+        "REFRESH-INTERVAL;VALUE=DURATION:PT1H",
+        "X-PUBLISHED-TTL:PT1H",
+    ]
+    return b"".join(content_line(line) for line in lines)
+
+
+CALENDAR_FOOTER = content_line("END:VCALENDAR")
+
+
+# --- 期間とキャッシュ ---
+
+def feed_months(today: Optional[date] = None) -> List[Tuple[int, int]]:
+    """フィードに含める (年, 月) の一覧"""
+    today = today or datetime.now(JST).date()
+    index = today.year * 12 + today.month - 1
+    return [
+        (i // 12, i % 12 + 1)
+        for i in range(index - settings.ICS_FEED_PAST_MONTHS, index + settings.ICS_FEED_FUTURE_MONTHS + 1)
+    ]
+
+
+def _window_tag(months: List[Tuple[int, int]]) -> str:
+    """月が変わると期間も変わるため、組み立て済みのフィードは期間と一緒に保存する"""
+    (first_year, first_month), (last_year, last_month) = months[0], months[-1]
+    return f"{first_year:04d}-{first_month:02d}/{last_year:04d}-{last_month:02d}"
+
+
+@dataclass
+class Feed:
+    body: bytes
+    etag: str
+    last_modified: datetime
+
+    def encode(self) -> bytes:
+        header = f"{self.etag} {self.last_modified.timestamp():.0f}\n".encode("utf-8")
+        return header + self.body
+
+    @classmethod
+    def decode(cls, value: bytes) -> "Feed":
+        header, body = value.split(b"\n", 1)
+        etag, timestamp = header.decode("utf-8").split(" ")
+        return cls(body=body, etag=etag, last_modified=datetime.fromtimestamp(int(timestamp), timezone.utc))
+
+
+async def get_cached_feed(key: str) -> Optional[Feed]:
+    """組み立て済みのフィードがキャッシュにあれば返す (authorize の後に呼ぶ)"""
+    value = await calendar_cache.feed_cache.get(key, _window_tag(feed_months()))
+    return Feed.decode(value) if value is not None else None
+
+
+async def _assemble(key: str, name: str, months: List[Tuple[int, int]], month_events) -> Feed:
+    """
+    月ごとの VEVENT をキャッシュから集め、無い月だけ month_events(year, month) で生成してフィードにする
+    """
+    chunks = []
+    for year, month in months:
+        month_key, build = month_events(year, month)
+        chunk = await calendar_cache.feed_cache.get(month_key, MONTH_FORMAT_VERSION)
+        if chunk is None:
+            chunk = await build()
+            await calendar_cache.feed_cache.set(month_key, MONTH_FORMAT_VERSION, chunk)
+        chunks.append(chunk)
+
+    body = calendar_header(name) + b"".join(chunks) + CALENDAR_FOOTER
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    feed = Feed(
+        body=body.replace(STAMP_PLACEHOLDER, _utc_stamp(now).encode("ascii")),
+        etag=make_etag("ics", hashlib.sha256(body).hexdigest()),
+        last_modified=now,
+    )
+    await calendar_cache.feed_cache.set(key, _window_tag(months), feed.encode())
+    return feed
+
+
+def _events(tasks: Iterable, summary) -> bytes:
+    return b"".join(vevent(task, summary(task)) for task in tasks)
+
+
+async def build_group_feed(db: AsyncSession, group_id: str, group_name: str, user_id: str) -> Feed:
+    def month_events(year: int, month: int):
+        async def build() -> bytes:
+            tasks = await crud.get_calendar_tasks(db, group_id, year, month)
+            return _events(tasks, lambda task: task.title)
+        return calendar_cache.group_feed_month_key(group_id, year, month), build
+
+    return await _assemble(calendar_cache.group_feed_key(group_id, user_id), group_name, feed_months(), month_events)
+
+
+async def build_my_feed(db: AsyncSession, user_id: str) -> Feed:
+    def month_events(year: int, month: int):
+        async def build() -> bytes:
+            tasks = await crud.get_my_global_tasks(db, user_id, year, month)
+            return _events(tasks, lambda task: f"[{task.group_name}] {task.title}")
+        return calendar_cache.my_feed_month_key(user_id, year, month), build
+
+    return await _assemble(calendar_cache.my_feed_key(user_id), "自分のタスク", feed_months(), month_events)
+
+
+# --- 認証とレスポンス ---
+
+async def feed_url(db: AsyncSession, user_id: str, scope: str, url) -> dict:
+    """購読用トークンを付けた URL と、その有効期限を返す (FeedUrlResponse)"""
+    version = await db.scalar(select(User.feed_token_version).where(User.user_id == user_id))
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="ユーザーが見つかりません。")
+    token, expires_at = security.create_feed_token(user_id, scope, version)
+    return {"url": str(url.include_query_params(token=token)), "expires_at": expires_at}
+
+
+def verify_token(token: str, scope: str) -> dict:
+    payload = security.decode_feed_token(token, scope)
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="フィードが見つかりません。")
+    return payload
+
+
+async def authorize(db: AsyncSession, payload: dict, group_id: Optional[str] = None) -> None:
+    """
+    キャッシュの有無に関わらず、取得の度に呼ぶ。
+    トークン発行後に凍結・削除・脱退していないか、URL が再発行されていないか (feed_token_version) を確認する
+    """
+    row = (await db.execute(
+        select(User.is_active, User.feed_token_version).where(User.user_id == payload["sub"])
+    )).one_or_none()
+    if row is None or not row.is_active or row.feed_token_version != payload["fv"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="フィードが見つかりません。")
+    if group_id is not None:
+        membership = await group_crud.get_membership(db, payload["sub"], group_id)
+        if membership is None or not membership.is_member:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="フィードが見つかりません。")
+
+
+def _not_modified_since(request: Request, last_modified: datetime) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header or request.headers.get("if-none-match"):
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+def feed_response(request: Request, feed: Feed, filename: str) -> Response:
+    """If-None-Match / If-Modified-Since が一致すれば 304、そうでなければフィードを返す"""
+    headers = {
+        "ETag": feed.etag,
+        "Last-Modified": format_datetime(feed.last_modified, usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+    }
+    if etag_matches(request, feed.etag) or _not_modified_since(request, feed.last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    return Response(content=feed.body, media_type=MEDIA_TYPE, headers=headers)
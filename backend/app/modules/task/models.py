@@ -1,7 +1,7 @@
 # backend/app/modules/task/models.py
 
 import uuid
-from sqlalchemy import Column, String, Text, Boolean, DateTime, Date, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Text, Boolean, DateTime, Date, Time, Integer, JSON, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -38,6 +38,18 @@ class Task(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # 繰り返し予定から実体化された回の場合のみ設定される
+    # (誰かがリアクション・担当登録をした時点で初めて行が作られる)
+    recurrence_id = Column(String(36), ForeignKey("task_recurrences.recurrence_id", ondelete="SET NULL"), nullable=True)
+    occurrence_date = Column(Date, nullable=True, comment="繰り返しルール上の本来の日付 (日付変更後も保持)")
+
+    # 参加/不参加/未定/担当の人数 (task_user_relations の集計)
+    # relations.py の書き込みと同じトランザクションで数え直すため、一覧表示でリレーションを読み込む必要がありません
+    join_count = Column(Integer, nullable=False, default=0, server_default="0")
+    absent_count = Column(Integer, nullable=False, default=0, server_default="0")
+    undecided_count = Column(Integer, nullable=False, default=0, server_default="0")
+    assigned_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # グループテーブルとの関係
     group = relationship(
         "app.modules.group.models.Group",
@@ -50,13 +62,21 @@ class Task(Base):
         cascade="all, delete-orphan"
     )
 
+    # カレンダー表示 (グループ×月の範囲検索) 用の複合インデックス
+    __table_args__ = (
+        Index('ix_tasks_group_id_date', 'group_id', 'date'),
+        # 同じ回が二重に実体化されないようにする
+        UniqueConstraint('recurrence_id', 'occurrence_date', name='unique_task_recurrence_occurrence'),
+    )
+
 class TaskUser_Relation(Base):
 
     __tablename__ = "task_user_relations"
     
     relation_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     task_id = Column(String(36), ForeignKey("tasks.task_id", ondelete="CASCADE"), nullable=False, index=True)
-    user_id = Column(String(36), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    # user_id での検索は下の (user_id, task_id) の複合インデックスを使う (単独のインデックスは作らない)
+    user_id = Column(String(36), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
 
     is_assigned = Column(Boolean, default=False, comment="True: 担当者, False: 担当者でない")
     reaction = Column(String(20), default="no-reaction",comment="join: 参加, absent: 不参加, undecided: 未定, no-reaction: 無反応")
@@ -76,6 +96,8 @@ class TaskUser_Relation(Base):
     # task_idとuser_idの組み合わせはユニークである必要がある
     __table_args__ = (
         UniqueConstraint('task_id', 'user_id', name='unique_task_user_membership'),
+        # 「自分のタスク」検索 (user_id で絞ってから task に結合) 用の複合インデックス
+        Index('ix_task_user_relations_user_id_task_id', 'user_id', 'task_id'),
     )
 
 # --- タスクテンプレートモデル ---
@@ -97,4 +119,38 @@ class TaskTemplate(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    group = relationship("app.modules.group.models.Group", back_populates="task_templates")
\ No newline at end of file
+    group = relationship("app.modules.group.models.Group", back_populates="task_templates")
+    recurrences = relationship(
+        "TaskRecurrence",
+        back_populates="template",
+        cascade="all, delete-orphan"
+    )
+
+# --- 繰り返しルールモデル ---
+class TaskRecurrence(Base):
+    """
+    テンプレートから定期的に予定を発生させるルール (RRULE のサブセット)。
+    各回は表示時に期間ごとに展開され、リアクション・担当登録があった回だけが Task として保存されます。
+    """
+    __tablename__ = "task_recurrences"
+
+    recurrence_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    template_id = Column(String(36), ForeignKey("task_templates.template_id", ondelete="CASCADE"), nullable=False, index=True)
+    group_id = Column(String(36), ForeignKey("groups.group_id", ondelete="CASCADE"), nullable=False, index=True)
+
+    freq = Column(String(20), nullable=False, comment="weekly: 毎週, monthly: 毎月")
+    interval = Column(Integer, nullable=False, default=1, comment="何週/何ヶ月おきか")
+    dtstart = Column(Date, nullable=False, comment="初回の日付 (曜日・日付の基準)")
+    until = Column(Date, nullable=True, comment="この日まで (含む)")
+    count = Column(Integer, nullable=True, comment="回数 (until とは併用不可)")
+
+    # 各回の開始・終了時刻 (日本時間)
+    start_time = Column(Time, nullable=True)
+    end_time = Column(Time, nullable=True)
+
+    # 除外日 (ISO形式の日付文字列のリスト)
+    exdates = Column(JSON, nullable=False, default=list)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    template = relationship("TaskTemplate", back_populates="recurrences")
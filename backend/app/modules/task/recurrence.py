@@ -0,0 +1,116 @@
+# backend/app/modules/task/recurrence.py
+
+"""
+繰り返し予定 (TaskRecurrence) の展開ロジック。
+RRULE (RFC 5545) のうち、次のサブセットのみを扱います。
+
+- FREQ=WEEKLY / MONTHLY と INTERVAL (曜日・日付は dtstart と同じ)
+- UNTIL (その日を含む) または COUNT
+- EXDATE (除外日)
+
+展開は「表示する期間」ごとに必要な分だけ行い、DBには保存しません。
+"""
+
+from datetime import date, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+OCCURRENCE_ID_SEPARATOR = ":"
+
+
+def _add_months(d: date, months: int) -> Optional[date]:
+    """d の months ヶ月後の同じ日を返す。その月に同じ日が無い場合 (例: 2/31) は None"""
+    total = d.month - 1 + months
+    year, month = d.year + total // 12, total % 12 + 1
+    try:
+        return date(year, month, d.day)
+    except ValueError:
+        return None
+
+
+def _iter_candidates(freq: str, interval: int, dtstart: date, first_index: int) -> Iterator[Optional[date]]:
+    """first_index 回目以降の候補日を順に生成する。存在しない日付は None"""
+    index = first_index
+    while True:
+        if freq == "weekly":
+            yield dtstart + timedelta(weeks=index * interval)
+        else:
+            yield _add_months(dtstart, index * interval)
+        index += 1
+
+
+def expand_dates(
+    freq: str,
+    interval: int,
+    dtstart: date,
+    window_start: date,
+    window_end: date,
+    until: Optional[date] = None,
+    count: Optional[int] = None,
+    exdates: Iterable[date] = (),
+) -> List[date]:
+    """
+    [window_start, window_end) に含まれる発生日を昇順で返す。
+    RFC 5545 と同様に、COUNT は EXDATE で除外される前の件数で数え、
+    存在しない日付 (MONTHLY の 31日など) は数えません。
+    """
+    if window_end <= window_start or window_end <= dtstart:
+        return []
+    if until is not None and until < window_start:
+        return []
+
+    excluded = set(exdates)
+
+    # WEEKLY は全ての回が有効なので、表示期間の手前まで一気に読み飛ばせる
+    # (MONTHLY は存在しない日付を COUNT から除くため、先頭から数える)
+    first_index = 0
+    if freq == "weekly" and window_start > dtstart:
+        first_index = (window_start - dtstart).days // (7 * interval)
+
+    result = []
+    produced = first_index if freq == "weekly" else 0
+    for current in _iter_candidates(freq, interval, dtstart, first_index):
+        if current is None:
+            continue
+        if count is not None and produced >= count:
+            break
+        if until is not None and current > until:
+            break
+        if current >= window_end:
+            break
+        produced += 1
+
+        if current >= window_start and current not in excluded:
+            result.append(current)
+    return result
+
+
+def is_occurrence(
+    freq: str,
+    interval: int,
+    dtstart: date,
+    target: date,
+    until: Optional[date] = None,
+    count: Optional[int] = None,
+    exdates: Iterable[date] = (),
+) -> bool:
+    """target がこのルールの (除外されていない) 発生日か"""
+    return target in expand_dates(
+        freq, interval, dtstart, target, target + timedelta(days=1),
+        until=until, count=count, exdates=exdates,
+    )
+
+
+def make_occurrence_id(recurrence_id: str, occurrence_date: date) -> str:
+    """まだ保存されていない回を指す task_id (例: '<recurrence_id>:2026-04-07')"""
+    return f"{recurrence_id}{OCCURRENCE_ID_SEPARATOR}{occurrence_date.isoformat()}"
+
+
+def parse_occurrence_id(task_id: str) -> Optional[Tuple[str, date]]:
+    """make_occurrence_id の逆変換。通常の task_id (UUID) の場合は None"""
+    recurrence_id, sep, date_part = task_id.rpartition(OCCURRENCE_ID_SEPARATOR)
+    if not sep or not recurrence_id:
+        return None
+    try:
+        return recurrence_id, date.fromisoformat(date_part)
+    except ValueError:
+        return None
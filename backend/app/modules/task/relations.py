@@ -0,0 +1,205 @@
+# backend/app/modules/task/relations.py
+
+"""
+TaskUser_Relation (担当/参加/コメント) の書き込みをまとめたモジュール。
+
+どの変更も INSERT ... ON CONFLICT (unique_task_user_membership) DO UPDATE ... RETURNING の
+1文で「作成または更新」し、結果の行を受け取ります。事前の SELECT や SAVEPOINT は使いません。
+更新の結果「空」になった行 (担当でなく、no-reaction で、コメントも空) は同じトランザクション内で削除します。
+upsert した時点で行ロックを取っているため、削除までの間に他のリクエストが割り込むことはありません。
+
+タスクの集計カラム (join_count 等) も同じトランザクションで数え直します。
+同じタスクへの書き込みどうしで数え直しが食い違わないよう、最初にタスクの行をロックします。
+コミット後に、変更したタスクの月カレンダーと本人の「自分のタスク」のキャッシュを削除します。
+"""
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.modules.group import crud as group_crud
+from . import calendar_cache, models
+
+Relation = models.TaskUser_Relation
+
+# (task_id, user_id) の一意制約名。ON CONFLICT の対象として使用する
+UNIQUE_CONSTRAINT = "unique_task_user_membership"
+
+
+def cleared_conditions():
+    """「削除してよい」行の条件 (SQL版)"""
+    return (
+        Relation.is_assigned.is_not(True),
+        Relation.reaction == "no-reaction",
+        func.coalesce(func.trim(Relation.comment), "") == "",
+    )
+
+
+def is_cleared(relation: models.TaskUser_Relation) -> bool:
+    """「削除してよい」行の条件 (Python版)"""
+    comment_content = relation.comment if relation.comment else ""
+    return (not relation.is_assigned) and \
+        (relation.reaction == "no-reaction") and \
+        (not comment_content.strip())
+
+
+def _count_of(*conditions):
+    """タスクごとのリレーション件数 (UPDATE tasks の中で使う相関サブクエリ)"""
+    return select(func.count())\
+        .where(Relation.task_id == models.Task.task_id, *conditions)\
+        .scalar_subquery()
+
+
+async def lock_tasks(db: AsyncSession, task_ids) -> None:
+    """
+    集計カラムを数え直す前に、対象タスクの行をロックする (デッドロックを避けるため task_id 順)。
+    FOR NO KEY UPDATE なので、他のリクエストからのリレーションの INSERT (外部キーの確認) は妨げません。
+    """
+    await db.execute(
+        select(models.Task.task_id)
+        .where(models.Task.task_id.in_(sorted(set(task_ids))))
+        .order_by(models.Task.task_id)
+        .with_for_update(key_share=True)
+    )
+
+
+async def refresh_counts(db: AsyncSession, task_ids) -> list[tuple[str, date]]:
+    """
+    task_ids のタスクの集計カラムをリレーションから数え直し、
+    タスクが属するグループのデータバージョンを上げる (コミットはしません)
+    戻り値は数え直したタスクの (group_id, date) で、コミット後のキャッシュ削除に使います。
+    """
+    task_ids = list(set(task_ids))
+    result = await db.execute(
+        update(models.Task)
+        .where(models.Task.task_id.in_(task_ids))
+        .values(
+            join_count=_count_of(Relation.reaction == "join"),
+            absent_count=_count_of(Relation.reaction == "absent"),
+            undecided_count=_count_of(Relation.reaction == "undecided"),
+            assigned_count=_count_of(Relation.is_assigned.is_(True)),
+            # リアクションはタスク自体の編集ではないため、updated_at (onupdate) は変えない
+            updated_at=models.Task.updated_at,
+        )
+        .returning(models.Task.group_id, models.Task.date)
+        .execution_options(synchronize_session=False)
+    )
+    touched = [tuple(row) for row in result.all()]
+    await group_crud.bump_data_version(
+        db, list({group_id for group_id, _ in touched})
+    )
+    return touched
+
+
+def _upsert_statement(fields: tuple[str, ...]):
+    """
+    既存の行では fields に含まれる項目だけを上書きする upsert 文を組み立てる。
+    (新規作成時、指定されなかった項目はデフォルト値になります)
+    """
+    stmt = pg_insert(Relation)
+    set_ = {field: stmt.excluded[field] for field in fields}
+    set_["updated_at"] = func.now()
+    return stmt.on_conflict_do_update(constraint=UNIQUE_CONSTRAINT, set_=set_)
+
+
+def _insert_values(task_id: str, user_id: str, is_assigned: Optional[bool], reaction: Optional[str], comment: Optional[str]) -> dict:
+    return {
+        "task_id": task_id,
+        "user_id": user_id,
+        "is_assigned": bool(is_assigned),
+        "reaction": reaction if reaction is not None else "no-reaction",
+        "comment": comment,
+    }
+
+
+async def apply_change(
+    db: AsyncSession,
+    task_id: str,
+    user_id: str,
+    is_assigned: Optional[bool] = None,
+    reaction: Optional[str] = None,
+    comment: Optional[str] = None,
+) -> Optional[models.TaskUser_Relation]:
+    """
+    1件のリレーションを変更してコミットする。
+    変更後の行 (user 読み込み済み) を返し、空になって削除された場合は None を返す。
+    """
+    changes = {"is_assigned": is_assigned, "reaction": reaction, "comment": comment}
+    fields = tuple(field for field, value in changes.items() if value is not None)
+
+    await lock_tasks(db, [task_id])
+    stmt = _upsert_statement(fields)\
+        .values(**_insert_values(task_id, user_id, is_assigned, reaction, comment))\
+        .returning(Relation)\
+        .options(selectinload(Relation.user))
+    relation = (await db.scalars(stmt, execution_options={"populate_existing": True})).one()
+
+    if is_cleared(relation):
+        await db.execute(
+            delete(Relation)
+            .where(Relation.relation_id == relation.relation_id)
+            .execution_options(synchronize_session=False)
+        )
+        touched = await refresh_counts(db, [task_id])
+        await db.commit()
+        await calendar_cache.invalidate_tasks(touched, [user_id])
+        db.expunge(relation)
+        return None
+
+    touched = await refresh_counts(db, [task_id])
+    await db.commit()
+    await calendar_cache.invalidate_tasks(touched, [user_id])
+    return relation
+
+
+async def apply_reactions_bulk(db: AsyncSession, user_id: str, items) -> list[models.TaskUser_Relation]:
+    """
+    1人のユーザーの複数タスクへのリアクション/コメントをまとめて変更し、1回だけコミットする。
+    - upsert は指定項目の組み合わせごとに1文 (最大3文)
+    - 空になった行は DELETE 1文で削除
+    items は task_id, reaction, comment を持つオブジェクトのリスト。
+    戻り値は変更後に残っているリレーションの一覧です。
+    """
+    batches: dict[tuple[str, ...], list[dict]] = {}
+    for item in items:
+        changes = {"reaction": item.reaction, "comment": item.comment}
+        fields = tuple(field for field, value in changes.items() if value is not None)
+        if not fields:
+            continue
+        batches.setdefault(fields, []).append(
+            _insert_values(item.task_id, user_id, None, item.reaction, item.comment)
+        )
+
+    task_ids = [item.task_id for item in items]
+    await lock_tasks(db, task_ids)
+
+    for fields, rows in batches.items():
+        await db.execute(_upsert_statement(fields), rows)
+
+    await db.execute(
+        delete(Relation)
+        .where(
+            Relation.user_id == user_id,
+            Relation.task_id.in_(task_ids),
+            *cleared_conditions()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    touched = await refresh_counts(db, task_ids)
+    await db.commit()
+    await calendar_cache.invalidate_tasks(touched, [user_id])
+
+    result = await db.execute(
+        select(Relation)
+        .where(
+            Relation.user_id == user_id,
+            Relation.task_id.in_(task_ids)
+        )
+        .options(selectinload(Relation.user))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().all()
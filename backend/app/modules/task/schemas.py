@@ -1,6 +1,6 @@
-from pydantic import BaseModel, field_validator, field_serializer
+from pydantic import BaseModel, Field, field_validator, field_serializer, model_validator
 from typing import Optional, List
-from datetime import datetime as _datetime, date as _date, timezone, timedelta
+from datetime import datetime as _datetime, date as _date, time as _time, timezone, timedelta
 from enum import Enum
 
 from app.modules.user.schemas import UserResponse
@@ -40,6 +40,20 @@ class MyReactionUpdate(BaseModel):
     reaction: Optional[str] = None
     comment: Optional[str] = None
 
+class MyReactionBulkItem(MyReactionUpdate):
+    task_id: str
+
+class MyReactionBulkUpdate(BaseModel):
+    """複数タスクへのリアクション一括更新用 (1ヶ月分の「参加」など)"""
+    items: List[MyReactionBulkItem] = Field(..., min_length=1, max_length=200)
+
+    @field_validator('items')
+    @classmethod
+    def unique_task_ids(cls, v: List[MyReactionBulkItem]):
+        if len({item.task_id for item in v}) != len(v):
+            raise ValueError("同じタスクが複数回指定されています。")
+        return v
+
 # --- Task本体 ---
 
 class TaskBase(BaseModel):
@@ -64,6 +78,10 @@ class TaskBase(BaseModel):
 class TaskCreate(TaskBase):
     pass
 
+class TaskBulkCreate(BaseModel):
+    """複数タスクの一括作成用 (学期分の練習日程の取り込みなど)"""
+    tasks: List[TaskCreate] = Field(..., min_length=1, max_length=500)
+
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
     date: Optional[_date] = None
@@ -88,6 +106,15 @@ class TaskResponse(TaskBase):
     group_id: str
     created_at: _datetime
     updated_at: Optional[_datetime] = None
+
+    # 繰り返し予定の回である場合のルールID
+    recurrence_id: Optional[str] = None
+
+    # 参加/不参加/未定/担当の人数
+    join_count: int = 0
+    absent_count: int = 0
+    undecided_count: int = 0
+    assigned_count: int = 0
     
     # リレーション情報（担当者や参加者）
     task_user_relations: List[TaskUserRelationResponse] = []
@@ -125,6 +152,48 @@ class TaskTemplateResponse(TaskTemplateBase):
     class Config:
         from_attributes = True
 
+# --- 繰り返しルール用スキーマ ---
+
+class TaskRecurrenceCreate(BaseModel):
+    """テンプレートから定期的な予定を発生させるルール"""
+    freq: str = Field(..., pattern="^(weekly|monthly)$", description="'weekly'(毎週) または 'monthly'(毎月)")
+    interval: int = Field(1, ge=1, le=52, description="何週/何ヶ月おきか")
+    dtstart: _date = Field(..., description="初回の日付。曜日/日付はこの日に揃います")
+    until: Optional[_date] = Field(None, description="この日まで (含む)")
+    count: Optional[int] = Field(None, ge=1, le=1000, description="回数")
+    start_time: Optional[_time] = Field(None, description="開始時刻 (日本時間)")
+    end_time: Optional[_time] = Field(None, description="終了時刻 (日本時間)")
+    exdates: List[_date] = Field(default_factory=list, description="除外する日付")
+
+    @model_validator(mode="after")
+    def check_end_condition(self):
+        if self.until is not None and self.count is not None:
+            raise ValueError("until と count は同時に指定できません。")
+        if self.until is not None and self.until < self.dtstart:
+            raise ValueError("until は dtstart 以降の日付を指定してください。")
+        return self
+
+class TaskRecurrenceException(BaseModel):
+    """特定の回を取りやめる (除外日を追加する) 用"""
+    date: _date
+
+class TaskRecurrenceResponse(BaseModel):
+    recurrence_id: str
+    template_id: str
+    group_id: str
+    freq: str
+    interval: int
+    dtstart: _date
+    until: Optional[_date] = None
+    count: Optional[int] = None
+    start_time: Optional[_time] = None
+    end_time: Optional[_time] = None
+    exdates: List[_date] = []
+    created_at: _datetime
+
+    class Config:
+        from_attributes = True
+
 # --- カレンダービュー用 軽量スキーマ ---
 
 class CalendarTaskResponse(BaseModel):
@@ -135,8 +204,15 @@ class CalendarTaskResponse(BaseModel):
     time_span_begin: Optional[_datetime] = None
     time_span_end: Optional[_datetime] = None
     location: Optional[str] = None
-    
-    # 担当者情報などの重いデータは含めない
+    # 繰り返し予定の回である場合のルールID (未実体化の回は task_id も "<ルールID>:<日付>" になる)
+    recurrence_id: Optional[str] = None
+
+    # 参加/不参加/未定/担当の人数 (担当者の一覧などの重いデータは含めない)
+    join_count: int = 0
+    absent_count: int = 0
+    undecided_count: int = 0
+    assigned_count: int = 0
+
 
     class Config:
         from_attributes = True
@@ -176,4 +252,10 @@ class GlobalCalendarTaskResponse(BaseModel):
             return None
         if dt.tzinfo is not None:
             return dt.astimezone(JST)
-        return dt.replace(tzinfo=JST)
\ No newline at end of file
+        return dt.replace(tzinfo=JST)
+
+
+class FeedUrlResponse(BaseModel):
+    """カレンダーアプリに登録する ICS フィードの URL"""
+    url: str
+    expires_at: _datetime  # この日時を過ぎたら URL を取得し直す
@@ -1,55 +1,70 @@
 # backend/app/modules/user/api.py
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import database, security
-from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.core.database import get_async_db
+from app.core.dependencies import get_current_user, oauth2_scheme
+from app.core.password_hasher import password_hasher
+from app.core.rate_limit import client_ip, login_limiter
 from app.modules.user import models as user_models
-from . import crud, schemas, models
+from . import crud, schemas, models, tokens
 
 router = APIRouter()
 
 @router.post("/signup", response_model=schemas.UserResponse)
-def signup(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+async def signup(user: schemas.UserCreate, db: AsyncSession = Depends(database.get_async_db)):
     """
     ユーザー登録API
     URL: POST /users/signup
     """
     # メールアドレスの重複チェック
     # (同姓同名は許可するため、名前でのチェックは行いません)
-    if crud.get_user_by_email(db, email=user.email):
+    if await crud.get_user_by_email(db, email=user.email):
         raise HTTPException(status_code=400, detail="そのアドレスは無効です。")
     
     # DBに保存
-    return crud.create_user(db=db, user=user)
+    return await crud.create_user(db=db, user=user)
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
+    request: Request,
     # OAuth2標準フォーム (username, passwordフィールドを持つ) を使用
     # フロントエンドからは username フィールドに「メールアドレス」を入れて送信してもらう
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_async_db)
 ):
     """
     ログインAPI
     URL: POST /users/token
     成功するとJWT（アクセストークン）を返します。
     """
+    # 0. 試行回数の制限 (メールアドレスごと・IPごと)。上限に達していれば bcrypt を動かさずに 429
+    attempt = await login_limiter.attempt(form_data.username, client_ip(request))
+
     # 1. フォームのusername(中身はemail)を使ってユーザーを検索
-    user = crud.get_user_by_email(db, email=form_data.username)
+    user = await crud.get_user_by_email(db, email=form_data.username)
     
     # 2. ユーザーが存在しない、またはパスワードが一致しない場合のエラー処理
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    # (bcryptはCPUを占有するため、専用のプールで実行。混雑時は 429)
+    try:
+        verified = bool(user) and await password_hasher.verify(form_data.password, user.hashed_password)
+    except HTTPException:
+        # 混雑で検証できなかった試行は失敗として数えない
+        await login_limiter.succeeded(attempt)
+        raise
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="入力された情報が不正です。",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    await login_limiter.succeeded(attempt)
+
     # 3. 凍結アカウントチェック
     if not user.is_active:
         raise HTTPException(
@@ -57,55 +72,60 @@ def login_for_access_token(
             detail="アカウントが凍結されています。"
         )
     
-    # 4. 認証OKならトークンを発行 (subには一意なemailを入れるのが一般的)
-    access_token = security.create_access_token(subject=user.email)
-    return {
-        "access_token": access_token, 
-        "token_type": "bearer",
-        "user_info":{
-            "id": user.user_id,
-            "name": user.user_name,
-            "email": user.email,
-        }
-    }
+    # 4. ハッシュのコストが設定と異なれば、平文が手元にある今のうちに作り直して保存
+    new_hash = await password_hasher.rehash_if_needed(form_data.password, user.hashed_password)
+    if new_hash:
+        await crud.update_password_hash(db, user, new_hash)
+
+    # 5. 認証OKならトークンを発行 (短命のアクセストークンと、再発行用のリフレッシュトークン)
+    return await tokens.issue_tokens(db, user)
+
+@router.post("/token/refresh", response_model=schemas.Token)
+async def refresh_access_token(body: schemas.RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    アクセストークン再発行API
+    URL: POST /token/refresh
+    リフレッシュトークンを新しいものと交換し、アクセストークンを再発行します。
+    (交換済みのリフレッシュトークンを再び使うと、同じログインのトークンがすべて無効になります)
+    """
+    return await tokens.rotate(db, body.refresh_token)
 
 # === 【追加】ログアウト用エンドポイント ===
 @router.post("/logout", status_code=status.HTTP_200_OK)
-def logout(current_user: user_models.User = Depends(get_current_user)):
+async def logout(
+    body: Optional[schemas.LogoutRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    current_user: user_models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     ログアウトAPI
     URL: POST /users/logout
     
-    【注意】
-    JWT認証はステートレス（サーバー側でセッションを持たない）であるため、
-    サーバー側でトークンを無効化する処理は、ブラックリスト機能を実装しない限り行えません。
-    
-    このエンドポイントの主な役割は以下の通りです：
-    1. クライアントに対して「ログアウト処理の受付」を完了したことを伝える
-    2. 必要であれば「誰がいつログアウトしたか」をログに残す
+    使用中のアクセストークンを失効させます (失効リストに登録され、全ワーカーで数秒以内に使えなくなります)。
+    body に refresh_token を含めると、同じログインで発行したリフレッシュトークンもすべて無効にします。
     
     ★フロントエンド側での実装必須事項:
     このAPIを叩いた後（あるいは同時に）、必ずブラウザの LocalStorage や Cookie から
-    アクセストークンを削除してください。
+    アクセストークンとリフレッシュトークンを削除してください。
     """
-    
-    # ここにログ出力処理などを書くことができます
-    # print(f"User {current_user.email} has logged out.")
+    payload = security.decode_access_token(token) or {}
+    await tokens.logout(db, payload, body.refresh_token if body else None)
     
     return {"message": "ログアウトしました。ブラウザのトークンを破棄してください。"}
 
 @router.delete("/profile", status_code=status.HTTP_204_NO_CONTENT)
-def delete_my_account(
+async def delete_my_account(
     # ログイン中のユーザー情報を自動取得（トークンが必要になります）
     current_user: models.User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ログイン中のユーザー自身のアカウントを削除します。
     """
     # crudの削除関数を呼び出す
     # success = crud.delete_user(db, user_id=current_user.user_id)
-    success = crud.delete_user(db, user_id=current_user.user_id)
+    success = await crud.delete_user(db, user_id=current_user.user_id)
     
     if not success:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりませんでした。")
@@ -114,10 +134,10 @@ def delete_my_account(
     return
 
 @router.put("/{user_id}/status", response_model=schemas.UserResponse)
-def change_user_status(
+async def change_user_status(
     user_id: str,
     status_in: schemas.FreezeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: user_models.User = Depends(get_current_user)
 ):
     """
@@ -132,13 +152,13 @@ def change_user_status(
         )
 
     # 自分自身を凍結してしまうのを防ぐ（誤操作防止）
-    if current_user.is_superuser:
+    if current_user.user_id == user_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="super権限者自身を凍結することはできません。"
         )
 
-    updated_user = crud.toggle_user_active_status(db, user_id, status_in.is_active)
+    updated_user = await crud.toggle_user_active_status(db, user_id, status_in.is_active)
     
     if not updated_user:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりませんでした。")
@@ -146,17 +166,23 @@ def change_user_status(
     return updated_user
 
 @router.get("/me", response_model=schemas.UserResponse)
-def read_users_me(current_user: user_models.User = Depends(get_current_user)):
-    """ログイン中の自分の情報を取得"""
-    return current_user
+async def read_users_me(
+    current_user: user_models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """ログイン中の自分の情報を取得 (登録日時などはトークンに含まれないためDBから取得)"""
+    user = await db.get(models.User, current_user.user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="ユーザーが見つかりませんでした。")
+    return user
 
 # --- ★以下を追加: 所属グループ一覧取得API ---
 @router.get("/me/groups", response_model=List[schemas.UserGroupDetail])
-def read_my_groups(
+async def read_my_groups(
     current_user: user_models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ログイン中のユーザーが所属している（または招待されている）グループ一覧を取得します。
     """
-    return crud.get_user_joined_groups(db, user_id=current_user.user_id)
\ No newline at end of file
+    return await crud.get_user_joined_groups(db, user_id=current_user.user_id)
\ No newline at end of file
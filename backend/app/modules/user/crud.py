@@ -1,24 +1,103 @@
 # backend/app/modules/user/crud.py
 
-from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
 
-from app.core.security import get_password_hash # パスワードハッシュ化用の関数
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.password_hasher import password_hasher # パスワードハッシュ化用の専用プール
 from app.modules.group import models as group_models
-from . import models, schemas
+from app.modules.task import calendar_cache, relations as task_relations
+from app.modules.task.models import TaskUser_Relation
+from . import models, schemas, tokens
+from .revocation import revocation_list
+
+# --- 認証済みユーザー (Principal) のキャッシュ ---
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    get_current_user が返す、ログイン中ユーザーの読み取り専用スナップショット。
+    DBセッションに紐付かないため、リクエストをまたいでキャッシュできます。
+    アクセストークンの内容から作った場合 (from_claims) は created_at / updated_at を持ちません。
+    """
+    user_id: str
+    user_name: str
+    email: str
+    is_superuser: bool
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            user_id=user.user_id,
+            user_name=user.user_name,
+            email=user.email,
+            is_superuser=user.is_superuser,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal":
+        return cls(
+            user_id=payload["sub"],
+            user_name=payload.get("name", ""),
+            email=payload.get("email", ""),
+            is_superuser=bool(payload.get("su")),
+            is_active=bool(payload.get("act")),
+        )
+
+# キーは旧形式のトークンの sub (email)
+principal_cache = TTLCache(
+    "auth_principal",
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_MAXSIZE,
+)
+
+def invalidate_principal(email: str):
+    """ユーザー情報 (凍結状態など) が変わった時に呼び、キャッシュを破棄する"""
+    principal_cache.delete(email)
+
+async def get_principal_by_email(db: AsyncSession, email: str) -> Optional[Principal]:
+    """
+    トークンの sub (email) から Principal を取得する。
+    キャッシュにあればDBを参照しません。
+    """
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+
+    user = await get_user_by_email(db, email=email)
+    if user is None:
+        return None
 
-def get_user_by_email(db: Session, email: str):
+    principal = Principal.from_user(user)
+    principal_cache.set(email, principal)
+    return principal
+
+async def get_user_by_email(db: AsyncSession, email: str):
     """
     メールアドレスでユーザーを検索します。
     用途: ログイン時のユーザー特定、新規登録時のメアド重複チェック。
     """
-    return db.query(models.User).filter(models.User.email == email).first()
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
 
-def create_user(db: Session, user: schemas.UserCreate):
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
     """
     新しいユーザーを作成してDBに保存します。
     """
     # 1. パスワードをハッシュ化（平文のまま保存するのは危険なため）
-    hashed_password = get_password_hash(user.password)
+    # (bcryptはCPUを占有するため、専用のプールで実行。混雑時は 429)
+    hashed_password = await password_hasher.hash(user.password)
     
     # 2. DBモデルのインスタンスを作成
     # user_id はモデル側で default=uuid.uuid4() としているので、ここで指定しなくてOKです。
@@ -30,39 +109,68 @@ def create_user(db: Session, user: schemas.UserCreate):
     
     # 3. セッションに追加してコミット（保存確定）
     db.add(db_user)
-    db.commit()
+    await db.commit()
     
     # 4. 保存されたデータ（自動生成されたuser_idなど）を再読み込みして最新状態にする
-    db.refresh(db_user)
+    await db.refresh(db_user)
     return db_user
 
-def delete_user(db: Session, user_id: str):
+async def update_password_hash(db: AsyncSession, user: models.User, hashed_password: str):
+    """
+    ログイン時にコストの異なるハッシュを作り直した場合に保存します。
+    """
+    user.hashed_password = hashed_password
+    await db.commit()
+
+async def delete_user(db: AsyncSession, user_id: str):
     """
     指定されたIDのユーザーを物理削除します。
     """
     # 削除対象のユーザーを取得
-    db_user = db.query(models.User).filter(models.User.user_id == user_id).first()
+    db_user = await db.get(models.User, user_id)
     
     if db_user:
-        db.delete(db_user)  # 削除命令
-        db.commit()         # 確定
+        # 参加・担当していたタスクの集計カラムを数え直す
+        task_ids = (await db.scalars(
+            select(TaskUser_Relation.task_id).where(TaskUser_Relation.user_id == user_id)
+        )).all()
+        if task_ids:
+            await task_relations.lock_tasks(db, task_ids)
+
+        # 発行済みのトークンを失効させる (アクセストークンはDBを参照せずに受け付けるため)
+        revoked_key = await tokens.revoke_all(db, db_user)
+
+        await db.delete(db_user)  # 削除命令
+        await db.flush()
+        touched = await task_relations.refresh_counts(db, task_ids) if task_ids else []
+        await db.commit()         # 確定
+        await calendar_cache.invalidate_tasks(touched)
+        invalidate_principal(db_user.email)
+        revocation_list.add_local([revoked_key])
         return True
     return False
 
-def toggle_user_active_status(db: Session, user_id: str, is_active: bool):
+async def toggle_user_active_status(db: AsyncSession, user_id: str, is_active: bool):
     """
     ユーザーの有効/無効(凍結)状態を切り替える
     """
-    user = db.query(models.User).filter(models.User.user_id == user_id).first()
+    user = await db.get(models.User, user_id)
     if user:
+        revoked_key = None
+        if user.is_active and not is_active:
+            # 凍結時は発行済みのトークンをすべて失効させる (token_version も上がる)
+            revoked_key = await tokens.revoke_all(db, user)
         user.is_active = is_active
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        invalidate_principal(user.email)
+        if revoked_key:
+            revocation_list.add_local([revoked_key])
         return user
     return None
 
 # --- ★以下を追加: 所属グループ取得関数 ---
-def get_user_joined_groups(db: Session, user_id: str):
+async def get_user_joined_groups(db: AsyncSession, user_id: str):
     """
     ユーザーが所属している（または招待されている）グループ一覧を取得する。
     GroupMemberテーブルとGroupテーブルを結合して、グループ名まで取得する。
@@ -73,15 +181,17 @@ def get_user_joined_groups(db: Session, user_id: str):
     # JOIN groups AS group ON member.group_id = group.group_id
     # WHERE member.user_id = :user_id
     
-    results = db.query(
-        group_models.GroupMember,
-        group_models.Group.group_name
-    ).join(
-        group_models.Group,
-        group_models.GroupMember.group_id == group_models.Group.group_id
-    ).filter(
-        group_models.GroupMember.user_id == user_id
-    ).all()
+    results = await db.execute(
+        select(
+            group_models.GroupMember,
+            group_models.Group.group_name
+        ).join(
+            group_models.Group,
+            group_models.GroupMember.group_id == group_models.Group.group_id
+        ).where(
+            group_models.GroupMember.user_id == user_id
+        )
+    )
 
     # Pydanticスキーマ(UserGroupDetail)に合わせて辞書リストを作成
     group_list = []
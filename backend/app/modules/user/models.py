@@ -1,7 +1,7 @@
 # backend/app/modules/user/models.py
 
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -45,6 +45,12 @@ class User(Base):
     # デフォルトはTrue(有効)。Falseにするとログインできなくなります。
     is_active = Column(Boolean, default=True, nullable=False)
 
+    # アクセストークンに埋め込む版番号。凍結・削除時に上げ、それ以前に発行したトークンを失効させます
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+    # ICS フィードの購読用トークンに埋め込む版番号。URL の再発行・ログアウト・凍結・削除時に上げ、
+    # それ以前に発行した購読用 URL を使えなくします
+    feed_token_version = Column(Integer, default=0, server_default="0", nullable=False)
+
     # --- リレーション定義 (テーブル間の繋がり) ---
     # 所属するグループ情報（GroupMemberテーブル）へのリンク。
     # 重要: ここで `from app.modules.group.models import GroupMember` と書いてimportすると、
@@ -62,3 +68,35 @@ class User(Base):
         # ユーザーが削除されたら、紐付いている task_user_relations も一緒に破棄する設定
         cascade="all, delete-orphan" # <--- これが重要
     )
+
+
+class RefreshToken(Base):
+    """
+    リフレッシュトークン (アクセストークンの再発行用)。
+    使う度に新しいものと交換し (ローテーション)、同じ系列 (family_id) で使用済みのものが再び使われた場合は
+    盗まれた可能性があるとして系列ごと無効にします。トークンそのものは保存せず、ハッシュのみ保存します。
+    """
+    __tablename__ = "refresh_tokens"
+
+    token_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String(36), nullable=False, index=True, comment="ログイン1回ごとの系列ID")
+    token_hash = Column(String(64), nullable=False, comment="トークンの秘密部分の SHA-256")
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    used_at = Column(DateTime(timezone=True), comment="新しいトークンと交換した日時")
+    revoked_at = Column(DateTime(timezone=True), comment="ログアウト・凍結・再使用の検知で無効にした日時")
+
+
+class RevokedToken(Base):
+    """
+    失効させたアクセストークンの一覧。各ワーカーはこれをブルームフィルタとしてメモリに読み込み、
+    リクエストごとにDBを参照せずに照合します (revocation.py)。
+    revocation_key は "jti:<トークンID>" (ログアウト) または "user:<user_id>:<token_version>" (凍結・削除)
+    """
+    __tablename__ = "revoked_tokens"
+
+    revocation_key = Column(String(100), primary_key=True)
+    # この日時を過ぎると対象のトークン自体が期限切れになるため、一覧から削除できる
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
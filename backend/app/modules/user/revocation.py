@@ -0,0 +1,151 @@
+# backend/app/modules/user/revocation.py
+
+"""
+アクセストークンの失効リスト。
+
+失効させたトークン (revoked_tokens テーブル) を各ワーカーがブルームフィルタとしてメモリに持ち、
+get_current_user はリクエストごとにメモリ上で照合します。DBを参照するのは次の場合のみです。
+- 前回の同期から TOKEN_REVOCATION_SYNC_SECONDS 秒以上経った時 (他のワーカーで失効させた分を読み込む)
+- ブルームフィルタが陽性の時 (偽陽性でないかを確認する)
+
+アクセストークンは短命 (ACCESS_TOKEN_EXPIRE_MINUTES) のため、期限の過ぎた失効情報は
+TOKEN_REVOCATION_REBUILD_SECONDS ごとの作り直しの際にフィルタとテーブルの両方から取り除きます。
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.metrics import Counter
+from .models import RefreshToken, RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# 別のトランザクションで少し前の日時で記録された失効を読み落とさないよう、差分の読み込みは少し遡る
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def token_key(jti: str) -> str:
+    """トークン1つ (ログアウト)"""
+    return f"jti:{jti}"
+
+
+def user_key(user_id: str, token_version: int) -> str:
+    """あるユーザーの、ある版のトークンすべて (凍結・削除)"""
+    return f"user:{user_id}:{token_version}"
+
+
+def claim_keys(payload: dict) -> List[str]:
+    return [token_key(payload.get("jti", "")), user_key(payload.get("sub", ""), payload.get("ver", 0))]
+
+
+class RevocationList:
+    def __init__(self):
+        self._bloom: Optional[BloomFilter] = None
+        self._cursor: Optional[datetime] = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+
+        self.syncs = Counter()
+        self.rebuilds = Counter()
+        self.bloom_positives = Counter()
+        self.confirmed = Counter()
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        now = datetime.now(timezone.utc)
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= now))
+        await db.commit()
+
+        rows = (await db.execute(select(RevokedToken.revocation_key, RevokedToken.revoked_at))).all()
+        bloom = BloomFilter(
+            max(settings.TOKEN_REVOCATION_BLOOM_CAPACITY, len(rows) * 2),
+            settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+        )
+        for key, _ in rows:
+            bloom.add(key)
+        self._bloom = bloom
+        self._cursor = max((revoked_at for _, revoked_at in rows), default=None)
+        self._built_at = time.monotonic()
+        self.rebuilds.inc()
+
+    async def _sync(self, db: AsyncSession) -> None:
+        query = select(RevokedToken.revocation_key, RevokedToken.revoked_at)
+        if self._cursor is not None:
+            query = query.where(RevokedToken.revoked_at > self._cursor - SYNC_OVERLAP)
+        for key, revoked_at in (await db.execute(query)).all():
+            self._bloom.add(key)
+            if self._cursor is None or revoked_at > self._cursor:
+                self._cursor = revoked_at
+        self.syncs.inc()
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """前回から一定時間が経っていれば、他のワーカーで失効させた分を読み込む (必要なら作り直す)"""
+        now = time.monotonic()
+        if self._bloom is not None and now - self._synced_at < settings.TOKEN_REVOCATION_SYNC_SECONDS:
+            return
+        async with self._lock:
+            if self._bloom is not None and now - self._synced_at < settings.TOKEN_REVOCATION_SYNC_SECONDS:
+                return
+            if self._bloom is None or now - self._built_at >= settings.TOKEN_REVOCATION_REBUILD_SECONDS:
+                await self._rebuild(db)
+            else:
+                await self._sync(db)
+            self._synced_at = time.monotonic()
+
+    async def is_revoked(self, db: AsyncSession, payload: dict) -> bool:
+        await self.refresh(db)
+        candidates = [key for key in claim_keys(payload) if key in self._bloom]
+        if not candidates:
+            return False
+
+        # 陽性の場合のみDBで確認する (偽陽性ならトークンは有効)
+        self.bloom_positives.inc()
+        found = await db.scalar(
+            select(func.count()).select_from(RevokedToken).where(RevokedToken.revocation_key.in_(candidates))
+        )
+        if found:
+            self.confirmed.inc()
+        return bool(found)
+
+    def add_local(self, keys: Iterable[str]) -> None:
+        """コミット後に呼ぶ。このワーカーには即時に反映する (他のワーカーには次の同期で反映される)"""
+        if self._bloom is None:
+            return
+        for key in keys:
+            self._bloom.add(key)
+
+    def stats(self) -> dict:
+        return {
+            "bloom": self._bloom.stats() if self._bloom is not None else None,
+            "syncs": self.syncs.value,
+            "rebuilds": self.rebuilds.value,
+            "bloom_positives": self.bloom_positives.value,
+            "confirmed_revoked": self.confirmed.value,
+        }
+
+
+async def revoke(db: AsyncSession, key: str, expires_at: datetime) -> None:
+    """
+    失効情報を記録する (コミットは呼び出し側で行い、その後に revocation_list.add_local を呼ぶ)
+    同じトークンのログアウトが同時に届いても一意制約違反にならないよう、記録済みであれば何もしない
+    """
+    insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+    await db.execute(
+        insert(RevokedToken)
+        .values(revocation_key=key, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=[RevokedToken.revocation_key])
+    )
+
+
+revocation_list = RevocationList()
@@ -6,9 +6,23 @@ from typing import Optional
 
 # --- 認証トークン用 ---
 class Token(BaseModel):
-    """ログイン成功時に返すアクセストークンの型定義"""
+    """
+    ログイン成功時・再発行時に返すトークンの型定義
+    access_token は expires_in 秒で失効するため、期限が切れたら refresh_token で再発行してください。
+    refresh_token は1回使うと無効になり、新しいものに置き換わります。
+    """
     access_token: str
     token_type: str
+    expires_in: int
+    refresh_token: str
+
+class RefreshRequest(BaseModel):
+    """アクセストークンの再発行 (POST /token/refresh) 用"""
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    """ログアウト用。refresh_token を送ると、同じログインで発行したリフレッシュトークンもすべて無効になります"""
+    refresh_token: Optional[str] = None
 
 # --- 共通の基底クラス (Base) ---
 class UserBase(BaseModel):
@@ -0,0 +1,176 @@
+# backend/app/modules/user/tokens.py
+
+"""
+アクセストークンとリフレッシュトークンの発行・交換・失効。
+
+- アクセストークンは短命 (ACCESS_TOKEN_EXPIRE_MINUTES) で、user_id・名前・権限・有効フラグ・token_version を含みます。
+  get_current_user はこれだけで (DBを参照せずに) ユーザーを確定します
+- リフレッシュトークンは使う度に新しいものと交換します。使用済みのものが再び使われた場合は、
+  盗まれた可能性があるとして同じログインの系列を丸ごと無効にします
+- ICS フィードの購読用 URL は feed_token_version を上げると使えなくなります (ログアウト・凍結・削除・URL の再発行)
+"""
+
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.core.config import settings
+from . import models
+from .revocation import revocation_list, revoke, token_key, user_key
+
+
+def _refresh_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="ログインの有効期限が切れました。再度ログインしてください。",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def create_access_token(user: models.User) -> str:
+    return security.create_access_token(
+        subject=user.user_id,
+        claims={
+            "email": user.email,
+            "name": user.user_name,
+            "su": user.is_superuser,
+            "act": user.is_active,
+            "ver": user.token_version,
+        },
+    )
+
+
+def _new_refresh_token(user_id: str, family_id: str, now: datetime) -> tuple[models.RefreshToken, str]:
+    secret = security.create_refresh_secret()
+    row = models.RefreshToken(
+        token_id=str(uuid.uuid4()),
+        user_id=user_id,
+        family_id=family_id,
+        token_hash=security.hash_refresh_secret(secret),
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    return row, f"{row.token_id}.{secret}"
+
+
+def token_response(user: models.User, refresh_token: str) -> dict:
+    return {
+        "access_token": create_access_token(user),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
+
+
+async def issue_tokens(db: AsyncSession, user: models.User) -> dict:
+    """ログイン成功時に、新しい系列のリフレッシュトークンとアクセストークンを発行する"""
+    row, refresh_token = _new_refresh_token(user.user_id, str(uuid.uuid4()), datetime.now(timezone.utc))
+    db.add(row)
+    await db.commit()
+    return token_response(user, refresh_token)
+
+
+async def _find_refresh_token(db: AsyncSession, refresh_token: str, now: datetime) -> Optional[models.RefreshToken]:
+    """有効期限内のリフレッシュトークンを探す (交換済み・無効化済みのものも返す)"""
+    token_id, _, secret = refresh_token.partition(".")
+    if not token_id or not secret:
+        return None
+    # 同じトークンでの同時の交換を直列にする
+    row = await db.scalar(
+        select(models.RefreshToken)
+        .where(models.RefreshToken.token_id == token_id, models.RefreshToken.expires_at > now)
+        .with_for_update()
+    )
+    if row is None or not secrets.compare_digest(row.token_hash, security.hash_refresh_secret(secret)):
+        return None
+    return row
+
+
+async def _revoke_family(db: AsyncSession, family_id: str, now: datetime) -> None:
+    await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.family_id == family_id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+
+
+async def rotate(db: AsyncSession, refresh_token: str) -> dict:
+    """リフレッシュトークンを新しいものと交換し、アクセストークンを再発行する"""
+    now = datetime.now(timezone.utc)
+    row = await _find_refresh_token(db, refresh_token, now)
+    if row is None or row.revoked_at is not None:
+        raise _refresh_error()
+
+    if row.used_at is not None:
+        # 交換済みのトークンが再び使われた: 正規の利用者と攻撃者のどちらかが古いものを持っているため系列ごと無効にする
+        await _revoke_family(db, row.family_id, now)
+        await db.commit()
+        raise _refresh_error()
+
+    user = await db.get(models.User, row.user_id)
+    if user is None:
+        raise _refresh_error()
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="アカウントが凍結されています。")
+
+    row.used_at = now
+    new_row, new_token = _new_refresh_token(user.user_id, row.family_id, now)
+    db.add(new_row)
+    await db.commit()
+    return token_response(user, new_token)
+
+
+async def revoke_feed_tokens(db: AsyncSession, user_id: str) -> None:
+    """発行済みの ICS フィードの購読用 URL をすべて使えなくする (コミットは呼び出し側で行う)"""
+    await db.execute(
+        update(models.User)
+        .where(models.User.user_id == user_id)
+        .values(feed_token_version=models.User.feed_token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def logout(db: AsyncSession, payload: dict, refresh_token: Optional[str] = None) -> None:
+    """
+    使用中のアクセストークンと (渡されていれば) そのリフレッシュトークンの系列を無効にする。
+    ICS フィードの購読用 URL も使えなくなります (ログイン後に URL を取得し直す)
+    """
+    now = datetime.now(timezone.utc)
+    keys = []
+    if payload.get("typ") == security.ACCESS_TOKEN_TYPE and payload.get("jti"):
+        key = token_key(payload["jti"])
+        await revoke(db, key, datetime.fromtimestamp(payload["exp"], timezone.utc))
+        keys.append(key)
+    if refresh_token:
+        row = await _find_refresh_token(db, refresh_token, now)
+        if row is not None and row.user_id == payload.get("sub"):
+            await _revoke_family(db, row.family_id, now)
+    if payload.get("sub"):
+        await revoke_feed_tokens(db, payload["sub"])
+    await db.commit()
+    revocation_list.add_local(keys)
+
+
+async def revoke_all(db: AsyncSession, user: models.User) -> str:
+    """
+    凍結・削除時に呼ぶ。発行済みのアクセストークン (現在の token_version)・リフレッシュトークン・
+    ICS フィードの購読用 URL をすべて無効にする。
+    コミットは呼び出し側で行い、その後に revocation_list.add_local([返り値]) を呼ぶ
+    """
+    now = datetime.now(timezone.utc)
+    key = user_key(user.user_id, user.token_version)
+    # これより前に発行したアクセストークンは、最長でも ACCESS_TOKEN_EXPIRE_MINUTES 後には期限切れになる
+    await revoke(db, key, now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.user_id == user.user_id, models.RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    user.token_version = (user.token_version or 0) + 1
+    user.feed_token_version = (user.feed_token_version or 0) + 1
+    return key
@@ -0,0 +1,417 @@
+# backend/app/services/calendar_image.py
+
+"""
+月カレンダーの画像 (PNG) の生成。Instagram への投稿用 (1080x1350, 縦長 4:5)。
+
+- フォント・文字の画像 (グリフ)・省略後の文字列・月ごとの枠 (背景・タイトル・曜日・日付) はプロセス内でキャッシュし、
+  描画の度に作り直すのは予定の文字だけです
+- 生成した PNG は内容 (デザイン・グループ名・年月・予定) のハッシュ値をファイル名にしてディスクに保存し、
+  同じ内容であれば描画せずにそのファイルを返します
+- 描画は CPU を使うため、API からは run_in_threadpool で呼び出してください
+
+描画時間の計測とサンプルの出力:
+    python -m app.services.calendar_image --bench --months 12
+    python -m app.services.calendar_image --out sample.png --design dark
+"""
+
+import argparse
+import calendar
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from dataclasses import astuple, dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+JST = timezone(timedelta(hours=9), 'JST')
+
+# 描画の内容を変えた時に上げる (ディスクキャッシュのファイル名が変わる)
+RENDERER_VERSION = 1
+
+WIDTH, HEIGHT = 1080, 1350
+MARGIN = 48
+TITLE_HEIGHT = 190
+WEEKDAY_HEIGHT = 56
+WEEKDAYS = ("日", "月", "火", "水", "木", "金", "土")
+
+DAY_FONT_SIZE = 30
+EVENT_FONT_SIZE = 22
+EVENT_LINE_HEIGHT = 28
+
+# 日本語を表示できるフォントを探す場所 (CALENDAR_FONT_PATH が空の場合)
+FONT_CANDIDATES = (
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-{weight}.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-{weight}.ttc",
+    "/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf",
+    "/usr/share/fonts/truetype/fonts-japanese-gothic.ttf",
+    "/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc",
+    "C:/Windows/Fonts/meiryo.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans{dejavu}.ttf",
+)
+
+DesignName = Literal["standard", "minimal", "dark"]
+
+
+@dataclass(frozen=True)
+class Design:
+    name: str
+    background: str
+    text: str
+    accent: str       # タイトル・曜日
+    grid: str
+    cell: Optional[str]
+    sunday: str
+    saturday: str
+    event: str
+    align: Literal["center", "left"]  # タイトルの配置
+
+
+# フロントエンドのデザイン編集画面のレイアウト (スタンダード / ミニマル) に対応するもの + 夜向けの配色
+DESIGNS: Dict[str, Design] = {
+    "standard": Design(
+        name="standard", background="#f4f1ea", text="#2b2b2b", accent="#1f4e79", grid="#d9d3c7",
+        cell="#ffffff", sunday="#c0392b", saturday="#2e6eb5", event="#1f4e79", align="center",
+    ),
+    "minimal": Design(
+        name="minimal", background="#ffffff", text="#222222", accent="#222222", grid="#e5e5e5",
+        cell=None, sunday="#d04a3a", saturday="#3a6fd0", event="#444444", align="left",
+    ),
+    "dark": Design(
+        name="dark", background="#15191f", text="#e8e8e8", accent="#f5c04a", grid="#2d333b",
+        cell="#1d232b", sunday="#ff7b72", saturday="#79b8ff", event="#f5c04a", align="center",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class CalendarEvent:
+    """画像に描く予定1件 (描画に必要な値のみ)"""
+    day: int
+    time: Optional[str]  # "10:00" (時間の無い予定は None)
+    title: str
+
+
+def events_from_tasks(tasks: Iterable) -> List[CalendarEvent]:
+    """get_calendar_tasks の結果を描画用に変換する (時刻は JST で表示)"""
+    events = []
+    for task in tasks:
+        begin = task.time_span_begin
+        if begin is not None:
+            # レスポンスのスキーマと同じく、タイムゾーンの無い値は JST とみなす
+            begin = begin.replace(tzinfo=JST) if begin.tzinfo is None else begin.astimezone(JST)
+        events.append(CalendarEvent(
+            day=task.date.day,
+            time=f"{begin:%H:%M}" if begin is not None else None,
+            title=task.title,
+        ))
+    return sorted(events, key=lambda e: (e.day, e.time or ""))
+
+
+def content_hash(design: Design, group_name: str, year: int, month: int, events: Sequence[CalendarEvent]) -> str:
+    """描画結果を決める値のハッシュ値 (ディスクキャッシュのファイル名と ETag に使う)"""
+    raw = json.dumps(
+        [RENDERER_VERSION, astuple(design), group_name, year, month, [astuple(e) for e in events]],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# --- フォントとグリフのキャッシュ ---
+
+@lru_cache(maxsize=None)
+def _font_path(bold: bool) -> Optional[str]:
+    if settings.CALENDAR_FONT_PATH:
+        return settings.CALENDAR_FONT_PATH
+    for candidate in FONT_CANDIDATES:
+        path = candidate.format(weight="Bold" if bold else "Regular", dejavu="-Bold" if bold else "")
+        if os.path.exists(path):
+            if "DejaVu" in path:
+                logger.warning("日本語フォントが見つからないため %s を使用します (CALENDAR_FONT_PATH を設定してください)", path)
+            return path
+    logger.warning("フォントが見つからないため Pillow の標準フォントを使用します")
+    return None
+
+
+@lru_cache(maxsize=64)
+def get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    path = _font_path(bold)
+    if path is None:
+        return ImageFont.load_default(size)
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=4096)
+def _glyph(text: str, size: int, bold: bool, color: str) -> Image.Image:
+    """
+    文字列を描いた透過画像。日付の数字や「練習」のように毎月同じ文字列が多いため、
+    一度描いたものを貼り付けて使い回す (FreeType のラスタライズを省略する)
+    """
+    font = get_font(size, bold)
+    ascent, descent = font.getmetrics()
+    width = max(1, int(font.getlength(text)) + 1)
+    image = Image.new("RGBA", (width, ascent + descent), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text((0, 0), text, font=font, fill=color)
+    return image
+
+
+@lru_cache(maxsize=4096)
+def fit_text(text: str, size: int, bold: bool, max_width: int) -> str:
+    """max_width に収まらない場合は末尾を「…」にして省略する"""
+    font = get_font(size, bold)
+    if font.getlength(text) <= max_width:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if font.getlength(text[:mid] + "…") <= max_width:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + "…"
+
+
+def _paste_text(image: Image.Image, xy: Tuple[int, int], text: str, size: int, color: str, bold: bool = False) -> int:
+    """文字列を貼り付け、その幅を返す"""
+    glyph = _glyph(text, size, bold, color)
+    # 透過部分をマスクにして貼り付ける (縁のアンチエイリアスは背景と合成される)
+    image.paste(glyph, (int(xy[0]), int(xy[1])), glyph)
+    return glyph.width
+
+
+# --- レイアウト (月ごとの枠) のキャッシュ ---
+
+@dataclass(frozen=True)
+class Layout:
+    cells: Dict[int, Tuple[int, int, int, int]]  # 日 -> (x, y, 幅, 高さ)
+    event_lines: int                             # 1マスに描ける予定の行数
+
+
+@lru_cache(maxsize=128)
+def get_layout(year: int, month: int) -> Layout:
+    weeks = calendar.Calendar(firstweekday=6).monthdayscalendar(year, month)  # 日曜始まり
+    top = MARGIN + TITLE_HEIGHT + WEEKDAY_HEIGHT
+    cell_w = (WIDTH - MARGIN * 2) // 7
+    cell_h = (HEIGHT - MARGIN - top) // len(weeks)
+    cells = {}
+    for row, week in enumerate(weeks):
+        for col, day in enumerate(week):
+            if day:
+                cells[day] = (MARGIN + col * cell_w, top + row * cell_h, cell_w, cell_h)
+    return Layout(cells=cells, event_lines=max(1, (cell_h - DAY_FONT_SIZE - 20) // EVENT_LINE_HEIGHT))
+
+
+def _day_color(design: Design, col: int) -> str:
+    return design.sunday if col == 0 else design.saturday if col == 6 else design.text
+
+
+@lru_cache(maxsize=32)
+def _base_image(design_name: str, group_name: str, year: int, month: int) -> Image.Image:
+    """背景・タイトル・曜日・枠線・日付まで描いた画像 (予定を描く前の状態)"""
+    design = DESIGNS[design_name]
+    layout = get_layout(year, month)
+    image = Image.new("RGB", (WIDTH, HEIGHT), design.background)
+    draw = ImageDraw.Draw(image)
+
+    # タイトル
+    title = f"{year}年{month}月"
+    name = fit_text(group_name, 40, False, WIDTH - MARGIN * 2)
+    for text, size, bold, y in ((title, 80, True, MARGIN), (name, 40, False, MARGIN + 104)):
+        width = _glyph(text, size, bold, design.accent).width
+        x = (WIDTH - width) // 2 if design.align == "center" else MARGIN
+        _paste_text(image, (x, y), text, size, design.accent, bold)
+
+    # 曜日
+    cell_w = (WIDTH - MARGIN * 2) // 7
+    for col, label in enumerate(WEEKDAYS):
+        color = design.sunday if col == 0 else design.saturday if col == 6 else design.accent
+        width = _glyph(label, 30, True, color).width
+        _paste_text(image, (MARGIN + col * cell_w + (cell_w - width) // 2, MARGIN + TITLE_HEIGHT + 8), label, 30, color, True)
+
+    # マスと日付
+    for day, (x, y, w, h) in layout.cells.items():
+        col = (x - MARGIN) // cell_w
+        draw.rectangle((x, y, x + w, y + h), fill=design.cell, outline=design.grid, width=2)
+        _paste_text(image, (x + 10, y + 6), str(day), DAY_FONT_SIZE, _day_color(design, col), True)
+    return image
+
+
+# --- 描画 ---
+
+def render_png(design: Design, group_name: str, year: int, month: int, events: Sequence[CalendarEvent]) -> bytes:
+    """月カレンダーの PNG を描画する"""
+    layout = get_layout(year, month)
+    image = _base_image(design.name, group_name, year, month).copy()
+
+    by_day: Dict[int, List[CalendarEvent]] = {}
+    for event in events:
+        by_day.setdefault(event.day, []).append(event)
+
+    for day, day_events in by_day.items():
+        if day not in layout.cells:
+            continue
+        x, y, w, _ = layout.cells[day]
+        max_width = w - 14
+        shown = day_events if len(day_events) <= layout.event_lines else day_events[:layout.event_lines - 1]
+        line_y = y + DAY_FONT_SIZE + 16
+        for event in shown:
+            text = f"{event.time} {event.title}" if event.time else event.title
+            _paste_text(image, (x + 8, line_y), fit_text(text, EVENT_FONT_SIZE, False, max_width), EVENT_FONT_SIZE, design.event)
+            line_y += EVENT_LINE_HEIGHT
+        if len(shown) < len(day_events):
+            _paste_text(image, (x + 8, line_y), f"+{len(day_events) - len(shown)}件", EVENT_FONT_SIZE, design.text)
+
+    buffer = io.BytesIO()
+    # 描画時間の大半は PNG の圧縮 (同じ内容なら render_cached でディスクから返す)
+    image.save(buffer, "PNG", compress_level=6)
+    return buffer.getvalue()
+
+
+# --- ディスクキャッシュ ---
+
+renders = Counter()
+disk_hits = Counter()
+render_ms = Histogram()
+
+
+def cache_dir() -> Path:
+    path = Path(settings.CALENDAR_IMAGE_CACHE_DIR or Path(tempfile.gettempdir()) / "calendar-images")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def cached_path(digest: str) -> Optional[Path]:
+    """ディスクに保存済みであればそのパスを返す"""
+    path = cache_dir() / f"{digest}.png"
+    return path if path.exists() else None
+
+
+def _store(digest: str, data: bytes) -> Path:
+    directory = cache_dir()
+    path = directory / f"{digest}.png"
+    # 書き込み途中のファイルを返さないよう、一時ファイルに書いてから置き換える
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    _prune(directory)
+    return path
+
+
+def _prune(directory: Path) -> None:
+    """CALENDAR_IMAGE_CACHE_MAX_FILES を超えた分を古いものから削除する"""
+    files = sorted(directory.glob("*.png"), key=lambda p: p.stat().st_mtime)
+    for path in files[:max(0, len(files) - settings.CALENDAR_IMAGE_CACHE_MAX_FILES)]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def render_cached(design: Design, group_name: str, year: int, month: int, events: Sequence[CalendarEvent]) -> Tuple[str, Path]:
+    """
+    内容のハッシュ値と PNG のパスを返す。同じ内容のものがディスクにあれば描画しない
+    """
+    digest = content_hash(design, group_name, year, month, events)
+    path = cached_path(digest)
+    if path is not None:
+        disk_hits.inc()
+        return digest, path
+
+    started = time.perf_counter()
+    data = render_png(design, group_name, year, month, events)
+    render_ms.observe((time.perf_counter() - started) * 1000)
+    renders.inc()
+    return digest, _store(digest, data)
+
+
+def get_stats() -> dict:
+    return {
+        "renders": renders.value,
+        "disk_hits": disk_hits.value,
+        "render_ms": render_ms.snapshot(),
+        "glyph_cache": _glyph.cache_info()._asdict(),
+    }
+
+
+# --- 計測・サンプル出力 ---
+
+def _sample_events(year: int, month: int, count: int, rng: random.Random) -> List[CalendarEvent]:
+    days = calendar.monthrange(year, month)[1]
+    titles = ("練習", "全体練習", "パート練習", "本番リハーサル", "ミーティング", "合宿 (1日目)", "定期演奏会")
+    return sorted(
+        (CalendarEvent(day=rng.randint(1, days), time=rng.choice([None, "10:00", "13:30", "18:00"]), title=rng.choice(titles))
+         for _ in range(count)),
+        key=lambda e: (e.day, e.time or ""),
+    )
+
+
+def _clear_caches() -> None:
+    for cached in (_glyph, fit_text, get_layout, _base_image):
+        cached.cache_clear()
+
+
+def benchmark(months: int, events_per_month: int, design: Design) -> None:
+    rng = random.Random(0)
+    targets = [(2026 + (m // 12), m % 12 + 1) for m in range(months)]
+    samples = [(year, month, _sample_events(year, month, events_per_month, rng)) for year, month in targets]
+
+    def run(label: str, clear: bool) -> None:
+        timings = []
+        for year, month, events in samples:
+            if clear:
+                _clear_caches()
+            started = time.perf_counter()
+            render_png(design, "サンプル吹奏楽団", year, month, events)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"{label:<28} avg={sum(timings) / len(timings):7.1f} ms  p50={timings[len(timings) // 2]:7.1f} ms  max={timings[-1]:7.1f} ms")
+
+    get_font(DAY_FONT_SIZE, True)  # フォントファイルの読み込みは計測に含めない
+    print(f"{months} months x {events_per_month} events, design={design.name}, font={_font_path(False)}")
+    run("cold (キャッシュ無し)", clear=True)
+    run("warm (グリフ・枠のキャッシュ)", clear=False)
+
+    digest = content_hash(design, "サンプル吹奏楽団", *samples[0][:2], samples[0][2])
+    started = time.perf_counter()
+    for _ in range(100):
+        content_hash(design, "サンプル吹奏楽団", *samples[0][:2], samples[0][2])
+        (cache_dir() / f"{digest}.png").exists()
+    print(f"{'disk cache lookup':<28} avg={(time.perf_counter() - started) * 10:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="月カレンダー画像の描画時間の計測・サンプル出力")
+    parser.add_argument("--bench", action="store_true", help="描画時間を計測する")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--events", type=int, default=20, help="1ヶ月あたりの予定の数")
+    parser.add_argument("--design", choices=sorted(DESIGNS), default="standard")
+    parser.add_argument("--out", help="サンプルの PNG を出力するパス")
+    args = parser.parse_args()
+
+    design = DESIGNS[args.design]
+    if args.bench:
+        benchmark(args.months, args.events, design)
+    if args.out:
+        now = datetime.now(JST)
+        events = _sample_events(now.year, now.month, args.events, random.Random(0))
+        Path(args.out).write_bytes(render_png(design, "サンプル吹奏楽団", now.year, now.month, events))
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
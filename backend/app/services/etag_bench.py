@@ -0,0 +1,182 @@
+# backend/app/services/etag_bench.py
+
+"""
+条件付き GET (ETag / 304) の効果を計測する。
+
+    python -m app.services.etag_bench
+    python -m app.services.etag_bench --tasks 300 --requests 200
+    python -m app.services.etag_bench --database-url postgresql+asyncpg://user:pw@localhost:5432/bench_db
+
+API をプロセス内 (TestClient) で動かし、1ヶ月に tasks 件のタスクがあるグループについて、
+タスク一覧・月カレンダー・自分のタスクのそれぞれを次の3通りで requests 回ずつ取得します。
+- 200 (uncached):  If-None-Match 無し、レスポンスのキャッシュも削除してから (毎回検索・シリアライズする)
+- 200 (cached):    If-None-Match 無し、レスポンスのキャッシュあり (タスク一覧はキャッシュしないため uncached と同じ)
+- 304:             前回の ETag を If-None-Match に付けて (データバージョンの確認のみ)
+1リクエストあたりの所要時間と、発行した SQL の数を表示します。
+
+既定ではインメモリの SQLite を使います。--database-url に指定したDBはテーブルを作り直すため、計測専用のものを指定してください。
+"""
+
+import argparse
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core import security
+from app.core.config import settings
+from app.core.etag import etag_matches, make_etag
+
+PASSWORD = "bench-password"
+
+
+def _measure_helpers(iterations: int) -> None:
+    """ETag の生成と If-None-Match の照合そのものの所要時間"""
+    class _Request:
+        headers = {"if-none-match": 'W/"0123", "4567"'}
+
+    request = _Request()
+    parts = ("calendar", str(uuid.uuid4()), 12345, 2026, 3)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        etag_matches(request, make_etag(*parts))
+    per_call_us = (time.perf_counter() - started) / iterations * 1_000_000
+    print(f"{'make_etag + etag_matches':<34} {per_call_us:9.2f} us/call")
+
+
+async def _seed(sessions, tasks: int, today: date) -> Dict[str, str]:
+    """ユーザー1人・グループ1つ・今月のタスク tasks 件 (半分に参加のリアクション) を作る"""
+    from app.modules.group.models import Group, GroupMember
+    from app.modules.task.models import Task, TaskUser_Relation
+    from app.modules.user.models import User
+
+    user_id, group_id = str(uuid.uuid4()), str(uuid.uuid4())
+    email = f"bench-{user_id[:8]}@example.com"
+    first = today.replace(day=1)
+    async with sessions() as db:
+        db.add(User(user_id=user_id, user_name="bench", email=email,
+                    hashed_password=security.get_password_hash(PASSWORD, rounds=4)))
+        db.add(Group(group_id=group_id, group_name="bench"))
+        db.add(GroupMember(user_id=user_id, group_id=group_id, is_representative=True, accepted=True))
+        for i in range(tasks):
+            day = first + timedelta(days=i % 28)
+            begin = datetime(day.year, day.month, day.day, 9 + i % 10)
+            task = Task(
+                task_id=str(uuid.uuid4()), group_id=group_id, title=f"練習 {i}", date=day,
+                time_span_begin=begin, time_span_end=begin + timedelta(hours=2), location="体育館",
+                is_task=i % 3 == 0, join_count=i % 2,
+            )
+            db.add(task)
+            if i % 2:
+                db.add(TaskUser_Relation(task_id=task.task_id, user_id=user_id, reaction="join"))
+        await db.commit()
+    return {"user_id": user_id, "group_id": group_id, "email": email}
+
+
+def benchmark(tasks: int, requests: int, database_url: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+    """
+    計測結果を {エンドポイント: {"200 (uncached)" | "200 (cached)" | "304": {"ms": 平均, "queries": 平均}}} で返す
+    """
+    import main
+    from fastapi.testclient import TestClient
+
+    from app.core import database
+    from app.core.database import Base
+    from app.core.response_cache import response_cache
+
+    if database_url:
+        engine = create_async_engine(database_url)
+    else:
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    async def create_all():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    queries = [0]
+
+    def count_query(*_):
+        queries[0] += 1
+
+    scheduler_in_api = settings.SCHEDULER_IN_API
+    settings.SCHEDULER_IN_API = False
+    main.app.dependency_overrides[database.get_async_db] = get_db
+    results: Dict[str, Dict[str, dict]] = {}
+    try:
+        with TestClient(main.app) as client:
+            today = date.today()
+            client.portal.call(create_all)
+            seeded = client.portal.call(_seed, sessions, tasks, today)
+            token = client.post("/token", data={"username": seeded["email"], "password": PASSWORD}).json()
+            headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+            group_id = seeded["group_id"]
+            month = {"year": today.year, "month": today.month}
+            endpoints = {
+                "tasks": (f"/groups/{group_id}/tasks/", {"limit": 100}),
+                "calendar": (f"/groups/{group_id}/tasks/calendar", month),
+                "my-tasks": ("/my-tasks/", month),
+            }
+            print(f"{tasks} tasks in {today:%Y-%m}, {requests} requests each, database={engine.url.get_backend_name()}")
+
+            event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+            for name, (path, params) in endpoints.items():
+                first = client.get(path, params=params, headers=headers)
+                assert first.status_code == 200, first.text
+                conditional = {**headers, "If-None-Match": first.headers["ETag"]}
+
+                def run(label: str, request_headers: dict, expected: int, before: Optional[Callable] = None):
+                    elapsed = 0.0
+                    queries[0] = 0
+                    for _ in range(requests):
+                        if before:
+                            client.portal.call(before)
+                        started = time.perf_counter()
+                        response = client.get(path, params=params, headers=request_headers)
+                        elapsed += time.perf_counter() - started
+                        assert response.status_code == expected, (label, response.status_code)
+                    ms = elapsed / requests * 1000
+                    per_request = queries[0] / requests
+                    results.setdefault(name, {})[label] = {"ms": ms, "queries": per_request}
+                    print(f"{name + ' ' + label:<34} {ms:9.2f} ms/req  {1000 / ms:8.0f} req/s  {per_request:5.1f} queries/req")
+
+                run("200 (uncached)", headers, 200, lambda: response_cache.invalidate_prefix(""))
+                run("200 (cached)", headers, 200)
+                run("304", conditional, 304)
+                speedup = results[name]["200 (uncached)"]["ms"] / results[name]["304"]["ms"]
+                print(f"{name + ' 304 speedup':<34} {speedup:9.1f}x")
+            event.remove(engine.sync_engine, "before_cursor_execute", count_query)
+            client.portal.call(engine.dispose)
+    finally:
+        main.app.dependency_overrides.pop(database.get_async_db, None)
+        settings.SCHEDULER_IN_API = scheduler_in_api
+
+    _measure_helpers(max(1000, requests * 100))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="条件付き GET (ETag / 304) の効果の計測")
+    parser.add_argument("--tasks", type=int, default=300, help="1ヶ月あたりのタスク数")
+    parser.add_argument("--requests", type=int, default=200, help="エンドポイント・条件ごとのリクエスト数")
+    parser.add_argument("--database-url", help="計測に使うDB (既定: インメモリの SQLite)。テーブルを作り直します")
+    args = parser.parse_args()
+    # bcrypt のプロセスプールを起動しない
+    settings.PASSWORD_HASH_EXECUTOR = "thread"
+    benchmark(args.tasks, args.requests, args.database_url)
+
+
+if __name__ == "__main__":
+    main()
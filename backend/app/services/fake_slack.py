@@ -0,0 +1,177 @@
+# backend/app/services/fake_slack.py
+
+"""
+ローカル開発・動作確認用の疑似 Slack Web API サーバー。
+chat.postMessage を受け取って記録するだけで、実際の Slack には何も送信しません。
+
+単体で起動する場合:
+    python -m app.services.fake_slack --port 8099 --latency-ms 200 --rate-limit 1
+    (.env で SLACK_API_BASE_URL=http://localhost:8099/api/ を指定)
+
+    GET    /messages  受信したメッセージの一覧
+    DELETE /messages  記録を消去
+
+コードから使う場合:
+    async with FakeSlackServer(rate_limit_per_second=1) as fake:
+        async with SlackClientRegistry(base_url=fake.base_url) as clients:
+            queue = SlackDeliveryQueue()
+            ...
+            await queue.deliver(clients)
+        fake.messages  # 受信したメッセージ
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Set
+
+from aiohttp import web
+
+
+class FakeSlackServer:
+    """
+    - latency_ms: 各リクエストの応答を遅らせる (遅い Slack の再現)
+    - rate_limit_per_second: トークンごとに1秒あたりこの件数を超えると 429 + Retry-After を返す (0 = 無制限)
+    - unknown_channels: channel_not_found を返すチャンネル
+    - fail_next: 次のこの件数のリクエストに 500 (一時的な障害) を返す。テスト中に書き換えて使う
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        rate_limit_per_second: int = 0,
+        retry_after_seconds: int = 1,
+        unknown_channels: Optional[Set[str]] = None,
+        fail_next: int = 0,
+    ):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.rate_limit_per_second = rate_limit_per_second
+        self.retry_after_seconds = retry_after_seconds
+        self.unknown_channels = unknown_channels or set()
+        self.fail_next = fail_next
+
+        self.messages: List[dict] = []
+        self.rate_limited_count = 0
+        self._recent: Dict[str, Deque[float]] = defaultdict(deque)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/"
+
+    def _is_rate_limited(self, token: str) -> bool:
+        if not self.rate_limit_per_second:
+            return False
+        now = time.monotonic()
+        recent = self._recent[token]
+        while recent and now - recent[0] >= 1:
+            recent.popleft()
+        if len(recent) >= self.rate_limit_per_second:
+            return True
+        recent.append(now)
+        return False
+
+    async def _post_message(self, request: web.Request) -> web.Response:
+        if request.content_type == "application/json":
+            payload = await request.json()
+        else:
+            payload = dict(await request.post())
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        if not token:
+            return web.json_response({"ok": False, "error": "not_authed"})
+        if self._is_rate_limited(token):
+            self.rate_limited_count += 1
+            return web.json_response(
+                {"ok": False, "error": "ratelimited"},
+                status=429,
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            return web.json_response({"ok": False, "error": "internal_error"}, status=500)
+        channel = payload.get("channel")
+        if channel in self.unknown_channels:
+            return web.json_response({"ok": False, "error": "channel_not_found"})
+
+        self.messages.append({
+            "token": token,
+            "channel": channel,
+            "text": payload.get("text"),
+            "received_at": time.time(),
+        })
+        return web.json_response({
+            "ok": True,
+            "channel": channel,
+            "ts": f"{time.time():.6f}",
+            "message": {"text": payload.get("text")},
+        })
+
+    async def _list_messages(self, request: web.Request) -> web.Response:
+        return web.json_response({"messages": self.messages, "rate_limited": self.rate_limited_count})
+
+    async def _clear_messages(self, request: web.Request) -> web.Response:
+        self.messages.clear()
+        self.rate_limited_count = 0
+        return web.json_response({"ok": True})
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/chat.postMessage", self._post_message)
+        app.router.add_get("/messages", self._list_messages)
+        app.router.add_delete("/messages", self._clear_messages)
+        return app
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # port=0 の場合は空いているポートが割り当てられる
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeSlackServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="疑似 Slack Web API サーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="トークンごとの 1秒あたりの上限 (0 = 無制限)")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--unknown-channel", action="append", default=[], help="channel_not_found を返すチャンネル")
+    args = parser.parse_args()
+
+    server = FakeSlackServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        rate_limit_per_second=args.rate_limit,
+        retry_after_seconds=args.retry_after,
+        unknown_channels=set(args.unknown_channel),
+    )
+    print(f"Fake Slack API: {server.base_url}")
+    web.run_app(server.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
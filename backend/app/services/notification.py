@@ -0,0 +1,315 @@
+# backend/app/services/notification.py
+
+"""
+Slack へのメッセージ一括配信。
+
+リマインダーのように一度に大量のメッセージを送る処理で使用します。
+- 宛先 (トークン, チャンネル) ごとにメッセージをまとめ、1通のダイジェストにする
+- 宛先ごとの送信は並行して行い、遅い宛先が他の宛先を待たせない
+- ワークスペース (トークン) ごとにトークンバケットで送信レートを制限する
+- 429 (rate_limited) は Retry-After の秒数だけ待って再送する
+- 実行ごとに件数・所要時間をまとめた DeliveryReport を返す
+
+使用例:
+    queue = SlackDeliveryQueue()
+    queue.add(token, channel_id, "本文")
+    report = await queue.deliver(slack_client_registry)
+
+送信はレジストリ (app.services.slack_clients) のイベントループ上で行われるため、
+1つのキューを複数のスレッド・チャンクから使っても、レート制限と同時送信数はキュー全体で共有されます。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+from app.services.slack_clients import SlackClientRegistry
+
+logger = logging.getLogger(__name__)
+
+# Slack は 1通あたり 4000 文字程度を推奨しているため、それを超えるダイジェストは分割する
+MAX_MESSAGE_CHARS = 3500
+
+DigestFormatter = Callable[[List[str]], str]
+
+
+class TokenBucket:
+    """
+    非同期のトークンバケット。
+    rate 通/秒 で補充され、最大 capacity 通まで連続して送信できます。
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Retry-After を受け取った時、このワークスペースへの送信をしばらく止める"""
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+@dataclass
+class DeliveryReport:
+    """1回の配信の結果"""
+    destinations: int = 0     # 宛先 (トークン, チャンネル) の数
+    messages: int = 0         # 送信しようとしたメッセージ数 (ダイジェスト分割後)
+    items: int = 0            # まとめる前の通知の件数
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    elapsed_ms: float = 0.0
+    latency_ms: Histogram = field(default_factory=Histogram)
+    errors: List[str] = field(default_factory=list)
+    # 再送上限に達して送れなかった宛先 (トークン, チャンネル)。時間を置けば送れる可能性があるもの
+    undelivered: Set[Tuple[str, str]] = field(default_factory=set)
+
+    def to_dict(self) -> dict:
+        return {
+            "destinations": self.destinations,
+            "messages": self.messages,
+            "items": self.items,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "latency_ms": self.latency_ms.snapshot(),
+            "errors": self.errors[:20],
+            "undelivered": len(self.undelivered),
+        }
+
+
+@dataclass
+class SendResult:
+    """1回の送信の結果"""
+    ok: bool
+    error: Optional[str] = None
+    retryable: bool = False               # 時間を置けば成功する可能性があるか
+    retry_after: Optional[float] = None   # 429 の場合に Slack から指定された待ち時間 (秒)
+    latency_ms: float = 0.0
+
+
+async def post_once(clients: SlackClientRegistry, token: str, channel_id: str, text: str) -> SendResult:
+    """
+    chat.postMessage を1回だけ呼び出し、結果を分類して返す (再送はしない)
+    clients のループ上で呼んでください。結果は clients のワークスペースごとのメトリクスにも記録されます。
+    """
+    result = await _post_once(clients.get(token), channel_id, text)
+    clients.record_send(
+        token,
+        ok=result.ok,
+        latency_ms=result.latency_ms,
+        error=result.error,
+        rate_limited=result.retry_after is not None,
+    )
+    return result
+
+
+async def _post_once(client: AsyncWebClient, channel_id: str, text: str) -> SendResult:
+    started = time.perf_counter()
+    try:
+        await client.chat_postMessage(channel=channel_id, text=text)
+        return SendResult(ok=True, latency_ms=(time.perf_counter() - started) * 1000)
+
+    except SlackApiError as e:
+        latency_ms = (time.perf_counter() - started) * 1000
+        if e.response.status_code == 429:
+            return SendResult(
+                ok=False,
+                error="rate_limited",
+                retryable=True,
+                retry_after=float(e.response.headers.get("Retry-After", 1)),
+                latency_ms=latency_ms,
+            )
+        # channel_not_found / invalid_auth 等は再送しても成功しない (5xx は再送する)
+        return SendResult(
+            ok=False,
+            error=str(e.response.get("error")),
+            retryable=e.response.status_code >= 500,
+            latency_ms=latency_ms,
+        )
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return SendResult(
+            ok=False,
+            error=repr(e),
+            retryable=True,
+            latency_ms=(time.perf_counter() - started) * 1000,
+        )
+
+
+# 直近の配信結果 (/internal/metrics/notifications で参照)
+last_report: Optional[DeliveryReport] = None
+
+
+def default_digest(lines: List[str]) -> str:
+    return "\n\n".join(lines)
+
+
+def split_message(lines: List[str], formatter: DigestFormatter, max_chars: int = MAX_MESSAGE_CHARS) -> List[str]:
+    """1通が max_chars を超えないように、行のまとまりごとに分割してダイジェストを作る"""
+    chunks: List[List[str]] = [[]]
+    size = 0
+    for line in lines:
+        if chunks[-1] and size + len(line) > max_chars:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(line)
+        size += len(line) + 2
+    return [formatter(chunk) for chunk in chunks]
+
+
+class SlackDeliveryQueue:
+    """
+    Slack メッセージを溜めておき、deliver() でまとめて送信するキュー。
+    トークンバケットと同時送信数の制限はキューが持つため、同じ実行 (リマインダーの1回分など) の中では
+    1つのキューを使い回してください。
+    """
+
+    def __init__(
+        self,
+        formatter: DigestFormatter = default_digest,
+        concurrency: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.formatter = formatter
+        self.concurrency = concurrency or settings.SLACK_DELIVERY_CONCURRENCY
+        self.rate_per_second = rate_per_second or settings.SLACK_RATE_PER_SECOND
+        self.burst = burst or settings.SLACK_RATE_BURST
+        self.max_retries = settings.SLACK_MAX_RETRIES if max_retries is None else max_retries
+
+        self._pending: Dict[Tuple[str, str], List[str]] = {}
+        # 以下はレジストリのループ上でのみ使う
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def add(self, token: str, channel_id: str, text: str) -> None:
+        """送信するメッセージを追加する。同じ宛先のものは1通にまとめられます"""
+        if not token or not channel_id:
+            return
+        self._pending.setdefault((token, channel_id), []).append(text)
+
+    def __len__(self) -> int:
+        return sum(len(lines) for lines in self._pending.values())
+
+    def _bucket(self, token: str) -> TokenBucket:
+        if token not in self._buckets:
+            self._buckets[token] = TokenBucket(self.rate_per_second, self.burst)
+        return self._buckets[token]
+
+    async def _post(
+        self, clients: SlackClientRegistry, token: str, channel_id: str, text: str, report: DeliveryReport
+    ) -> bool:
+        """1通を送信する。レート制限・通信エラーは max_retries 回まで再送する"""
+        bucket = self._bucket(token)
+        result = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                report.retries += 1
+
+            await bucket.acquire()
+            result = await post_once(clients, token, channel_id, text)
+            report.latency_ms.observe(result.latency_ms)
+            if result.ok:
+                return True
+            if not result.retryable:
+                report.errors.append(f"{channel_id}: {result.error}")
+                return False
+
+            if result.retry_after is not None:
+                report.rate_limited += 1
+                bucket.pause(result.retry_after)
+            else:
+                await asyncio.sleep(min(2 ** attempt, 30))
+
+        report.errors.append(f"{channel_id}: 再送回数の上限に達しました ({result.error})")
+        report.undelivered.add((token, channel_id))
+        return False
+
+    async def _deliver_destination(
+        self,
+        clients: SlackClientRegistry,
+        token: str,
+        channel_id: str,
+        lines: List[str],
+        report: DeliveryReport,
+    ) -> None:
+        """1つの宛先へのダイジェストを順番に送る (宛先内の順序は保つ)"""
+        for text in split_message(lines, self.formatter):
+            async with self._semaphore:
+                if await self._post(clients, token, channel_id, text, report):
+                    report.sent += 1
+                else:
+                    report.failed += 1
+
+    async def _deliver_all(
+        self, clients: SlackClientRegistry, pending: Dict[Tuple[str, str], List[str]], report: DeliveryReport
+    ) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(
+            self._deliver_destination(clients, token, channel_id, lines, report)
+            for (token, channel_id), lines in pending.items()
+        ))
+
+    async def deliver(
+        self, clients: SlackClientRegistry, messages: Optional[Dict[Tuple[str, str], List[str]]] = None
+    ) -> DeliveryReport:
+        """
+        溜まっているメッセージを全て送信し、結果を返す。
+        messages ((トークン, チャンネル) -> 本文の一覧) を渡した場合は、溜まっているものの代わりにそれを送信します
+        (複数のスレッドから同じキューで並行して配信する場合に、配信ごとの宛先を分けるため)。
+        """
+        global last_report
+
+        if messages is None:
+            pending, self._pending = self._pending, {}
+        else:
+            pending = {dest: lines for dest, lines in messages.items() if dest[0] and dest[1]}
+        report = DeliveryReport(
+            destinations=len(pending),
+            items=sum(len(lines) for lines in pending.values()),
+            messages=sum(len(split_message(lines, self.formatter)) for lines in pending.values()),
+        )
+
+        started = time.perf_counter()
+        if pending:
+            await clients.run(self._deliver_all(clients, pending, report))
+        report.elapsed_ms = (time.perf_counter() - started) * 1000
+
+        last_report = report
+        logger.info(
+            "Slack delivery finished: %d items -> %d messages to %d destinations, "
+            "sent=%d failed=%d retries=%d rate_limited=%d in %.0f ms",
+            report.items, report.messages, report.destinations,
+            report.sent, report.failed, report.retries, report.rate_limited, report.elapsed_ms,
+        )
+        return report
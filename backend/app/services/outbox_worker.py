@@ -0,0 +1,320 @@
+# backend/app/services/outbox_worker.py
+
+"""
+Slack通知の送信箱 (SlackOutbox) を送信するワーカー。API とは別プロセスで起動します。
+
+    python -m app.services.outbox_worker          # 常駐して送信し続ける
+    python -m app.services.outbox_worker --once   # 送信待ちを1回だけ処理して終了
+
+- 送信待ちの行を SELECT ... FOR UPDATE SKIP LOCKED で取り出すため、複数台で起動しても同じ通知を取り合いません
+- 取り出した行はリース (OUTBOX_LEASE_SECONDS) の間だけ他のワーカーから見えなくなり、
+  結果を書き込む前にワーカーが落ちた場合はリース切れ後に再送されます (少なくとも1回の配信)
+- 失敗時は指数バックオフで再送し、OUTBOX_MAX_ATTEMPTS 回を超えたもの・宛先が不正なものは dead にします
+- 同じ宛先 (グループの連携先) 宛ての通知は登録順に送信し、宛先どうしは並行して送信します。
+  前の通知が再送待ちの間は、同じグループの後の通知は取り出しません (後から登録されたものも含む)
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import signal
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.modules.chat.models import SlackOutbox, OUTBOX_PENDING, OUTBOX_SENT, OUTBOX_DEAD
+from app.modules.group.models import Group
+from app.services.notification import SendResult, TokenBucket, post_once
+from app.services.slack_clients import SlackClientRegistry
+
+logger = logging.getLogger(__name__)
+
+# 同じ宛先の前の通知が再送待ちになったため、送信せずに次回へ回したもの
+DEFERRED = "deferred"
+
+# ワークスペースごとの送信メトリクスをログに出す間隔
+STATS_LOG_INTERVAL_SECONDS = 300
+
+
+@dataclass
+class DrainReport:
+    """1回の取り出し・送信の結果"""
+    claimed: int = 0
+    sent: int = 0
+    retried: int = 0
+    dead: int = 0
+    elapsed_ms: float = 0.0
+
+
+def backoff_seconds(attempts: int) -> float:
+    """attempts 回目の失敗の後、次の送信までの待ち時間 (±20% のゆらぎ付き)"""
+    delay = min(
+        settings.OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)),
+        settings.OUTBOX_BACKOFF_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        base_url: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.base_url = base_url or settings.SLACK_API_BASE_URL
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.concurrency = settings.SLACK_DELIVERY_CONCURRENCY
+
+        # トークンごとのクライアント (keep-alive の接続を共有し、アイドル状態のものは破棄される)
+        self.clients = SlackClientRegistry(base_url=self.base_url)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._last_stats_log = time.monotonic()
+
+    async def __aenter__(self) -> "OutboxWorker":
+        await self.clients.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._log_workspace_stats()
+        await self.clients.__aexit__(*exc)
+
+    def _log_workspace_stats(self) -> None:
+        """ワークスペースごとの送信件数・エラー数・平均レイテンシをログに出す"""
+        self._last_stats_log = time.monotonic()
+        for key, stats in self.clients.workspace_stats().items():
+            logger.info(
+                "Slack workspace %s: sends=%d errors=%d rate_limited=%d avg_latency=%.0fms last_error=%s",
+                key, stats["sends"], stats["errors"], stats["rate_limited"],
+                stats["latency_ms"]["avg"], stats["last_error"],
+            )
+
+    def _bucket(self, token: str) -> TokenBucket:
+        if token not in self._buckets:
+            self._buckets[token] = TokenBucket(settings.SLACK_RATE_PER_SECOND, settings.SLACK_RATE_BURST)
+        return self._buckets[token]
+
+    async def _claim(self) -> list:
+        """送信期限の来た行を取り出し、リース期間だけ他のワーカーから見えなくする"""
+        now = datetime.now(timezone.utc)
+        # 同じグループに、登録順で前の通知が再送待ち (またはリース中) で残っていれば、後の通知は取り出さない
+        earlier = aliased(SlackOutbox)
+        waiting_for_earlier = exists().where(
+            earlier.group_id == SlackOutbox.group_id,
+            earlier.status == OUTBOX_PENDING,
+            earlier.next_attempt_at > now,
+            or_(
+                earlier.created_at < SlackOutbox.created_at,
+                and_(earlier.created_at == SlackOutbox.created_at, earlier.outbox_id < SlackOutbox.outbox_id),
+            ),
+        )
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(
+                    SlackOutbox.outbox_id,
+                    SlackOutbox.text,
+                    SlackOutbox.attempts,
+                    Group.slack_bot_token,
+                    Group.slack_channel_id
+                )
+                .join(Group, SlackOutbox.group_id == Group.group_id)
+                .where(
+                    SlackOutbox.status == OUTBOX_PENDING,
+                    SlackOutbox.next_attempt_at <= now,
+                    ~waiting_for_earlier
+                )
+                # 登録順に取り出す (再送の方が再送予定時刻が遅くても、同じグループの後の通知より先に送る)
+                .order_by(SlackOutbox.created_at, SlackOutbox.outbox_id)
+                .limit(self.batch_size)
+                .with_for_update(of=SlackOutbox, skip_locked=True)
+            )).all()
+
+            if rows:
+                await db.execute(
+                    update(SlackOutbox)
+                    .where(SlackOutbox.outbox_id.in_([row.outbox_id for row in rows]))
+                    .values(
+                        attempts=SlackOutbox.attempts + 1,
+                        next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+        return rows
+
+    async def _send_destination(
+        self,
+        semaphore: asyncio.Semaphore,
+        token: str,
+        channel_id: str,
+        rows: list,
+        results: Dict[str, SendResult],
+        deferred: Dict[str, str],
+    ) -> None:
+        """
+        1つの宛先への通知を登録順に送る
+        再送待ちになった通知があれば、残りは送らずに deferred (残りの outbox_id -> 再送待ちの outbox_id) に記録する
+        """
+        bucket = self._bucket(token)
+        for i, row in enumerate(rows):
+            async with semaphore:
+                await bucket.acquire()
+                result = await post_once(self.clients, token, channel_id, row.text)
+            results[row.outbox_id] = result
+            if result.retry_after is not None:
+                bucket.pause(result.retry_after)
+            if not result.ok and result.retryable:
+                # 順序を保つため、この宛先の残りは次回に回す
+                for rest in rows[i + 1:]:
+                    results[rest.outbox_id] = SendResult(ok=False, error=DEFERRED, retryable=True, retry_after=result.retry_after)
+                    deferred[rest.outbox_id] = row.outbox_id
+                return
+
+    def _result_values(self, row, result: SendResult, now: datetime, not_before: Optional[datetime] = None) -> dict:
+        """
+        送信結果から、行に書き込む値を決める
+        not_before: 次回に回した通知の場合、前の (再送待ちになった) 通知の再送予定時刻。これより前には送らない
+        """
+        attempts = row.attempts + 1
+        if result.ok:
+            return {"outbox_id": row.outbox_id, "status": OUTBOX_SENT, "sent_at": now, "last_error": None}
+
+        if result.error == DEFERRED:
+            # 送信していないので試行回数を戻す
+            next_attempt_at = now + timedelta(seconds=result.retry_after or 0)
+            if not_before is not None:
+                next_attempt_at = max(next_attempt_at, not_before)
+            return {
+                "outbox_id": row.outbox_id,
+                "status": OUTBOX_PENDING,
+                "attempts": row.attempts,
+                "next_attempt_at": next_attempt_at,
+            }
+
+        if not result.retryable or attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            return {"outbox_id": row.outbox_id, "status": OUTBOX_DEAD, "last_error": result.error}
+
+        delay = backoff_seconds(attempts)
+        if result.retry_after is not None:
+            delay = max(delay, result.retry_after)
+        return {
+            "outbox_id": row.outbox_id,
+            "status": OUTBOX_PENDING,
+            "next_attempt_at": now + timedelta(seconds=delay),
+            "last_error": result.error,
+        }
+
+    async def drain_once(self) -> DrainReport:
+        """送信待ちを最大 batch_size 件取り出して送信し、結果を書き込む"""
+        started = time.perf_counter()
+        report = DrainReport()
+
+        rows = await self._claim()
+        report.claimed = len(rows)
+        if not rows:
+            return report
+
+        results: Dict[str, SendResult] = {}
+        deferred: Dict[str, str] = {}
+        destinations: Dict[Tuple[str, str], List] = {}
+        for row in rows:
+            if not row.slack_bot_token or not row.slack_channel_id:
+                # 登録後に Slack 連携が解除された
+                results[row.outbox_id] = SendResult(ok=False, error="slack_not_connected")
+                continue
+            destinations.setdefault((row.slack_bot_token, row.slack_channel_id), []).append(row)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(
+            self._send_destination(semaphore, token, channel_id, dest_rows, results, deferred)
+            for (token, channel_id), dest_rows in destinations.items()
+        ))
+
+        now = datetime.now(timezone.utc)
+        by_id: Dict[str, dict] = {}
+        for row in rows:
+            if row.outbox_id not in deferred:
+                by_id[row.outbox_id] = self._result_values(row, results[row.outbox_id], now)
+        for row in rows:
+            if row.outbox_id in deferred:
+                # 前の通知より先に送られないよう、前の通知の再送予定時刻まで待たせる (前の通知が dead なら待たない)
+                blocker = by_id[deferred[row.outbox_id]]
+                not_before = blocker["next_attempt_at"] if blocker["status"] == OUTBOX_PENDING else None
+                by_id[row.outbox_id] = self._result_values(row, results[row.outbox_id], now, not_before)
+        values = [by_id[row.outbox_id] for row in rows]
+        async with self.session_factory() as db:
+            # 主キーを含む dict のリストによる一括 UPDATE
+            await db.execute(update(SlackOutbox), values)
+            await db.commit()
+
+        for v in values:
+            if v["status"] == OUTBOX_SENT:
+                report.sent += 1
+            elif v["status"] == OUTBOX_DEAD:
+                report.dead += 1
+                logger.warning("Outbox %s is dead: %s", v["outbox_id"], v["last_error"])
+            else:
+                report.retried += 1
+
+        report.elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "Outbox drained: claimed=%d sent=%d retried=%d dead=%d in %.0f ms",
+            report.claimed, report.sent, report.retried, report.dead, report.elapsed_ms,
+        )
+        return report
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """stop がセットされるまで送信し続ける"""
+        while not stop.is_set():
+            try:
+                report = await self.drain_once()
+            except Exception:
+                logger.exception("Outbox drain failed")
+                report = DrainReport()
+
+            if time.monotonic() - self._last_stats_log >= STATS_LOG_INTERVAL_SECONDS:
+                self._log_workspace_stats()
+
+            # 取り出し上限まで溜まっていた場合はすぐに次を処理する
+            if report.claimed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.OUTBOX_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _main(once: bool) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with OutboxWorker() as worker:
+        if once:
+            await worker.drain_once()
+        else:
+            logger.info("Outbox worker started")
+            await worker.run(stop)
+            logger.info("Outbox worker stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slack通知の送信箱を送信するワーカー")
+    parser.add_argument("--once", action="store_true", help="送信待ちを1回だけ処理して終了する")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(_main(args.once))
+
+
+if __name__ == "__main__":
+    main()
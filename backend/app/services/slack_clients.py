@@ -0,0 +1,244 @@
+# backend/app/services/slack_clients.py
+
+"""
+ワークスペース (Botトークン) ごとの Slack クライアントの使い回しと、送信メトリクス。
+
+- SlackClientRegistry は1つの aiohttp セッション (keep-alive の接続プール) を共有し、
+  トークンごとの AsyncWebClient をキャッシュします。送信の度に接続・TLS を張り直しません
+- 一定時間使われていないクライアントは破棄し、Slack 連携が解除されたトークンは forget_token() で即座に破棄します
+- 送信件数・エラー・レイテンシをワークスペースごとに記録し、/internal/metrics/slack から参照できます
+
+API・スケジューラーのプロセスでは、起動時に start() したプロセス共通の slack_client_registry を使います。
+このレジストリは専用のイベントループ (スレッド) 上でセッションを持ち、他のループやスレッドからの送信は
+run() / run_sync() でそのループに渡して実行します (aiohttp のセッションは作成したループでしか使えないため)。
+送信ワーカーやテストのように1つのループで完結する場合は、async with で開いたレジストリを使います。
+
+トークンそのものはキーやメトリクスに残さず、ハッシュ値 (token_key) で識別します。
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+import aiohttp
+from slack_sdk.web.async_client import AsyncWebClient
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+
+# 生存中のレジストリ (forget_token で全てから破棄するため)
+_registries: "weakref.WeakSet[SlackClientRegistry]" = weakref.WeakSet()
+
+
+def token_key(token: str) -> str:
+    """トークンを識別するためのハッシュ値 (ログやメトリクスにトークンを残さない)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+# --- ワークスペースごとのメトリクス ---
+
+class WorkspaceStats:
+    def __init__(self):
+        self.sends = Counter()
+        self.errors = Counter()
+        self.rate_limited = Counter()
+        self.latency_ms = Histogram()
+        self.last_error: Optional[str] = None
+        self.last_used_at: Optional[float] = None
+
+    def snapshot(self) -> dict:
+        return {
+            "sends": self.sends.value,
+            "errors": self.errors.value,
+            "rate_limited": self.rate_limited.value,
+            "latency_ms": self.latency_ms.snapshot(),
+            "last_error": self.last_error,
+            "last_used_at": self.last_used_at,
+        }
+
+
+# --- クライアントのレジストリ ---
+
+class SlackClientRegistry:
+    """
+    トークンごとの AsyncWebClient を1つの aiohttp セッション上で使い回す。
+
+        async with SlackClientRegistry() as clients:
+            result = await post_once(clients, token, channel_id, text)
+
+    プロセス共通のレジストリは start() で専用のイベントループを起動し、stop() で閉じます。
+        slack_client_registry.start()
+        await slack_client_registry.run(queue.deliver(slack_client_registry))   # 他のイベントループから
+        slack_client_registry.run_sync(queue.deliver(slack_client_registry))    # イベントループの無いスレッドから
+    """
+
+    def __init__(self, base_url: Optional[str] = None, idle_seconds: Optional[float] = None):
+        self.base_url = base_url or settings.SLACK_API_BASE_URL
+        self.idle_seconds = settings.SLACK_CLIENT_IDLE_SECONDS if idle_seconds is None else idle_seconds
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # クライアントの一覧はレジストリのループから、破棄 (forget_token) は他のスレッドからも触るためロックする
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Tuple[AsyncWebClient, float]] = {}
+        self._last_sweep = time.monotonic()
+        self._stats: Dict[str, WorkspaceStats] = {}
+        _registries.add(self)
+
+    # --- セッションの開始・終了 ---
+
+    async def _open(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=settings.SLACK_HTTP_POOL_SIZE,
+                keepalive_timeout=60,
+            )
+        )
+
+    async def _close(self) -> None:
+        with self._lock:
+            self._clients.clear()
+        if self._session:
+            await self._session.close()
+            self._session = None
+        self._loop = None
+
+    async def __aenter__(self) -> "SlackClientRegistry":
+        await self._open()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._close()
+
+    def start(self) -> None:
+        """専用のイベントループ (デーモンスレッド) を起動し、その上でセッションを開く"""
+        if self._thread is not None:
+            return
+        loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=loop.run_forever, name="slack-io", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+
+    def stop(self, timeout: float = 10) -> None:
+        """start() で起動したループのセッションを閉じてループを止める"""
+        if self._thread is None:
+            return
+        loop = self._loop
+        asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout)
+        loop.close()
+        self._thread = None
+
+    # --- レジストリのループでの実行 ---
+
+    def submit(self, coro: Awaitable[Any]) -> "concurrent.futures.Future[Any]":
+        """コルーチンをレジストリのループで実行し、その Future を返す"""
+        if self._loop is None:
+            coro.close()
+            raise RuntimeError("SlackClientRegistry が開始されていません (start() または async with で開いてください)")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def run(self, coro: Awaitable[Any]) -> Any:
+        """コルーチンをレジストリのループで実行して結果を待つ (同じループからの呼び出しはそのまま実行する)"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def run_sync(self, coro: Awaitable[Any]) -> Any:
+        """イベントループの無いスレッド (スケジューラーのジョブ等) から、完了まで待って結果を返す"""
+        return self.submit(coro).result()
+
+    # --- クライアント ---
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get(self, token: str) -> AsyncWebClient:
+        """トークンに対応するクライアントを返す (無ければ作成する)。レジストリのループ上で呼んでください"""
+        if self._session is None:
+            raise RuntimeError("SlackClientRegistry が開始されていません (start() または async with で開いてください)")
+
+        now = time.monotonic()
+        if now - self._last_sweep > 60:
+            self.evict_idle(now)
+
+        key = token_key(token)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                client = AsyncWebClient(
+                    token=token,
+                    base_url=self.base_url,
+                    session=self._session,
+                    timeout=settings.SLACK_REQUEST_TIMEOUT_SECONDS,
+                )
+            else:
+                client = entry[0]
+            self._clients[key] = (client, now)
+        return client
+
+    def evict(self, token: str) -> None:
+        with self._lock:
+            self._clients.pop(token_key(token), None)
+            self._stats.pop(token_key(token), None)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """idle_seconds 以上使われていないクライアントを破棄し、その数を返す"""
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        with self._lock:
+            idle = [key for key, (_, used_at) in self._clients.items() if now - used_at >= self.idle_seconds]
+            for key in idle:
+                del self._clients[key]
+        return len(idle)
+
+    # --- メトリクス ---
+
+    def record_send(
+        self, token: str, ok: bool, latency_ms: float, error: Optional[str] = None, rate_limited: bool = False
+    ) -> None:
+        """1回の送信結果をワークスペースのメトリクスに記録する"""
+        key = token_key(token)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = WorkspaceStats()
+        stats.sends.inc()
+        stats.latency_ms.observe(latency_ms)
+        stats.last_used_at = time.time()
+        if not ok:
+            stats.errors.inc()
+            stats.last_error = error
+        if rate_limited:
+            stats.rate_limited.inc()
+
+    def workspace_stats(self) -> dict:
+        with self._lock:
+            items = list(self._stats.items())
+        return {key: stats.snapshot() for key, stats in items}
+
+
+# API・スケジューラーのプロセスで共有するレジストリ (main.py の lifespan / スケジューラーの起動時に start する)
+slack_client_registry = SlackClientRegistry()
+
+
+def forget_token(token: Optional[str]) -> None:
+    """
+    Slack 連携が解除されたトークンのクライアントとメトリクスを破棄する。
+    (同じプロセス内のレジストリのみ。別プロセスの送信ワーカーではアイドル時間経過で破棄されます)
+    """
+    if not token:
+        return
+    for registry in list(_registries):
+        registry.evict(token)
@@ -3,7 +3,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # スケジューラ―を追加
+from app.core.config import settings
+from app.core.password_hasher import password_hasher
 from app.core.scheduler import start_scheduler
+from app.services.slack_clients import slack_client_registry
 
 # ルーター（APIエンドポイントの集合）のインポート
 from app.modules.user.api import router as user_router
@@ -11,19 +14,27 @@ from app.modules.group.api import router as group_router
 from app.modules.task.api import router as group_task_router
 from app.modules.task.api import me_router as my_task_router
 from app.modules.chat.api import router as chat_router
+from app.modules.internal.api import router as internal_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 起動時
-    start_scheduler()
+    # 起動時 (スケジューラー専用プロセスを使う場合は SCHEDULER_IN_API=false)
+    # Slack のクライアント (接続プール) はプロセスで1つだけ作り、スケジューラー等で共有する
+    slack_client_registry.start()
+    scheduler = start_scheduler() if settings.SCHEDULER_IN_API else None
     yield
-    # 終了時 (何もしない)
+    # 終了時
+    if scheduler:
+        scheduler.shutdown(wait=False)
+    slack_client_registry.stop()
+    password_hasher.shutdown()
 
 # --- FastAPIアプリの初期化 ---
 app = FastAPI(
     title="My Project API",
     description="React + FastAPI + PostgreSQL Application",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # --- CORS (Cross-Origin Resource Sharing) の設定 ---
@@ -40,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,      # Cookie等の信用情報の送信を許可
     allow_methods=["*"],         # 許可するHTTPメソッド (GET, POST, PUT, DELETEなど全て)
     allow_headers=["*"],         # 許可するHTTPヘッダー
+    expose_headers=["X-Next-Cursor", "ETag"],  # ブラウザのJSから読めるようにするレスポンスヘッダー
 )
 
 # --- ルーターの統合 ---
@@ -49,6 +61,7 @@ app.include_router(group_router)
 app.include_router(group_task_router)
 app.include_router(my_task_router)
 app.include_router(chat_router)
+app.include_router(internal_router)
 
 # --- ヘルスチェック用エンドポイント ---
 # サーバーが動いているか確認するための簡易URL (http://localhost:8000/)
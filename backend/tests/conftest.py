@@ -0,0 +1,128 @@
+# backend/tests/conftest.py
+
+"""
+テスト共通の設定。
+
+    cd backend && python -m pytest -q
+
+- 非同期のテストは anyio の pytest プラグイン (@pytest.mark.anyio) で実行します
+- sqlite_sessions: インメモリの SQLite にテーブルを作成したセッションファクトリ
+- pg_sessions:     Postgres 固有の動作 (ON CONFLICT・行ロック・EXPLAIN) を確認するテスト用。
+                   TEST_DATABASE_URL (例: postgresql+asyncpg://postgres:pw@localhost:5432/test_db) が
+                   未設定の場合はスキップします。テストの度にスキーマを作り直すため、専用のDBを指定してください
+- pg_sync_sessions: 同じDBへの同期セッション (スケジューラーのジョブ用、psycopg2)
+- api:             SQLite を使う API の TestClient (同期のテスト用)。DBの直接の操作は api.run(async 関数) で行います
+"""
+
+import os
+from dataclasses import dataclass
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import Base
+from app.core.password_hasher import password_hasher
+
+# モデルを metadata に登録する (alembic/env.py と同じ)
+from app.modules.user import models as user_models  # noqa: F401
+from app.modules.group import models as group_models  # noqa: F401
+from app.modules.task import models as task_models  # noqa: F401
+from app.modules.chat import models as chat_models  # noqa: F401
+from app.modules.scheduler import models as scheduler_models  # noqa: F401
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def sqlite_sessions():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def pg_engine():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL が未設定のため Postgres のテストを省略します")
+    engine = create_async_engine(url, pool_size=20, max_overflow=20)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def pg_sessions(pg_engine):
+    return async_sessionmaker(pg_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+
+@pytest.fixture
+def pg_sync_sessions(pg_engine):
+    engine = create_engine(pg_engine.url.set(drivername="postgresql+psycopg2"))
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+
+@dataclass
+class Api:
+    client: TestClient
+    sessions: async_sessionmaker
+
+    def run(self, fn, *args):
+        """API と同じイベントループで async 関数を実行する"""
+        return self.client.portal.call(fn, *args)
+
+    def login(self, email: str, password: str = "password") -> dict:
+        response = self.client.post("/token", data={"username": email, "password": password})
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def signup_and_login(self, name: str) -> dict:
+        email = f"{name}@example.com"
+        response = self.client.post("/signup", json={"user_name": name, "email": email, "password": "password"})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {self.login(email)['access_token']}"}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    import main
+
+    monkeypatch.setattr(settings, "SCHEDULER_IN_API", False)
+    monkeypatch.setattr(password_hasher, "kind", "thread")
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    async def create_all():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    main.app.dependency_overrides[database.get_async_db] = get_db
+    try:
+        with TestClient(main.app) as client:
+            client.portal.call(create_all)
+            yield Api(client, sessions)
+            client.portal.call(engine.dispose)
+    finally:
+        main.app.dependency_overrides.clear()
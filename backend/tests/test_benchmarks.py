@@ -0,0 +1,29 @@
+# backend/tests/test_benchmarks.py
+
+"""計測用スクリプトが動き続けることの確認 (小さいパラメータで実行するだけで、速度は検証しない)"""
+
+from app.core.config import settings
+from app.core.password_hasher import password_hasher
+from app.services import auth_bench, calendar_image, etag_bench
+
+
+def test_etag_bench_runs(monkeypatch):
+    monkeypatch.setattr(password_hasher, "kind", "thread")
+    results = etag_bench.benchmark(tasks=20, requests=3)
+    assert set(results) == {"tasks", "calendar", "my-tasks"}
+    for name, result in results.items():
+        # 304 はデータバージョンの確認だけで返し、タスクを検索しない
+        assert result["304"]["queries"] < result["200 (uncached)"]["queries"], name
+
+
+def test_calendar_image_bench_runs(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(settings, "CALENDAR_IMAGE_CACHE_DIR", str(tmp_path))
+    calendar_image.benchmark(months=2, events_per_month=3, design=calendar_image.DESIGNS["standard"])
+    out = capsys.readouterr().out
+    assert "cold" in out and "warm" in out and "disk cache lookup" in out
+
+
+def test_auth_bench_runs(capsys):
+    auth_bench.benchmark(iterations=50)
+    out = capsys.readouterr().out
+    assert "decode_access_token (cached)" in out and "per-request auth speedup" in out
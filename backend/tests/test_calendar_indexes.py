@@ -0,0 +1,116 @@
+# backend/tests/test_calendar_indexes.py
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from app.modules.group.models import Group
+from app.modules.task import crud
+from app.modules.task.models import Task, TaskUser_Relation
+from app.modules.user.models import User
+
+pytestmark = pytest.mark.anyio
+
+GROUPS = 50
+TASKS_PER_GROUP = 200
+USERS = 200
+RELATIONS_PER_USER = 50
+
+
+async def _seed_tasks(pg_sessions) -> None:
+    """1年分に散らばったタスクを複数のグループに用意する"""
+    start = date(2026, 1, 1)
+    async with pg_sessions() as db:
+        await db.execute(insert(Group), [{"group_id": f"g{g:02d}", "group_name": f"g{g}"} for g in range(GROUPS)])
+        await db.execute(insert(Task), [
+            {
+                "task_id": f"t{g:02d}-{i:03d}",
+                "group_id": f"g{g:02d}",
+                "title": "task",
+                "date": start + timedelta(days=(i * 7 + g) % 365),
+            }
+            for g in range(GROUPS)
+            for i in range(TASKS_PER_GROUP)
+        ])
+        await db.commit()
+
+
+async def _analyze(pg_engine, *tables: str) -> None:
+    async with pg_engine.connect() as conn:
+        for table in tables:
+            await conn.execute(text(f"ANALYZE {table}"))
+
+
+async def _explain(pg_engine, statement: str, parameters) -> str:
+    async with pg_engine.connect() as conn:
+        return "\n".join(row[0] for row in await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters))
+
+
+class _Capture:
+    """条件に合う SQL (実際に発行されたもの) を捕まえる"""
+
+    def __init__(self, pg_engine, *fragments: str):
+        self.engine = pg_engine.sync_engine
+        self.fragments = fragments
+        self.statements = []
+
+    def _listen(self, conn, cursor, statement, parameters, context, executemany):
+        if all(fragment in statement for fragment in self.fragments):
+            self.statements.append((statement, parameters))
+
+    def __enter__(self) -> "_Capture":
+        event.listen(self.engine, "before_cursor_execute", self._listen)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._listen)
+
+
+async def test_month_range_query_uses_group_date_index(pg_engine, pg_sessions):
+    await _seed_tasks(pg_sessions)
+    await _analyze(pg_engine, "tasks")
+
+    # get_calendar_tasks が実際に発行する月の範囲検索の SQL を捕まえて EXPLAIN する
+    with _Capture(pg_engine, "FROM tasks", "tasks.date >=") as capture:
+        async with pg_sessions() as db:
+            tasks = await crud.get_calendar_tasks(db, "g07", 2026, 3)
+    assert tasks
+    assert capture.statements
+
+    plan = await _explain(pg_engine, *capture.statements[0])
+    assert "ix_tasks_group_id_date" in plan, plan
+    assert "Seq Scan on tasks" not in plan, plan
+
+
+async def test_my_tasks_query_uses_user_task_index(pg_engine, pg_sessions):
+    await _seed_tasks(pg_sessions)
+    # 各ユーザーが全グループのタスクに散らばって参加している
+    async with pg_sessions() as db:
+        await db.execute(insert(User), [
+            {"user_id": f"u{u:03d}", "user_name": f"u{u}", "email": f"u{u}@example.com", "hashed_password": "x"}
+            for u in range(USERS)
+        ])
+        await db.execute(insert(TaskUser_Relation), [
+            {
+                "relation_id": f"r{u:03d}-{i:02d}",
+                "task_id": f"t{(u + i) % GROUPS:02d}-{(u * 7 + i * 13) % TASKS_PER_GROUP:03d}",
+                "user_id": f"u{u:03d}",
+                "reaction": "join",
+            }
+            for u in range(USERS)
+            for i in range(RELATIONS_PER_USER)
+        ])
+        await db.commit()
+    await _analyze(pg_engine, "tasks", "task_user_relations")
+
+    # get_my_global_tasks が実際に発行する SQL を捕まえて EXPLAIN する
+    with _Capture(pg_engine, "FROM tasks", "task_user_relations.user_id =") as capture:
+        async with pg_sessions() as db:
+            await crud.get_my_global_tasks(db, "u042", 2026, 3)
+    assert capture.statements
+
+    plan = await _explain(pg_engine, *capture.statements[0])
+    assert "ix_task_user_relations_user_id_task_id" in plan, plan
+    assert "Seq Scan on task_user_relations" not in plan, plan
+    assert "Seq Scan on tasks" not in plan, plan
@@ -0,0 +1,92 @@
+# backend/tests/test_ics_feed.py
+
+from datetime import date
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.modules.user.models import User
+
+
+def _feed_path(api, url_path: str, headers: dict) -> str:
+    response = api.client.get(url_path, headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["expires_at"]
+    return body["url"].split("testserver", 1)[1]
+
+
+def _create_group(api, headers: dict) -> str:
+    response = api.client.post("/groups/", json={"group_name": "feed"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["group_id"]
+
+
+def test_logout_and_regenerate_invalidate_cached_feeds(api):
+    headers = api.signup_and_login("feed-owner")
+    group_id = _create_group(api, headers)
+    my_feed = _feed_path(api, "/my-tasks/feed-url", headers)
+    group_feed = _feed_path(api, f"/groups/{group_id}/tasks/feed-url", headers)
+
+    # 1回目で組み立てたフィードがキャッシュに入る
+    for path in (my_feed, group_feed):
+        assert api.client.get(path).status_code == 200
+        assert api.client.get(path).status_code == 200
+
+    # URL を再発行すると、キャッシュにあっても古い URL は使えない
+    response = api.client.post("/my-tasks/feed-url/regenerate", headers=headers)
+    assert response.status_code == 200, response.text
+    new_feed = response.json()["url"].split("testserver", 1)[1]
+    assert api.client.get(my_feed).status_code == 404
+    assert api.client.get(group_feed).status_code == 404
+    assert api.client.get(new_feed).status_code == 200
+
+    # ログアウトでも使えなくなる
+    assert api.client.post("/logout", headers=headers).status_code == 200
+    assert api.client.get(new_feed).status_code == 404
+
+
+def test_frozen_user_cannot_read_cached_feed(api):
+    headers = api.signup_and_login("feed-frozen")
+    my_feed = _feed_path(api, "/my-tasks/feed-url", headers)
+    assert api.client.get(my_feed).status_code == 200
+
+    async def freeze():
+        async with api.sessions() as db:
+            await db.execute(update(User).where(User.email == "feed-frozen@example.com").values(is_active=False))
+            await db.commit()
+
+    api.run(freeze)
+    assert api.client.get(my_feed).status_code == 404
+
+
+def test_expired_feed_token_is_rejected(api, monkeypatch):
+    headers = api.signup_and_login("feed-expired")
+    monkeypatch.setattr(settings, "ICS_FEED_TOKEN_EXPIRE_DAYS", -1)
+    my_feed = _feed_path(api, "/my-tasks/feed-url", headers)
+    assert api.client.get(my_feed).status_code == 404
+
+
+def test_deleting_group_removes_its_tasks_from_personal_feed(api):
+    headers = api.signup_and_login("feed-deleted-group")
+    group_id = _create_group(api, headers)
+    today = date.today()
+    response = api.client.post(
+        f"/groups/{group_id}/tasks/",
+        json={"title": "解散前の練習", "date": today.isoformat(), "status": "todo"},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    task_id = response.json()["task_id"]
+    response = api.client.put(f"/groups/{group_id}/tasks/{task_id}/reaction", json={"reaction": "join"}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    # 月ごとの VEVENT と組み立て済みのフィード、自分のタスクがキャッシュに入る
+    my_feed = _feed_path(api, "/my-tasks/feed-url", headers)
+    month = {"year": today.year, "month": today.month}
+    assert "解散前の練習" in api.client.get(my_feed).text
+    assert [t["title"] for t in api.client.get("/my-tasks/", params=month, headers=headers).json()] == ["解散前の練習"]
+
+    assert api.client.delete(f"/groups/{group_id}", headers=headers).status_code == 204
+    assert "解散前の練習" not in api.client.get(my_feed).text
+    assert api.client.get("/my-tasks/", params=month, headers=headers).json() == []
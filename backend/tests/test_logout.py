@@ -0,0 +1,50 @@
+# backend/tests/test_logout.py
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core import security
+from app.modules.user import tokens
+from app.modules.user.models import RevokedToken, User
+from app.modules.user.revocation import token_key
+
+
+async def _revocations(sessions, key: str) -> int:
+    async with sessions() as db:
+        return await db.scalar(
+            select(func.count()).select_from(RevokedToken).where(RevokedToken.revocation_key == key)
+        )
+
+
+def test_repeated_logout_records_one_revocation(api):
+    headers = api.signup_and_login("logout-twice")
+    payload = security.decode_access_token(headers["Authorization"].split(" ", 1)[1])
+
+    async def logout():
+        async with api.sessions() as db:
+            await tokens.logout(db, payload)
+
+    # 2回目 (再送など) も失敗せず、失効情報は1件だけ
+    api.run(logout)
+    api.run(logout)
+    assert api.run(_revocations, api.sessions, token_key(payload["jti"])) == 1
+    assert api.client.post("/logout", headers=headers).status_code == 401
+
+
+@pytest.mark.anyio
+async def test_concurrent_logout_of_one_token(pg_sessions):
+    async with pg_sessions() as db:
+        db.add(User(user_id="u1", user_name="u1", email="u1@example.com", hashed_password="x"))
+        await db.commit()
+    token = security.create_access_token(subject="u1", claims={"ver": 0})
+    payload = security.decode_access_token(token)
+
+    async def logout():
+        async with pg_sessions() as db:
+            await tokens.logout(db, payload)
+
+    # 同じトークンのログアウトが別々のワーカーから同時に届く
+    await asyncio.gather(*(logout() for _ in range(20)))
+    assert await _revocations(pg_sessions, token_key(payload["jti"])) == 1
@@ -0,0 +1,83 @@
+# backend/tests/test_outbox_worker.py
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.modules.chat.models import OUTBOX_PENDING, OUTBOX_SENT, SlackOutbox
+from app.modules.group.models import Group
+from app.services.fake_slack import FakeSlackServer
+from app.services.outbox_worker import OutboxWorker
+
+pytestmark = pytest.mark.anyio
+
+
+async def _enqueue(sessions, texts, start: datetime, group_id: str = "g1"):
+    async with sessions() as db:
+        for i, text in enumerate(texts):
+            db.add(SlackOutbox(
+                idempotency_key=f"test:{group_id}:{text}",
+                group_id=group_id,
+                kind="test",
+                text=text,
+                status=OUTBOX_PENDING,
+                attempts=0,
+                next_attempt_at=start,
+                # 登録順を明確にする (SQLite の now() は秒単位のため)
+                created_at=start + timedelta(milliseconds=i),
+            ))
+        await db.commit()
+
+
+async def test_failed_message_is_not_overtaken_by_later_ones(sqlite_sessions, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_BACKOFF_BASE_SECONDS", 0.5)
+    now = datetime.now(timezone.utc)
+    async with sqlite_sessions() as db:
+        db.add(Group(group_id="g1", group_name="g1", slack_bot_token="xoxb-1", slack_channel_id="C1"))
+        await db.commit()
+    await _enqueue(sqlite_sessions, ["n1", "n2", "n3"], now - timedelta(seconds=1))
+
+    async with FakeSlackServer(fail_next=1) as fake:
+        async with OutboxWorker(session_factory=sqlite_sessions, base_url=fake.base_url) as worker:
+            # n1 が一時的な障害で再送待ちになり、n2・n3 は次回に回される
+            report = await worker.drain_once()
+            assert report.claimed == 3 and report.sent == 0
+            assert fake.messages == []
+
+            # n1 の再送予定時刻より前には、n2・n3 も、後から登録した n4 も送らない
+            await _enqueue(sqlite_sessions, ["n4"], datetime.now(timezone.utc))
+            report = await worker.drain_once()
+            assert report.claimed == 0
+            assert fake.messages == []
+
+            # 再送予定時刻を過ぎると、登録順に送られる
+            await asyncio.sleep(0.8)
+            for _ in range(3):
+                await worker.drain_once()
+            assert [m["text"] for m in fake.messages] == ["n1", "n2", "n3", "n4"]
+
+    async with sqlite_sessions() as db:
+        statuses = (await db.scalars(select(SlackOutbox.status))).all()
+    assert statuses and all(s == OUTBOX_SENT for s in statuses)
+
+
+async def test_other_groups_are_not_blocked(sqlite_sessions, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_BACKOFF_BASE_SECONDS", 30)
+    now = datetime.now(timezone.utc) - timedelta(seconds=1)
+    async with sqlite_sessions() as db:
+        db.add_all([
+            Group(group_id="g1", group_name="g1", slack_bot_token="xoxb-1", slack_channel_id="C1"),
+            Group(group_id="g2", group_name="g2", slack_bot_token="xoxb-2", slack_channel_id="C2"),
+        ])
+        await db.commit()
+    await _enqueue(sqlite_sessions, ["a1", "a2"], now, group_id="g1")
+
+    async with FakeSlackServer(fail_next=1) as fake:
+        async with OutboxWorker(session_factory=sqlite_sessions, base_url=fake.base_url) as worker:
+            await worker.drain_once()
+            await _enqueue(sqlite_sessions, ["b1"], now, group_id="g2")
+            await worker.drain_once()
+            assert [m["text"] for m in fake.messages] == ["b1"]
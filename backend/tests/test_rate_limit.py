@@ -0,0 +1,150 @@
+# backend/tests/test_rate_limit.py
+
+import asyncio
+import time
+from typing import Dict
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.rate_limit import LoginLimiter, MemoryStore, RateLimitStore, RedisStore
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeRedisServer:
+    """複数のクライアント (= ワーカー) から共有される、ソート済み集合だけを持つ Redis の代わり"""
+
+    def __init__(self):
+        self.zsets: Dict[str, Dict[str, float]] = {}
+
+
+class FakeRedis:
+    """RedisStore が使う redis.asyncio.Redis のメソッドだけを実装したクライアント"""
+
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    async def zrem(self, name: str, member: str) -> int:
+        return int(self.server.zsets.get(name, {}).pop(member, None) is not None)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    def zremrangebyscore(self, name, low, high):
+        self.commands.append(("zremrangebyscore", name, low, high))
+
+    def zadd(self, name, mapping):
+        self.commands.append(("zadd", name, mapping))
+
+    def zcard(self, name):
+        self.commands.append(("zcard", name))
+
+    def pexpire(self, name, ms):
+        self.commands.append(("pexpire", name, ms))
+
+    def zrange(self, name, start, end, withscores=False):
+        self.commands.append(("zrange", name, start, end))
+
+    async def execute(self) -> list:
+        # await を挟まずに全てのコマンドを実行する (MULTI/EXEC と同じく他のクライアントが割り込まない)
+        results = []
+        for command, name, *args in self.commands:
+            zset = self.client.server.zsets.setdefault(name, {})
+            if command == "zremrangebyscore":
+                low, high = args
+                removed = [m for m, score in zset.items() if low <= score <= high]
+                for member in removed:
+                    del zset[member]
+                results.append(len(removed))
+            elif command == "zadd":
+                zset.update(args[0])
+                results.append(len(args[0]))
+            elif command == "zcard":
+                results.append(len(zset))
+            elif command == "pexpire":
+                results.append(True)
+            elif command == "zrange":
+                start, end = args
+                ordered = sorted(zset.items(), key=lambda item: item[1])
+                results.append(ordered[start:None if end == -1 else end + 1])
+        self.commands.clear()
+        return results
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_PER_EMAIL", 3)
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_PER_IP", 100)
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_WINDOW_SECONDS", 60)
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitStore()
+
+
+async def test_limit_holds_across_limiters_sharing_a_store(limits):
+    server = FakeRedisServer()
+    workers = [LoginLimiter(RedisStore(client=FakeRedis(server))) for _ in range(2)]
+
+    # 2つのワーカーに交互に送っても、メールアドレスごとの上限 (3回) は合計で数えられる
+    for i in range(3):
+        await workers[i % 2].attempt("victim@example.com", f"10.0.0.{i}")
+    for worker in workers:
+        with pytest.raises(HTTPException) as e:
+            await worker.attempt("victim@example.com", "10.0.0.9")
+        assert e.value.status_code == 429
+        assert int(e.value.headers["Retry-After"]) >= 1
+
+    # 別のメールアドレスは制限されない
+    await workers[1].attempt("other@example.com", "10.0.0.9")
+
+
+async def test_concurrent_attempts_do_not_exceed_the_shared_limit(limits):
+    server = FakeRedisServer()
+    workers = [LoginLimiter(RedisStore(client=FakeRedis(server))) for _ in range(2)]
+
+    async def attempt(i: int) -> bool:
+        try:
+            await workers[i % 2].attempt("victim@example.com", "10.0.0.1")
+        except HTTPException:
+            return False
+        return True
+
+    results = await asyncio.gather(*(attempt(i) for i in range(20)))
+    assert sum(results) == 3
+
+
+async def test_successful_login_is_undone_for_every_limiter(limits):
+    server = FakeRedisServer()
+    workers = [LoginLimiter(RedisStore(client=FakeRedis(server))) for _ in range(2)]
+
+    attempts = [await workers[0].attempt("user@example.com", "10.0.0.1") for _ in range(3)]
+    # 成功したログインは取り消されるため、もう一方のワーカーでも再び試行できる
+    await workers[0].succeeded(attempts[0])
+    await workers[1].attempt("user@example.com", "10.0.0.1")
+
+
+async def test_memory_store_window_slides(limits, monkeypatch):
+    store = MemoryStore()
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    for member in "abc":
+        assert await store.hit("k", member, 3, 60) is None
+    assert await store.hit("k", "d", 3, 60) == pytest.approx(60)
+    now[0] += 60
+    assert await store.hit("k", "d", 3, 60) is None
@@ -0,0 +1,107 @@
+# backend/tests/test_reactions_bulk.py
+
+from datetime import date
+
+from sqlalchemy import func, select
+
+from app.modules.group.models import Group
+from app.modules.task.models import Task, TaskUser_Relation
+from app.modules.task.recurrence import make_occurrence_id
+
+DTSTART = date(2026, 4, 7)
+
+
+def _setup(api, name: str):
+    """グループと毎週の繰り返し予定を作り、(headers, group_id, recurrence_id) を返す"""
+    headers = api.signup_and_login(name)
+    response = api.client.post("/groups/", json={"group_name": name}, headers=headers)
+    assert response.status_code == 201, response.text
+    group_id = response.json()["group_id"]
+    response = api.client.post(
+        f"/groups/{group_id}/tasks/templates", json={"name": "練習", "title": "全体練習"}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    response = api.client.post(
+        f"/groups/{group_id}/tasks/templates/{response.json()['template_id']}/recurrences",
+        json={"freq": "weekly", "dtstart": DTSTART.isoformat(), "count": 10},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return headers, group_id, response.json()["recurrence_id"]
+
+
+def _state(api, group_id: str):
+    """(実体化された回の数, グループの data_version)"""
+    async def read():
+        async with api.sessions() as db:
+            occurrences = await db.scalar(
+                select(func.count()).select_from(Task).where(Task.recurrence_id.is_not(None))
+            )
+            version = await db.scalar(select(Group.data_version).where(Group.group_id == group_id))
+            return occurrences, version
+    return api.run(read)
+
+
+def _reactions(api) -> dict:
+    """実体化された回の日付ごとのリアクション"""
+    async def read():
+        async with api.sessions() as db:
+            rows = await db.execute(
+                select(Task.occurrence_date, TaskUser_Relation.reaction)
+                .join(TaskUser_Relation, TaskUser_Relation.task_id == Task.task_id)
+                .where(Task.recurrence_id.is_not(None))
+            )
+            return dict(rows.all())
+    return api.run(read)
+
+
+def test_missing_task_leaves_occurrences_unmaterialized(api):
+    headers, group_id, recurrence_id = _setup(api, "bulk-missing")
+    before = _state(api, group_id)
+    assert before[0] == 0
+
+    response = api.client.put(
+        f"/groups/{group_id}/tasks/reactions",
+        json={"items": [
+            {"task_id": make_occurrence_id(recurrence_id, DTSTART), "reaction": "join"},
+            {"task_id": "no-such-task", "reaction": "join"},
+        ]},
+        headers=headers,
+    )
+    assert response.status_code == 404
+    # 先に指定した回も実体化されていない
+    assert _state(api, group_id) == before
+
+
+def test_virtual_and_materialized_id_of_one_occurrence(api):
+    headers, group_id, recurrence_id = _setup(api, "bulk-duplicate")
+    first = make_occurrence_id(recurrence_id, DTSTART)
+    second = make_occurrence_id(recurrence_id, date(2026, 4, 14))
+
+    response = api.client.put(f"/groups/{group_id}/tasks/{first}/reaction", json={"reaction": "join"}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    async def materialized_id():
+        async with api.sessions() as db:
+            return await db.scalar(select(Task.task_id).where(Task.occurrence_date == DTSTART))
+    materialized = api.run(materialized_id)
+
+    # 仮IDと実体化済みの task_id は同じ回
+    response = api.client.put(
+        f"/groups/{group_id}/tasks/reactions",
+        json={"items": [{"task_id": first, "reaction": "absent"}, {"task_id": materialized, "comment": "遅れます"}]},
+        headers=headers,
+    )
+    assert response.status_code == 422
+    assert _state(api, group_id)[0] == 1
+
+    # 実体化済みの回の仮IDと未実体化の回の仮IDは、1回のコミットでまとめて更新される
+    response = api.client.put(
+        f"/groups/{group_id}/tasks/reactions",
+        json={"items": [{"task_id": first, "reaction": "absent"}, {"task_id": second, "reaction": "join"}]},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 2
+    assert _reactions(api) == {DTSTART: "absent", date(2026, 4, 14): "join"}
+    assert _state(api, group_id)[0] == 2
@@ -0,0 +1,68 @@
+# backend/tests/test_reactions_concurrency.py
+
+import asyncio
+from collections import Counter
+from datetime import date
+
+import anyio
+import pytest
+from sqlalchemy import func, select
+
+from app.modules.group.models import Group
+from app.modules.task import relations
+from app.modules.task.models import Task, TaskUser_Relation
+from app.modules.user.models import User
+
+pytestmark = pytest.mark.anyio
+
+USERS = 300
+REACTIONS = ("join", "absent", "undecided")
+
+
+async def test_concurrent_reaction_upserts_on_one_task(pg_sessions):
+    async with pg_sessions() as db:
+        db.add(Group(group_id="g1", group_name="g1"))
+        db.add(Task(task_id="t1", group_id="g1", title="practice", date=date.today()))
+        db.add_all(
+            User(user_id=f"u{i:03d}", user_name=f"u{i}", email=f"u{i}@example.com", hashed_password="x")
+            for i in range(USERS)
+        )
+        await db.commit()
+
+    expected = {f"u{i:03d}": REACTIONS[i % len(REACTIONS)] for i in range(USERS)}
+
+    async def react(user_id: str, reaction: str):
+        async with pg_sessions() as db:
+            return await relations.apply_change(db, "t1", user_id, reaction=reaction)
+
+    # 同じユーザーからの同時の2回 (ダブルクリック) も含め、全員が同じタスクに一斉にリアクションする
+    with anyio.fail_after(120):
+        results = await asyncio.gather(*(
+            react(user_id, reaction)
+            for user_id, reaction in expected.items()
+            for _ in range(2)
+        ))
+    assert all(result is not None for result in results)
+
+    async with pg_sessions() as db:
+        rows = (await db.execute(
+            select(TaskUser_Relation.user_id, TaskUser_Relation.reaction).where(TaskUser_Relation.task_id == "t1")
+        )).all()
+        task = await db.get(Task, "t1")
+        data_version = await db.scalar(select(Group.data_version).where(Group.group_id == "g1"))
+        duplicates = await db.scalar(
+            select(func.count()).select_from(
+                select(TaskUser_Relation.user_id)
+                .group_by(TaskUser_Relation.task_id, TaskUser_Relation.user_id)
+                .having(func.count() > 1)
+                .subquery()
+            )
+        )
+
+    assert duplicates == 0
+    assert dict(rows) == expected
+    counts = Counter(expected.values())
+    assert (task.join_count, task.absent_count, task.undecided_count) == (
+        counts["join"], counts["absent"], counts["undecided"]
+    )
+    assert data_version == USERS * 2
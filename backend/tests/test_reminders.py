@@ -0,0 +1,52 @@
+# backend/tests/test_reminders.py
+
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core import scheduler
+from app.modules.group.models import Group
+from app.modules.scheduler.models import ReminderCheckpoint
+from app.modules.task.models import Task
+from app.services.fake_slack import FakeSlackServer
+from app.services.notification import SlackDeliveryQueue
+from app.services.slack_clients import SlackClientRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_one_delivery_queue_is_shared_by_all_chunks(pg_sessions, pg_sync_sessions, monkeypatch):
+    async with pg_sessions() as db:
+        for i in range(3):
+            db.add(Group(group_id=f"g{i}", group_name=f"g{i}", slack_bot_token="xoxb-1", slack_channel_id=f"C{i}"))
+            db.add(Task(group_id=f"g{i}", title=f"task{i}", date=date.today(), is_task=True))
+        await db.commit()
+
+    queues = []
+
+    class RecordingQueue(SlackDeliveryQueue):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            queues.append(self)
+
+    monkeypatch.setattr(scheduler, "SessionLocal", pg_sync_sessions)
+    monkeypatch.setattr(scheduler, "SlackDeliveryQueue", RecordingQueue)
+
+    async with FakeSlackServer() as fake:
+        clients = SlackClientRegistry(base_url=fake.base_url)
+        clients.start()
+        try:
+            report = await asyncio.to_thread(scheduler.check_and_notify_tasks, workers=3, chunk_size=1, clients=clients)
+        finally:
+            await asyncio.to_thread(clients.stop)
+
+    assert report.chunks == 3 and report.sent == 3 and report.notified_groups == 3
+    # チャンクごとにキューを作らず、同じワークスペースのトークンバケットも1つだけ
+    assert len(queues) == 1
+    assert len(queues[0]._buckets) == 1
+    assert sorted(m["channel"] for m in fake.messages) == ["C0", "C1", "C2"]
+
+    async with pg_sessions() as db:
+        assert await db.scalar(select(func.count()).select_from(ReminderCheckpoint)) == 3
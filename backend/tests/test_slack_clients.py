@@ -0,0 +1,52 @@
+# backend/tests/test_slack_clients.py
+
+import asyncio
+
+import pytest
+
+from app.modules.chat.service import send_slack_message
+from app.services.fake_slack import FakeSlackServer
+from app.services.notification import SlackDeliveryQueue
+from app.services.slack_clients import SlackClientRegistry, forget_token, token_key
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_shared_registry_is_used_from_other_loops_and_threads():
+    async with FakeSlackServer() as fake:
+        registry = SlackClientRegistry(base_url=fake.base_url)
+        registry.start()
+        try:
+            session = registry._session
+
+            # API のイベントループから
+            await send_slack_message(registry, "xoxb-1", "C1", "from api")
+
+            # スケジューラーのスレッドから (イベントループの無いスレッド)
+            queue = SlackDeliveryQueue()
+            queue.add("xoxb-1", "C1", "from scheduler")
+            queue.add("xoxb-2", "C2", "from scheduler")
+            report = await asyncio.to_thread(registry.run_sync, queue.deliver(registry))
+            assert report.sent == 2
+
+            # 送信の度にセッション・クライアントを作り直さない
+            assert registry._session is session
+            assert len(registry) == 2
+
+            stats = registry.workspace_stats()
+            assert stats[token_key("xoxb-1")]["sends"] == 2
+            assert stats[token_key("xoxb-2")]["sends"] == 1
+
+            forget_token("xoxb-2")
+            assert len(registry) == 1
+            assert token_key("xoxb-2") not in registry.workspace_stats()
+        finally:
+            await asyncio.to_thread(registry.stop)
+
+    assert sorted(m["text"] for m in fake.messages) == ["from api", "from scheduler", "from scheduler"]
+
+
+async def test_registry_must_be_started():
+    registry = SlackClientRegistry()
+    with pytest.raises(RuntimeError):
+        await send_slack_message(registry, "xoxb-1", "C1", "text")
@@ -59,8 +59,15 @@ export const Header = () => {
     setIsLogoutModalOpen(true);
   };
 
-  const confirmLogout = () => {
+  const confirmLogout = async () => {
+    // サーバー側でもトークンを失効させる (失敗してもブラウザのトークンは破棄する)
+    try {
+      await api.post('/logout', { refresh_token: localStorage.getItem('refresh_token') });
+    } catch (error) {
+      console.error("Failed to logout:", error);
+    }
     localStorage.removeItem('token'); 
+    localStorage.removeItem('refresh_token');
     setIsLogoutModalOpen(false);
     navigate('/signin');
   };
@@ -22,13 +22,40 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// アクセストークンは短時間で期限が切れるため、401 が返ったらリフレッシュトークンで再発行して1回だけやり直します
+// (同時に複数のリクエストが 401 になっても、再発行は1回にまとめます。
+//  同じリフレッシュトークンを2回使うと、サーバー側でログインごと無効にされるため)
+let refreshing = null;
+
+const refreshAccessToken = async () => {
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) throw new Error('no refresh token');
+  const response = await axios.post(`${API_URL}/token/refresh`, { refresh_token: refreshToken });
+  localStorage.setItem('token', response.data.access_token);
+  localStorage.setItem('refresh_token', response.data.refresh_token);
+  return response.data.access_token;
+};
+
 // レスポンス受信後の処理
 api.interceptors.response.use(
   (response) => {
     return response;
   },
-  (error) => {
-    // 認証エラー(401)が出たら、コンソールに表示したりログアウトさせたりする処理をここに書けます
+  async (error) => {
+    const original = error.config;
+    if (error.response && error.response.status === 401 && original && !original._retried) {
+      original._retried = true;
+      try {
+        refreshing = refreshing || refreshAccessToken().finally(() => { refreshing = null; });
+        const token = await refreshing;
+        original.headers.Authorization = `Bearer ${token}`;
+        return api(original);
+      } catch (refreshError) {
+        // 再発行できない場合 (期限切れ・ログアウト済み) はトークンを破棄する
+        localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
+      }
+    }
     return Promise.reject(error);
   }
 );
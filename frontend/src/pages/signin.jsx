@@ -35,8 +35,9 @@ const SigninPage = () => {
       });
 
       // 成功時: トークンを保存してカレンダーへ
-      const { access_token } = response.data;
+      const { access_token, refresh_token } = response.data;
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       console.log('Login successful');
       
       navigate('/calendar');
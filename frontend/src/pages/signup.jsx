@@ -50,8 +50,9 @@ const SignupPage = () => {
       // ------------------------------------------------
       // 3. トークン保存 & 画面遷移
       // ------------------------------------------------
-      const { access_token } = loginResponse.data;
+      const { access_token, refresh_token } = loginResponse.data;
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       
       console.log('自動ログイン成功！');
       navigate('/calendar');